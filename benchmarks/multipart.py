@@ -0,0 +1,74 @@
+""" Multipart benchmark, compares the streaming parser with the former `email.parser` path.
+
+    Run with `python benchmarks/multipart.py [size in MiB]`.
+"""
+
+import sys
+import tracemalloc
+from email.parser import BytesParser
+from os import path, urandom
+from time import perf_counter
+
+sys.path.insert(0, path.dirname(path.dirname(path.realpath(__file__))))
+
+from yasgi.multipart import MultipartParser  # noqa: E402
+
+BOUNDARY = b"----yasgi-benchmark"
+CONTENT_TYPE = "multipart/form-data; boundary=" + BOUNDARY.decode()
+CHUNK = 64 * 1024
+
+
+def build(size: int) -> bytes:
+    return (
+        b"--" + BOUNDARY + b"\r\n"
+        b'Content-Disposition: form-data; name="field"\r\n\r\n'
+        b"value\r\n"
+        b"--" + BOUNDARY + b"\r\n"
+        b'Content-Disposition: form-data; name="file"; filename="data.bin"\r\n'
+        b"Content-Type: application/octet-stream\r\n\r\n"
+        + urandom(size)
+        + b"\r\n--"
+        + BOUNDARY
+        + b"--\r\n"
+    )
+
+
+def email_parser(body: bytes) -> dict:
+    message = BytesParser().parsebytes(
+        b"Content-Type: " + CONTENT_TYPE.encode() + b"\n" + body
+    )
+    return {
+        p.get_param("name", header="content-disposition"): p.get_payload(decode=True)
+        for p in message.get_payload()
+    }
+
+
+def streaming_parser(body: bytes) -> dict:
+    parser = MultipartParser.from_content_type(CONTENT_TYPE)
+    view = memoryview(body)
+    for start in range(0, len(body), CHUNK):
+        parser.feed(view[start : start + CHUNK])
+    return parser.close()
+
+
+def measure(parse, body: bytes) -> tuple:
+    tracemalloc.start()
+    start = perf_counter()
+    parse(body)
+    elapsed = perf_counter() - start
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return elapsed, peak
+
+
+def main(size: int = 32):
+    body = build(size * 1024 * 1024)
+    print(f"{size} MiB file part, body fed in {CHUNK // 1024} KiB chunks")
+    print(f"{'parser':<10} {'time (ms)':>10} {'peak (MiB)':>11}")
+    for name, parse in (("email", email_parser), ("streaming", streaming_parser)):
+        elapsed, peak = measure(parse, body)
+        print(f"{name:<10} {elapsed * 1000:>10.1f} {peak / 1024 / 1024:>11.1f}")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 32)
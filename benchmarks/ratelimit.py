@@ -0,0 +1,60 @@
+"""Rate limiter benchmark, measures the per-request cost of `RateLimit` and the memory of its keys.
+
+Run with `python benchmarks/ratelimit.py [clients]`.
+"""
+
+import sys
+import tracemalloc
+from os import path
+from timeit import Timer
+
+sys.path.insert(0, path.dirname(path.dirname(path.realpath(__file__))))
+
+from yasgi import HTTPRequest, RateLimit  # noqa: E402
+
+ROUNDS = 200000
+CLIENTS = 1000000
+
+
+def request(address: str) -> HTTPRequest:
+    scope = {
+        "type": "http",
+        "method": "GET",
+        "path": "/",
+        "query_string": b"",
+        "headers": [(b"x-api-key", b"key")],
+        "client": (address, 50000),
+    }
+    return HTTPRequest(scope, {"type": "http.request", "body": b""})
+
+
+def main(clients: int = CLIENTS):
+    print(f"{'case':<24} {'time (us)':>10}")
+    limit = RateLimit(1e9)
+    time = Timer(lambda: limit.hit("client")).timeit(ROUNDS)
+    print(f"{'hit, one key':<24} {time / ROUNDS * 1e6:>10.3f}")
+
+    keys = [f"10.{i >> 16 & 255}.{i >> 8 & 255}.{i & 255}" for i in range(clients)]
+    limit = RateLimit(10, per=60)
+    time = Timer(lambda: [limit.hit(key) for key in keys]).timeit(1)
+    print(f"{f'hit, {clients} keys':<24} {time / clients * 1e6:>10.3f}")
+    limit = RateLimit(10, per=60)
+    tracemalloc.start()
+    for key in keys:
+        limit.hit(key)
+    memory = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+
+    for name, limit, req in (
+        ("check, client address", RateLimit(1e9), request("10.0.0.1")),
+        ("check, header", RateLimit(1e9, header="x-api-key"), request("10.0.0.1")),
+    ):
+        time = Timer(lambda: limit.check(req)).timeit(ROUNDS)
+        print(f"{name:<24} {time / ROUNDS * 1e6:>10.3f}")
+    print(
+        f"\n{len(keys)} keys take {memory / 2 ** 20:.1f} MiB ({memory // clients} B per key)"
+    )
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else CLIENTS)
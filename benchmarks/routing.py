@@ -0,0 +1,55 @@
+"""Route lookup benchmark, compares the radix tree with a linear scan of regex routes.
+
+Run with `python benchmarks/routing.py [routes]`.
+"""
+
+import sys
+from os import path
+from re import compile
+from timeit import Timer
+
+sys.path.insert(0, path.dirname(path.dirname(path.realpath(__file__))))
+
+from yasgi.routing import RouteTree  # noqa: E402
+
+ROUNDS = 20000
+
+
+def build(count: int):
+    tree = RouteTree()
+    regex = []
+    for i in range(count):
+        tree.insert(f"/r{i}/users/{{id:int}}/orders/{{oid}}/", "GET", i)
+        regex.append((compile(rf"/r{i}/users/(\d+)/orders/([^/]+)/?$"), ["GET"], i))
+    return tree, regex
+
+
+def scan(regex: list, path: str, method: str):
+    for item in regex:
+        if match := item[0].match(path):
+            if method in item[1]:
+                return item[2], match.groups()
+    return None
+
+
+def main(count: int = 1000):
+    tree, regex = build(count)
+    cases = {
+        "first": "/r0/users/7/orders/abc",
+        "middle": f"/r{count // 2}/users/7/orders/abc",
+        "last": f"/r{count - 1}/users/7/orders/abc",
+        "404": "/missing/users/7/orders/abc",
+    }
+    print(f"{count} routes, {ROUNDS} lookups per case")
+    print(f"{'case':<8} {'tree (us)':>10} {'regex (us)':>11} {'speedup':>8}")
+    for name, url in cases.items():
+        tree_time = Timer(lambda: tree.find(url, "GET")).timeit(ROUNDS)
+        regex_time = Timer(lambda: scan(regex, url, "GET")).timeit(ROUNDS)
+        print(
+            f"{name:<8} {tree_time / ROUNDS * 1e6:>10.2f} "
+            f"{regex_time / ROUNDS * 1e6:>11.2f} {regex_time / tree_time:>7.1f}x"
+        )
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 1000)
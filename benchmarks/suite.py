@@ -0,0 +1,292 @@
+"""Throughput, latency and allocation benchmark of the request pipeline.
+
+Every case is run in-process with `yasgi.testclient.TestClient` or directly on the parsing objects,
+and reports ops/sec, p50/p99 latency and the peak bytes allocated per operation (tracemalloc).
+
+Run with `python benchmarks/suite.py [-k case] [-n rounds] [--save file.json] [--compare file.json]`,
+results are saved to `benchmarks/results/<git revision>.json` unless `--save` is given.
+"""
+
+import asyncio
+import sys
+import tracemalloc
+from argparse import ArgumentParser
+from datetime import datetime, timezone
+from os import makedirs, path
+from platform import python_version
+from subprocess import run
+from time import perf_counter_ns
+
+ROOT = path.dirname(path.dirname(path.realpath(__file__)))
+sys.path.insert(0, ROOT)
+
+from orjson import dumps, loads  # noqa: E402
+
+from yasgi import YASGI, HTTPRequest, Metrics, Profiler, RateLimit  # noqa: E402
+from yasgi.testclient import TestClient  # noqa: E402
+
+RESULTS = path.join(ROOT, "benchmarks", "results")
+ROUNDS = 2000
+ALLOCATION_ROUNDS = 200
+ROWS = [
+    {"id": i, "name": f"row-{i}", "tags": ["a", "b"], "price": i / 3}
+    for i in range(100)
+]
+HEADERS = [(f"x-header-{i}".encode(), f"value-{i}".encode()) for i in range(20)] + [
+    (b"host", b"localhost"),
+    (b"accept", b"application/json"),
+    (b"cookie", b"session=abc; theme=dark; lang=en; id=42"),
+]
+QUERY = b"&".join(f"key{i}=value{i}&tag=t{i}".encode() for i in range(10))
+JSON = {"content-type": "application/json"}
+BOUNDARY = "benchmarkboundary"
+MULTIPART = (
+    (
+        f"--{BOUNDARY}\r\n"
+        'Content-Disposition: form-data; name="title"\r\n\r\n'
+        "report\r\n"
+        f"--{BOUNDARY}\r\n"
+        'Content-Disposition: form-data; name="file"; filename="data.bin"\r\n'
+        "Content-Type: application/octet-stream\r\n\r\n"
+    ).encode()
+    + b"x" * 16384
+    + f"\r\n--{BOUNDARY}--\r\n".encode()
+)
+
+
+def build_app() -> YASGI:
+    app = YASGI(content_type="application/json")
+    for i in range(1000):
+        app.route(f"/r{i}/users/{{id:int}}")(_handler)
+
+    @app.route("/health")
+    async def health(req, resp):
+        return {"status": "ok"}
+
+    @app.route("/static", static=True)
+    async def static(req, resp):
+        return {"status": "ok"}
+
+    @app.route("/middleware", middleware=[_passthrough] * 3)
+    async def middleware(req, resp):
+        return {"status": "ok"}
+
+    @app.route("/limited", rate_limit=RateLimit(1e9))
+    async def limited(req, resp):
+        return {"status": "ok"}
+
+    @app.route("/sync")
+    def sync(req, resp):
+        return {"status": "ok"}
+
+    @app.route("/rows")
+    async def rows(req, resp):
+        return ROWS
+
+    @app.route("/text", content_type="text/plain")
+    async def text(req, resp):
+        return "jezevec" * 100
+
+    @app.route("/body", methods=["POST"])
+    async def body(req, resp):
+        return {"size": len(req.data)}
+
+    @app.route("/form", methods=["POST"])
+    async def form(req, resp):
+        return {"size": len(await req.form())}
+
+    @app.websocket("/echo")
+    async def echo(req, resp, args):
+        if req.event["type"] == "websocket.receive":
+            await resp.send(req.data)
+
+    return app
+
+
+async def _handler(req, resp, id):
+    return None
+
+
+async def _health(req, resp):
+    return {"status": "ok"}
+
+
+async def _passthrough(request, response, call_next):
+    return await call_next()
+
+
+def _request(headers=HEADERS, query=QUERY) -> HTTPRequest:
+    scope = {
+        "type": "http",
+        "method": "GET",
+        "path": "/",
+        "query_string": query,
+        "headers": headers,
+    }
+    return HTTPRequest(scope, {"type": "http.request", "body": b""})
+
+
+def cases(app: YASGI, client: TestClient) -> dict:
+    router = app.router
+    metered = YASGI(content_type="application/json", metrics=Metrics())
+    metered.route("/health")(_health)
+    metered_client = TestClient(metered)
+    # unsampled requests, only the sample check runs
+    profiled = YASGI(
+        content_type="application/json", profiler=Profiler(0.001, token="x")
+    )
+    profiled.route("/health")(_health)
+    profiled_client = TestClient(profiled)
+    json_body = dumps(ROWS)
+    multipart = f"multipart/form-data; boundary={BOUNDARY}"
+
+    async def websocket(rounds: int, measure):
+        async with client.websocket("/echo") as session:
+            for _ in range(rounds):
+                start = perf_counter_ns()
+                await session.send_text('{"ping": 1}')
+                await session.receive()
+                measure(start)
+
+    return {
+        "routing.static": lambda: router.http("/health", "GET"),
+        "routing.param": lambda: router.http("/r999/users/7", "GET"),
+        "routing.404": lambda: router.http("/missing/users/7", "GET"),
+        "parse.headers": lambda: _request().headers,
+        "parse.query": lambda: _request().query_params,
+        "parse.cookies": lambda: _request().cookies,
+        "http.health": lambda: client.get("/health"),
+        "http.static": lambda: client.get("/static"),
+        "http.middleware": lambda: client.get("/middleware"),
+        "http.ratelimit": lambda: client.get("/limited"),
+        "http.sync": lambda: client.get("/sync"),
+        "http.json": lambda: client.get("/rows"),
+        "http.text": lambda: client.get("/text"),
+        "http.404": lambda: client.get("/missing"),
+        "metrics.health": lambda: metered_client.get("/health"),
+        "metrics.render": metered.metrics.render,
+        "profiler.health": lambda: profiled_client.get("/health"),
+        "body.json": lambda: client.post("/body", body=json_body, headers=JSON),
+        "body.form": lambda: client.post("/form", form={"a": "1", "b": ["2", "3"]}),
+        "body.multipart": lambda: client.post(
+            "/form", body=MULTIPART, headers={"content-type": multipart}
+        ),
+        "websocket.echo": websocket,
+    }
+
+
+async def measure(case, rounds: int) -> dict:
+    samples: list = []
+
+    def sample(start: int) -> None:
+        samples.append(perf_counter_ns() - start)
+
+    await _run(case, max(rounds // 10, 1), lambda start: None)
+    began = perf_counter_ns()
+    await _run(case, rounds, sample)
+    total = perf_counter_ns() - began
+
+    tracemalloc.start()
+    peaks = []
+
+    def allocated(start: int) -> None:
+        peaks.append(tracemalloc.get_traced_memory()[1] - current[0])
+
+    current = [0]
+    for _ in range(ALLOCATION_ROUNDS):
+        current[0] = tracemalloc.get_traced_memory()[0]
+        tracemalloc.reset_peak()
+        await _run(case, 1, allocated)
+    tracemalloc.stop()
+
+    samples.sort()
+    return {
+        "ops": round(rounds / total * 1e9, 1),
+        "p50_us": round(samples[len(samples) // 2] / 1e3, 2),
+        "p99_us": round(
+            samples[min(len(samples) * 99 // 100, len(samples) - 1)] / 1e3, 2
+        ),
+        "alloc_bytes": sorted(peaks)[len(peaks) // 2],
+    }
+
+
+async def _run(case, rounds: int, measure) -> None:
+    if asyncio.iscoroutinefunction(case):
+        return await case(rounds, measure)
+    for _ in range(rounds):
+        start = perf_counter_ns()
+        result = case()
+        if asyncio.iscoroutine(result):
+            await result
+        measure(start)
+
+
+def revision() -> str:
+    result = run(
+        ["git", "rev-parse", "--short", "HEAD"],
+        cwd=ROOT,
+        capture_output=True,
+        text=True,
+    )
+    return result.stdout.strip() or "unknown"
+
+
+def compare(results: dict, baseline: dict) -> None:
+    print(f"\ncompared to {baseline['revision']} ({baseline['date']})")
+    print(f"{'case':<16} {'ops':>12} {'p99':>10} {'alloc':>10}")
+    for name, result in results.items():
+        base = baseline["cases"].get(name)
+        if base is None:
+            continue
+        print(
+            f"{name:<16} {_delta(result['ops'], base['ops']):>12} "
+            f"{_delta(result['p99_us'], base['p99_us']):>10} "
+            f"{_delta(result['alloc_bytes'], base['alloc_bytes']):>10}"
+        )
+
+
+def _delta(value: float, base: float) -> str:
+    return f"{(value - base) / base * 100:+.1f}%" if base else "-"
+
+
+async def main(args) -> None:
+    app = build_app()
+    client = TestClient(app)
+    results = {}
+    print(
+        f"{'case':<16} {'ops/sec':>12} {'p50 (us)':>10} {'p99 (us)':>10} {'alloc (B)':>10}"
+    )
+    for name, case in cases(app, client).items():
+        if args.k and args.k not in name:
+            continue
+        result = results[name] = await measure(case, args.n)
+        print(
+            f"{name:<16} {result['ops']:>12.1f} {result['p50_us']:>10.2f} "
+            f"{result['p99_us']:>10.2f} {result['alloc_bytes']:>10}"
+        )
+
+    report = {
+        "revision": revision(),
+        "date": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "python": python_version(),
+        "rounds": args.n,
+        "cases": results,
+    }
+    target = args.save or path.join(RESULTS, f"{report['revision']}.json")
+    makedirs(path.dirname(path.abspath(target)), exist_ok=True)
+    with open(target, "wb") as file:
+        file.write(dumps(report))
+    print(f"\nsaved to {target}")
+
+    if args.compare:
+        with open(args.compare, "rb") as file:
+            compare(results, loads(file.read()))
+
+
+if __name__ == "__main__":
+    parser = ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("-k", help="run only cases containing this string")
+    parser.add_argument("-n", type=int, default=ROUNDS, help="rounds per case")
+    parser.add_argument("--save", help="result file (default: results/<revision>.json)")
+    parser.add_argument("--compare", help="result file to compare with")
+    asyncio.run(main(parser.parse_args()))
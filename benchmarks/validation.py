@@ -0,0 +1,109 @@
+"""Request validation benchmark, compares the compiled validator of a route with hand-written checks.
+
+Run with `python benchmarks/validation.py [rounds]`.
+"""
+
+import sys
+from dataclasses import dataclass
+from os import path
+from timeit import Timer
+from typing import List, Optional
+
+sys.path.insert(0, path.dirname(path.dirname(path.realpath(__file__))))
+
+from orjson import dumps  # noqa: E402
+
+from yasgi.exceptions import ValidationError  # noqa: E402
+from yasgi.requests import HTTPRequest  # noqa: E402
+from yasgi.validation import compile_validator  # noqa: E402
+
+ROUNDS = 20000
+
+
+@dataclass
+class Order:
+    item: str
+    quantity: int
+    price: float
+    note: Optional[str] = None
+    tags: Optional[List[str]] = None
+
+
+async def handler(
+    req, resp, id: int, order: Order, page: int = 1, dry_run: bool = False
+):
+    return None
+
+
+def by_hand(request, url_args):
+    errors = []
+    try:
+        id = int(url_args[0])
+    except ValueError:
+        errors.append({"loc": ["path", "id"], "msg": "Input should be a valid integer"})
+    query = request.query_params
+    try:
+        page = int(query.get("page", 1))
+    except ValueError:
+        errors.append(
+            {"loc": ["query", "page"], "msg": "Input should be a valid integer"}
+        )
+    dry_run = query.get("dry_run", "false").lower() in ("1", "true", "yes", "on")
+    data = request.data
+    if type(data) != dict:
+        raise ValidationError([{"loc": ["body"], "msg": "Input should be an object"}])
+    for name, kind in (("item", str), ("quantity", int), ("price", (int, float))):
+        if name not in data:
+            errors.append({"loc": ["body", name], "msg": "Field required"})
+        elif not isinstance(data[name], kind) or type(data[name]) == bool:
+            errors.append({"loc": ["body", name], "msg": "Invalid type"})
+    if data.get("note") is not None and type(data["note"]) != str:
+        errors.append({"loc": ["body", "note"], "msg": "Input should be str"})
+    tags = data.get("tags")
+    if tags is not None and (
+        type(tags) != list or any(type(tag) != str for tag in tags)
+    ):
+        errors.append({"loc": ["body", "tags"], "msg": "Input should be a list"})
+    if errors:
+        raise ValidationError(errors)
+    return [id], {"order": Order(**data), "page": page, "dry_run": dry_run}
+
+
+def request() -> HTTPRequest:
+    body = dumps({"item": "pes", "quantity": 2, "price": 1.5, "tags": ["a", "b"]})
+    scope = {
+        "type": "http",
+        "method": "POST",
+        "path": "/users/7/orders",
+        "query_string": b"page=2&dry_run=yes",
+        "headers": [(b"content-type", b"application/json")],
+    }
+    return HTTPRequest(scope, {"type": "http.request", "body": body})
+
+
+def main(rounds: int = ROUNDS):
+    compiled = compile_validator(handler, "/users/{id}/orders")
+    assert (
+        compiled(request(), ("7",))[1]["order"]
+        == by_hand(request(), ("7",))[1]["order"]
+    )
+
+    print(f"{rounds} validations per case (request parsing included)")
+    print(f"{'case':<10} {'time (us)':>10}")
+
+    def introspected(request, url_args):
+        return compile_validator(handler, "/users/{id}/orders")(request, url_args)
+
+    for name, validate in (
+        ("compiled", compiled),
+        ("by hand", by_hand),
+        ("inspect", introspected),
+    ):
+        time = Timer(lambda: validate(request(), ("7",))).timeit(rounds)
+        print(f"{name:<10} {time / rounds * 1e6:>10.2f}")
+    time = Timer(request).timeit(rounds)
+    print(f"{'request':<10} {time / rounds * 1e6:>10.2f}")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else ROUNDS)
@@ -0,0 +1,114 @@
+import asyncio
+from gzip import decompress
+from json import loads
+
+from requests import get
+
+from tests.conftest import Server
+from yasgi import YASGI, Compressor, ResponseCache, Routing
+from yasgi.testclient import TestClient
+
+
+def test_cache():
+    def app_wrapper():
+        app = YASGI(content_type="application/json")
+        calls = {"cached": 0, "cookie": 0}
+        cache = ResponseCache(ttl=60, maxsize=2, vary=["x-tenant"])
+
+        @Routing("/cached", cache=cache)
+        async def cached(req, resp):
+            calls["cached"] += 1
+            return {"calls": calls["cached"]}
+
+        @Routing("/cookie", cache=ResponseCache())
+        async def cookie(req, resp):
+            calls["cookie"] += 1
+            resp.set_cookie("session", "1")
+            return {"calls": calls["cookie"]}
+
+        @Routing("/stats")
+        async def stats(req, resp):
+            return cache.stats
+
+        return app
+
+    server = Server(app_wrapper)
+    assert loads(get("http://localhost:3000/cached").text) == {"calls": 1}
+    assert loads(get("http://localhost:3000/cached").text) == {"calls": 1}
+    assert loads(get("http://localhost:3000/cached?page=2").text) == {"calls": 2}
+    response = get("http://localhost:3000/cached", headers={"X-Tenant": "a"})
+    assert loads(response.text) == {"calls": 3}
+    assert loads(get("http://localhost:3000/cached").text) == {"calls": 4}
+    assert loads(get("http://localhost:3000/stats").text) == {
+        "hits": 1,
+        "misses": 4,
+        "evictions": 2,
+        "size": 2,
+    }
+    assert loads(get("http://localhost:3000/cookie").text) == {"calls": 1}
+    assert loads(get("http://localhost:3000/cookie").text) == {"calls": 2}
+    server.stop()
+
+
+async def test_cache_single_flight():
+    app = YASGI(content_type="text/plain")
+    cache = ResponseCache(ttl=0.05)
+    calls = []
+
+    @app.route("/", cache=cache)
+    async def slow(req, resp):
+        calls.append(1)
+        await asyncio.sleep(0.01)
+        return "slow"
+
+    client = TestClient(app)
+
+    async def request():
+        return (await client.get("/")).body
+
+    assert await asyncio.gather(*(request() for _ in range(10))) == [b"slow"] * 10
+    assert len(calls) == 1
+    assert (cache.hits, cache.misses) == (9, 1)
+
+    await asyncio.sleep(0.06)
+    await request()
+    assert len(calls) == 2
+    assert cache.evictions == 1
+
+
+async def test_cache_conditional():
+    app = YASGI(content_type="application/json")
+    calls = []
+
+    @app.route("/cached", cache=ResponseCache(), etag=True)
+    async def cached(req, resp):
+        calls.append(1)
+        return {"calls": len(calls)}
+
+    client = TestClient(app)
+    response = await client.get("/cached")
+    etag = response.headers["etag"]
+    response = await client.get("/cached", headers={"if-none-match": etag})
+    assert (response.status, response.body) == (304, b"")
+    assert response.headers["etag"] == etag
+    assert "content-length" not in response.headers
+    response = await client.get("/cached", headers={"if-none-match": '"x"'})
+    assert (response.status, response.json()) == (200, {"calls": 1})
+    assert len(calls) == 1
+
+    @app.route("/report", cache=ResponseCache(), compression=Compressor(minimum_size=0))
+    async def report(req, resp):
+        calls.append(1)
+        if resp.conditional(etag="v1"):
+            return None
+        return {"report": 1}
+
+    response = await client.get("/report", headers={"accept-encoding": "gzip"})
+    assert response.headers["content-encoding"] == "gzip"
+    assert loads(decompress(response.body)) == {"report": 1}
+    response = await client.get("/report")
+    assert "content-encoding" not in response.headers
+    assert response.json() == {"report": 1}
+    response = await client.get("/report", headers={"if-none-match": '"v1"'})
+    assert (response.status, response.body) == (304, b"")
+    assert len(calls) == 2
@@ -0,0 +1,87 @@
+from dataclasses import dataclass
+from datetime import datetime
+
+import pytest
+from orjson import OPT_NON_STR_KEYS
+
+from yasgi import YASGI, Codecs, JSONCodec, RawCodec
+from yasgi.testclient import TestClient
+
+
+@dataclass
+class Point:
+    x: int
+    y: int
+
+
+async def test_json_codec_options():
+    app = YASGI(codecs=Codecs(JSONCodec(option=OPT_NON_STR_KEYS)))
+
+    @app.route("/point")
+    async def point(req, resp):
+        return {1: Point(1, 2), "at": datetime(2022, 8, 1), "ok": True}
+
+    response = await TestClient(app).get("/point")
+    assert response.json() == {
+        "1": {"x": 1, "y": 2},
+        "at": "2022-08-01T00:00:00",
+        "ok": True,
+    }
+    assert "vary" not in response.headers
+
+
+async def test_negotiation():
+    msgpack = pytest.importorskip("msgpack")
+    from yasgi import MsgPackCodec
+
+    app = YASGI(codecs=Codecs(JSONCodec(), MsgPackCodec(), RawCodec()))
+
+    @app.route("/rows", methods=["GET", "POST"])
+    async def rows(req, resp):
+        if req.method == "POST":
+            data = req.data
+            return {"received": len(data) if type(data) == bytes else data}
+        return [{"id": 1}]
+
+    @app.route("/text", content_type="text/plain")
+    async def text(req, resp):
+        return "jezevec"
+
+    client = TestClient(app)
+    response = await client.get("/rows")
+    assert response.headers["content-type"] == "application/json;charset=UTF-8"
+    assert response.headers["vary"] == "Accept"
+    response = await client.get(
+        "/rows", headers={"accept": "application/json;q=0.5, application/msgpack"}
+    )
+    assert response.headers["content-type"] == "application/msgpack;charset=UTF-8"
+    assert msgpack.unpackb(response.body) == [{"id": 1}]
+    response = await client.get("/rows", headers={"accept": "text/html, */*;q=0.1"})
+    assert response.json() == [{"id": 1}]
+
+    response = await client.post(
+        "/rows",
+        body=msgpack.packb({"a": 1}),
+        headers={"content-type": "application/msgpack", "accept": "application/json"},
+    )
+    assert response.json() == {"received": {"a": 1}}
+    response = await client.post(
+        "/rows", body=b"\x00\x01", headers={"content-type": "application/octet-stream"}
+    )
+    assert response.json() == {"received": 2}
+
+    response = await client.get("/text", headers={"accept": "application/msgpack"})
+    assert response.text == "jezevec"
+    assert "vary" not in response.headers
+
+
+def test_codecs_registry():
+    codecs = Codecs(JSONCodec(), RawCodec())
+    assert codecs.negotiate(
+        "application/octet-stream", "application/json"
+    ).media_type == ("application/octet-stream")
+    assert codecs.negotiate("application/*", "application/json").media_type == (
+        "application/json"
+    )
+    assert codecs.negotiate("", "text/plain") is None
+    assert RawCodec().encode(memoryview(b"abc")) == b"abc"
@@ -0,0 +1,77 @@
+from json import loads
+from zlib import decompress
+
+from requests import get
+
+from tests.conftest import Server
+from yasgi import YASGI, Compressor, Routing
+
+ROWS = [{"id": i, "name": f"row-{i}"} for i in range(200)]
+
+
+def test_compression():
+    def app_wrapper():
+        app = YASGI(content_type="application/json", compression=Compressor())
+
+        @Routing("/large")
+        async def large(req, resp):
+            return ROWS
+
+        @Routing("/small")
+        async def small(req, resp):
+            return {"id": 1}
+
+        @Routing("/disabled", compression=False)
+        async def disabled(req, resp):
+            return ROWS
+
+        @Routing("/stream", content_type="text/plain")
+        async def stream(req, resp):
+            return (f"{row['name']}\n" for row in ROWS)
+
+        return app
+
+    server = Server(app_wrapper)
+    response = get("http://localhost:3000/large")
+    assert response.headers["Content-Encoding"] == "gzip"
+    assert response.headers["Vary"] == "Accept-Encoding"
+    assert loads(response.text) == ROWS
+
+    response = get("http://localhost:3000/large", headers={"Accept-Encoding": "br"})
+    assert "Content-Encoding" not in response.headers
+    assert loads(response.text) == ROWS
+
+    response = get(
+        "http://localhost:3000/large",
+        headers={"Accept-Encoding": "gzip;q=0.5, deflate"},
+        stream=True,
+    )
+    assert response.headers["Content-Encoding"] == "deflate"
+    assert loads(decompress(response.raw.read())) == ROWS
+
+    response = get("http://localhost:3000/small")
+    assert "Content-Encoding" not in response.headers
+    assert response.headers["Vary"] == "Accept-Encoding"
+
+    response = get("http://localhost:3000/disabled")
+    assert "Content-Encoding" not in response.headers
+
+    response = get("http://localhost:3000/stream")
+    assert response.headers["Content-Encoding"] == "gzip"
+    assert response.text == "".join(f"{row['name']}\n" for row in ROWS)
+    server.stop()
+
+
+def test_compressor():
+    compressor = Compressor(cache_size=1)
+    assert compressor.negotiate("gzip, deflate") == "gzip"
+    assert compressor.negotiate("deflate;q=1, gzip;q=0.1") == "deflate"
+    assert compressor.negotiate("gzip;q=0, *") == "deflate"
+    assert compressor.negotiate("identity") is None
+
+    body = b"jezevec" * 100
+    first = compressor.compress(body, "gzip")
+    assert compressor.compress(body, "gzip") is first
+    assert decompress(first, 31) == body
+    compressor.compress(b"pes" * 100, "gzip")
+    assert compressor.compress(body, "gzip") is not first
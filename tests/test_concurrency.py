@@ -0,0 +1,90 @@
+import asyncio
+import threading
+import time
+from contextvars import ContextVar
+
+import pytest
+
+from yasgi import YASGI, ThreadPool, offload
+from yasgi.testclient import TestClient
+
+user: ContextVar = ContextVar("user", default=None)
+
+
+async def test_sync_handler():
+    async def authenticate(request, response, call_next):
+        user.set(request.headers.get("x-user"))
+        return await call_next()
+
+    app = YASGI(content_type="application/json", middleware=[authenticate])
+
+    @app.route("/users/{id}", methods=["POST"], validate=True)
+    def update(req, resp, id: int):
+        time.sleep(0.1)
+        return {
+            "id": id,
+            "user": user.get(),
+            "thread": threading.current_thread().name,
+            "body": req.data,
+        }
+
+    @app.route("/ping")
+    async def ping(req, resp):
+        return {"ping": True}
+
+    client = TestClient(app)
+    slow = asyncio.create_task(
+        client.post("/users/7", json={"name": "pes"}, headers={"x-user": "jezevec"})
+    )
+    await asyncio.sleep(0.02)
+    # the blocking handler does not hold the event loop
+    assert (await client.get("/ping")).json() == {"ping": True}
+    assert not slow.done()
+
+    data = (await slow).json()
+    assert data["thread"].startswith("yasgi")
+    assert data == dict(data, id=7, user="jezevec", body={"name": "pes"})
+    assert (await client.post("/users/x")).status == 422
+
+    with pytest.raises(RuntimeError):
+        app.route("/upload", methods=["POST"], stream=True)(lambda req, resp: None)
+
+
+async def test_concurrency():
+    running, peak = [0], [0]
+    app = YASGI(content_type="application/json")
+
+    @app.route("/slow", concurrency=2)
+    async def slow(req, resp):
+        running[0] += 1
+        peak[0] = max(peak[0], running[0])
+        await asyncio.sleep(0.01)
+        running[0] -= 1
+        return {}
+
+    client = TestClient(app)
+    responses = await asyncio.gather(*(client.get("/slow") for _ in range(6)))
+    assert [response.status for response in responses] == [200] * 6
+    assert peak[0] == 2
+
+
+async def test_offload():
+    pool = ThreadPool(max_threads=2)
+    app = YASGI(content_type="application/json", thread_pool=pool)
+
+    def blocking(value):
+        time.sleep(0.01)
+        return threading.current_thread().name, value * 2, user.get()
+
+    @app.route("/")
+    async def index(req, resp):
+        user.set("pes")
+        name, value, current = await offload(blocking, 21)
+        return {"thread": name, "value": value, "user": current}
+
+    async with TestClient(app) as client:
+        data = (await client.get("/")).json()
+        assert data == dict(data, value=42, user="pes")
+        assert data["thread"].startswith("yasgi")
+        assert pool._executor is not None
+    assert pool._executor is None
@@ -1,7 +1,11 @@
+from time import time
+
 from requests import get
 
 from tests.conftest import Server
-from yasgi import YASGI, Routing
+from yasgi import YASGI, CookieSessions, Routing
+from yasgi.cookies import parse_cookies
+from yasgi.testclient import TestClient
 
 
 def test_cookies():
@@ -15,8 +19,7 @@ def test_cookies():
 
         @Routing("/cookie-req", content_type="text/plain")
         async def header_req(req, resp):
-            jezevec = req.cookies["jezevec"]
-            return "{}-{}".format(jezevec.value, jezevec["max-age"])
+            return "{}-{}".format(req.cookies["jezevec"], req.cookies["Max-Age"])
 
         return app
 
@@ -35,3 +38,70 @@ def test_cookies():
     assert response.headers["Content-Type"][:10] == "text/plain"
     assert response.text == "kocka-345"
     server.stop()
+
+
+def test_parse_cookies():
+    assert parse_cookies('a=1; b="two words"; c=x=y; broken; a=2;  d = 4 ') == {
+        "a": "1",
+        "b": "two words",
+        "c": "x=y",
+        "d": "4",
+    }
+    assert parse_cookies("") == {}
+
+
+async def test_cookie_sessions():
+    sessions = CookieSessions("secret", max_age=60, max_size=200)
+    app = YASGI(content_type="application/json", sessions=sessions)
+
+    @app.route("/login", methods=["POST"])
+    async def login(req, resp):
+        req.session["user"] = req.data["user"]
+        return {"new": req.session.new}
+
+    @app.route("/me")
+    async def me(req, resp):
+        return {"user": req.session.get("user"), "cookies": req.cookies}
+
+    @app.route("/logout")
+    async def logout(req, resp):
+        req.session.clear()
+        return None
+
+    @app.route("/large")
+    async def large(req, resp):
+        req.session["data"] = "x" * 200
+        return None
+
+    client = TestClient(app)
+    response = await client.post("/login", form={"user": "jezevec"})
+    assert response.json() == {"new": True}
+    cookie = response.headers["set-cookie"]
+    assert cookie.startswith("session=")
+    assert "; Max-Age=60; Path=/; HttpOnly; SameSite=Lax" in cookie
+    value = cookie.split(";")[0]
+
+    response = await client.get("/me", headers={"cookie": f"{value}; theme=dark"})
+    assert response.json()["user"] == "jezevec"
+    assert response.json()["cookies"]["theme"] == "dark"
+    assert "set-cookie" not in response.headers
+
+    tampered = value[:-2] + ("AA" if value[-2:] != "AA" else "BB")
+    response = await client.get("/me", headers={"cookie": tampered})
+    assert response.json()["user"] is None
+
+    response = await client.get("/logout", headers={"cookie": value})
+    assert "Max-Age=0" in response.headers["set-cookie"]
+    response = await client.get("/large", headers={"cookie": value})
+    assert response.status == 500
+    assert "set-cookie" not in response.headers
+
+
+def test_session_signing():
+    sessions = CookieSessions(b"secret", max_age=60)
+    value = sessions.sign({"user": 1})
+    assert sessions.unsign(value) == {"user": 1}
+    assert CookieSessions("other").unsign(value) is None
+    assert sessions.unsign(sessions.sign({"user": 1}, issued=time() - 61)) is None
+    assert sessions.unsign("garbage") is None
+    assert CookieSessions("secret", max_age=None).unsign(value) == {"user": 1}
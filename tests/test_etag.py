@@ -0,0 +1,67 @@
+from datetime import datetime, timezone
+from json import loads
+
+from requests import get, head
+
+from tests.conftest import Server
+from yasgi import YASGI, Routing
+
+UPDATED = datetime(2022, 8, 1, 12, 0, tzinfo=timezone.utc)
+
+
+def test_etag():
+    def app_wrapper():
+        app = YASGI(content_type="application/json")
+        calls = {"report": 0}
+
+        @Routing("/etag", etag=True)
+        async def etag(req, resp):
+            return {"etag": "jezevec"}
+
+        @Routing("/report")
+        async def report(req, resp):
+            if resp.conditional(etag="v1", last_modified=UPDATED):
+                return None
+            calls["report"] += 1
+            return {"calls": calls["report"]}
+
+        return app
+
+    server = Server(app_wrapper)
+    response = get("http://localhost:3000/etag")
+    assert response.status_code == 200
+    etag = response.headers["ETag"]
+    assert loads(response.text) == {"etag": "jezevec"}
+
+    response = get("http://localhost:3000/etag", headers={"If-None-Match": etag})
+    assert response.status_code == 304
+    assert response.text == ""
+    assert response.headers["ETag"] == etag
+
+    response = get("http://localhost:3000/etag", headers={"If-None-Match": '"x"'})
+    assert response.status_code == 200
+
+    response = head("http://localhost:3000/etag")
+    assert response.status_code == 200
+    assert response.headers["Content-Length"] == "18"
+    assert response.text == ""
+
+    response = get("http://localhost:3000/report")
+    assert loads(response.text) == {"calls": 1}
+    assert response.headers["ETag"] == '"v1"'
+    response = get("http://localhost:3000/report", headers={"If-None-Match": '"v1"'})
+    assert response.status_code == 304
+    response = get(
+        "http://localhost:3000/report",
+        headers={"If-Modified-Since": response.headers["Last-Modified"]},
+    )
+    assert response.status_code == 304
+    response = get(
+        "http://localhost:3000/report",
+        headers={"If-Modified-Since": "Sat, 01 Jan 2022 00:00:00 GMT"},
+    )
+    assert loads(response.text) == {"calls": 2}
+
+    response = head("http://localhost:3000/missing")
+    assert response.status_code == 404
+    server.stop()
@@ -0,0 +1,120 @@
+from os import urandom
+from tempfile import NamedTemporaryFile
+
+from requests import get
+
+from tests.conftest import Server
+from yasgi import YASGI, FileResponse, HTTPRequest, HTTPResponse, Routing
+from yasgi.responses import parse_range
+
+CONTENT = urandom(300 * 1024)
+
+
+def test_files():
+    file = NamedTemporaryFile(suffix=".bin")
+    file.write(CONTENT)
+    file.flush()
+
+    def app_wrapper():
+        app = YASGI(content_type="application/json")
+
+        @Routing("/file")
+        async def send_file(req, resp):
+            return FileResponse(file.name)
+
+        @Routing("/missing")
+        async def missing(req, resp):
+            return FileResponse("/does/not/exist.txt")
+
+        return app
+
+    server = Server(app_wrapper)
+    response = get("http://localhost:3000/file")
+    assert response.status_code == 200
+    assert response.content == CONTENT
+    assert response.headers["Content-Length"] == str(len(CONTENT))
+    assert response.headers["Accept-Ranges"] == "bytes"
+    assert response.headers["Content-Type"] == "application/octet-stream"
+    etag = response.headers["ETag"]
+    last_modified = response.headers["Last-Modified"]
+
+    response = get("http://localhost:3000/file", headers={"If-None-Match": etag})
+    assert (response.status_code, response.content) == (304, b"")
+    assert response.headers["ETag"] == etag
+    headers = {"If-Modified-Since": last_modified, "Range": "bytes=10-19"}
+    response = get("http://localhost:3000/file", headers=headers)
+    assert (response.status_code, response.content) == (304, b"")
+    response = get("http://localhost:3000/file", headers={"If-None-Match": '"x"'})
+    assert response.content == CONTENT
+
+    response = get("http://localhost:3000/file", headers={"Range": "bytes=10-19"})
+    assert response.status_code == 206
+    assert response.content == CONTENT[10:20]
+    assert response.headers["Content-Range"] == f"bytes 10-19/{len(CONTENT)}"
+
+    response = get(
+        "http://localhost:3000/file",
+        headers={"Range": "bytes=-5", "If-Range": last_modified},
+    )
+    assert response.status_code == 206
+    assert response.content == CONTENT[-5:]
+
+    response = get(
+        "http://localhost:3000/file",
+        headers={"Range": "bytes=0-1,100-199", "If-Range": etag},
+    )
+    assert response.status_code == 206
+    assert response.headers["Content-Type"].startswith("multipart/byteranges")
+    assert int(response.headers["Content-Length"]) == len(response.content)
+    assert CONTENT[100:200] in response.content
+
+    response = get(
+        "http://localhost:3000/file",
+        headers={"Range": "bytes=0-1", "If-Range": '"outdated"'},
+    )
+    assert response.status_code == 200
+    assert response.content == CONTENT
+
+    response = get("http://localhost:3000/file", headers={"Range": "bytes=999999-"})
+    assert response.status_code == 416
+    assert response.headers["Content-Range"] == f"bytes */{len(CONTENT)}"
+
+    response = get("http://localhost:3000/missing")
+    assert response.status_code == 404
+    server.stop()
+    file.close()
+
+
+async def test_files_pathsend():
+    events = []
+
+    async def send(event):
+        events.append(event)
+
+    with NamedTemporaryFile(suffix=".txt") as file:
+        file.write(b"jezevec")
+        file.flush()
+        scope = {
+            "type": "http",
+            "method": "GET",
+            "path": "/",
+            "headers": [],
+            "extensions": {"http.response.pathsend": {}},
+        }
+        request = HTTPRequest(scope, {"body": b"", "more_body": False})
+        response = HTTPResponse(send, "application/json", "UTF-8", "", request)
+        await FileResponse(file.name)(request, response)
+
+    assert events[0]["status"] == 200
+    assert (b"Content-Length", b"7") in events[0]["headers"]
+    assert events[1] == {"type": "http.response.pathsend", "path": file.name}
+
+
+def test_parse_range():
+    assert parse_range("bytes=0-9", 100) == [(0, 9)]
+    assert parse_range("bytes=90-", 100) == [(90, 99)]
+    assert parse_range("bytes=-10", 100) == [(90, 99)]
+    assert parse_range("bytes=0-0, 50-500", 100) == [(0, 0), (50, 99)]
+    assert parse_range("bytes=200-", 100) == []
+    assert parse_range("bytes=9-0", 100) is None
+    assert parse_range("items=0-9", 100) is None
@@ -1,7 +1,9 @@
+import pytest
 from requests import get
 
 from tests.conftest import Server
-from yasgi import YASGI, Routing
+from yasgi import YASGI, Headers, Routing
+from yasgi.testclient import TestClient
 
 
 def test_headers():
@@ -31,3 +33,55 @@ def test_headers():
     assert response.headers["Content-Type"][:10] == "text/plain"
     assert response.text == "header=pes"
     server.stop()
+
+
+def test_headers_mapping():
+    raw = [
+        (b"accept", b"text/html"),
+        (b"X-Forwarded-For", b"10.0.0.1"),
+        (b"accept", b"application/json"),
+        (b"content-type", b"Application/JSON; charset=utf-8"),
+        (b"content-length", b"42"),
+        (b"cookie", b"session=1"),
+    ]
+    headers = Headers(raw, exclude=b"cookie")
+    assert headers["Accept"] == "text/html"
+    assert headers.getlist("accept") == ["text/html", "application/json"]
+    assert headers.get("x-forwarded-for") == "10.0.0.1"
+    assert headers.get(b"X-FORWARDED-FOR") == "10.0.0.1"
+    assert "cookie" not in headers and headers.get("cookie", "-") == "-"
+    assert list(headers) == [
+        "accept",
+        "x-forwarded-for",
+        "content-type",
+        "content-length",
+    ]
+    assert headers.content_type == "application/json"
+    assert headers.content_length == 42
+    assert headers.raw is raw
+    with pytest.raises(KeyError):
+        headers["missing"]
+    with pytest.raises(TypeError):
+        headers["accept"] = "*/*"
+
+    headers = Headers([(b"content-length", b"x")])
+    assert (headers.content_length, headers.content_type) == (None, "")
+
+
+async def test_request_headers():
+    app = YASGI(content_type="application/json")
+
+    @app.route("/data", methods=["POST"])
+    async def data(req, resp):
+        assert req.headers is req.headers
+        return {"data": req.data, "accept": req.headers.getlist("accept")}
+
+    client = TestClient(app)
+    response = await client.post(
+        "/data",
+        body=b'{"a": 1}',
+        headers={"content-type": "application/json; charset=utf-8", "accept": "*/*"},
+    )
+    assert response.json() == {"data": {"a": 1}, "accept": ["*/*"]}
+    response = await client.post("/data")
+    assert response.json() == {"data": {}, "accept": []}
@@ -0,0 +1,108 @@
+import asyncio
+
+from orjson import OPT_SORT_KEYS
+
+from yasgi import YASGI, Hub
+from yasgi.codecs import Codecs, JSONCodec
+from yasgi.testclient import TestClient
+
+
+async def test_hub_broadcast():
+    app = YASGI(content_type="application/json")
+
+    @app.websocket("/rooms/{room}")
+    async def room(req, resp, args):
+        hub = req.app.hub
+        if req.event["type"] == "websocket.receive":
+            data = req.data
+            if data.get("join"):
+                hub.subscribe(args[0], resp.connection)
+                await resp.send({"joined": args[0]})
+            else:
+                hub.publish(args[0], {"message": data["message"]})
+
+    client = TestClient(app)
+    async with client.websocket("/rooms/a") as first, client.websocket(
+        "/rooms/a"
+    ) as second, client.websocket("/rooms/b") as other:
+        for websocket in (first, second, other):
+            await websocket.send_json({"join": True})
+            assert "joined" in await websocket.receive_json()
+        assert app.hub.subscribers("a") == 2
+
+        await first.send_json({"message": "ahoj"})
+        assert await first.receive_json() == {"message": "ahoj"}
+        assert await second.receive_json() == {"message": "ahoj"}
+        await other.send_json({"message": "b"})
+        assert await other.receive_json() == {"message": "b"}
+    assert app.hub.topics == []
+
+
+async def test_slow_consumer():
+    blocked = asyncio.Event()
+    sent = []
+
+    async def send(event):
+        await blocked.wait()
+        sent.append(event)
+
+    hub = Hub(queue_size=2)
+    slow = hub.connection(send)
+    hub.subscribe("news", slow)
+    assert [hub.publish("news", {"i": i}) for i in range(4)] == [1, 1, 0, 0]
+    assert slow.dropped == 2
+    blocked.set()
+    await asyncio.sleep(0)
+    await asyncio.sleep(0)
+    assert len(sent) == 2
+    assert sent[1] == {"type": "websocket.send", "text": '{"i":1}'}
+    await slow.close()
+
+    blocked.clear()
+    closed = []
+
+    async def close_send(event):
+        if event["type"] == "websocket.close":
+            closed.append(event["code"])
+        else:
+            await blocked.wait()
+
+    hub = Hub(queue_size=1, policy="disconnect")
+    slow = hub.connection(close_send)
+    fast = hub.connection(lambda event: asyncio.sleep(0))
+    hub.subscribe("news", slow)
+    hub.subscribe("news", fast)
+    for i in range(3):
+        hub.publish("news", b"payload")
+        await asyncio.sleep(0)
+    await asyncio.sleep(0)
+    assert closed == [1013]
+    assert slow.closed and hub.subscribers("news") == 1
+    assert slow._writer.done()
+    await slow.close()
+    await fast.close()
+
+
+async def test_hub_codec():
+    sent = []
+
+    async def send(event):
+        sent.append(event)
+
+    hub = Hub()
+    connection = hub.connection(send)
+    hub.subscribe("news", connection)
+    hub.publish("news", ("a", 1))
+    hub.publish("news", 2)
+    hub.publish("news", "text")
+    await asyncio.sleep(0)
+    assert [event["text"] for event in sent] == ['["a",1]', "2", "text"]
+    await connection.close()
+
+    codec = JSONCodec(option=OPT_SORT_KEYS)
+    assert YASGI(hub=Hub(codec=codec)).hub.codec is codec
+    app = YASGI(
+        content_type="application/json",
+        codecs=Codecs(JSONCodec("application/json", option=OPT_SORT_KEYS)),
+    )
+    assert app.hub.codec.option == OPT_SORT_KEYS
@@ -0,0 +1,76 @@
+from contextlib import asynccontextmanager
+from json import loads
+
+import pytest
+from requests import get
+
+from tests.conftest import Server
+from yasgi import YASGI, Routing
+
+
+def test_lifespan():
+    def app_wrapper():
+        @asynccontextmanager
+        async def lifespan(app):
+            app.state.pool = "pool"
+            yield
+
+        app = YASGI(content_type="application/json", lifespan=lifespan)
+
+        @app.on_startup
+        async def warm():
+            app.state.table = {"warm": True}
+
+        @app.on_startup
+        def sync_hook():
+            app.state.sync = True
+
+        @Routing("/state")
+        async def state(req, resp):
+            return {
+                "pool": req.state.pool,
+                "table": req.state.table,
+                "sync": req.app.state.sync,
+            }
+
+        return app
+
+    server = Server(app_wrapper)
+    response = get("http://localhost:3000/state")
+    assert response.status_code == 200
+    assert loads(response.text) == {
+        "pool": "pool",
+        "table": {"warm": True},
+        "sync": True,
+    }
+    server.stop()
+
+
+async def test_lifespan_events():
+    app = YASGI()
+    calls = []
+    sent = []
+    events = iter([{"type": "lifespan.startup"}, {"type": "lifespan.shutdown"}])
+
+    app.on_startup(lambda: calls.append("startup"))
+    app.on_shutdown(lambda: calls.append("shutdown"))
+
+    async def receive():
+        return next(events)
+
+    async def send(event):
+        sent.append(event["type"])
+
+    await app({"type": "lifespan"}, receive, send)
+    assert calls == ["startup", "shutdown"]
+    assert sent == ["lifespan.startup.complete", "lifespan.shutdown.complete"]
+
+    @app.on_startup
+    async def failing():
+        raise RuntimeError("pool unavailable")
+
+    sent.clear()
+    events = iter([{"type": "lifespan.startup"}])
+    with pytest.raises(RuntimeError):
+        await app({"type": "lifespan"}, receive, send)
+    assert sent == ["lifespan.startup.failed"]
@@ -0,0 +1,70 @@
+from yasgi import YASGI
+from yasgi.testclient import TestClient
+
+
+async def test_body_limits():
+    app = YASGI(content_type="application/json", max_body_size=10)
+    calls = []
+
+    @app.route("/small", methods=["POST"])
+    async def small(req, resp):
+        calls.append("small")
+        return {"size": len(await req.body())}
+
+    @app.route("/upload", methods=["POST"], max_body_size=100)
+    async def upload(req, resp):
+        return {"size": len(await req.body())}
+
+    @app.route("/stream", methods=["POST"], stream=True)
+    async def stream(req, resp):
+        calls.append("stream")
+        return {"size": sum([len(chunk) async for chunk in req.stream()])}
+
+    client = TestClient(app)
+    assert (await client.post("/small", body=b"x" * 10)).json() == {"size": 10}
+    assert (await client.post("/small", body=b"x" * 11)).status == 413
+    assert (await client.post("/upload", body=b"x" * 100)).json() == {"size": 100}
+    assert (await client.post("/upload", body=b"x" * 101)).status == 413
+
+    calls.clear()
+    response = await client.post(
+        "/small", body=b"x" * 40, headers={"content-length": "4"}, chunk_size=4
+    )
+    assert response.status == 413
+    assert calls == []
+    assert (await client.post("/stream", body=b"x" * 20)).status == 413
+    response = await client.post(
+        "/stream", body=b"x" * 40, headers={"content-length": "4"}, chunk_size=4
+    )
+    assert response.status == 413
+    assert calls == ["stream"]
+
+
+async def test_rejected_before_body():
+    app = YASGI(max_body_size=10)
+
+    @app.route("/put", methods=["PUT"])
+    async def put(req, resp):
+        return None
+
+    received = []
+
+    async def receive():
+        received.append(1)
+        return {"type": "http.request", "body": b"x" * 100}
+
+    async def send(event):
+        events.append(event)
+
+    for path, method, status in (
+        ("/missing", "POST", 404),
+        ("/put", "POST", 405),
+        ("/put", "PUT", 413),
+    ):
+        events = []
+        scope = TestClient(app).scope(
+            "http", path, headers={"content-length": "1000000"}
+        )
+        await app(dict(scope, method=method), receive, send)
+        assert events[0]["status"] == status
+    assert received == []
@@ -0,0 +1,71 @@
+from yasgi import YASGI, Metrics
+from yasgi.testclient import TestClient
+
+
+async def test_metrics():
+    metrics = Metrics(buckets=(0.5, 0.001))
+    app = YASGI(content_type="application/json", metrics=metrics)
+
+    @app.route("/users/{id:int}")
+    async def user(req, resp, id):
+        return {"id": id}
+
+    @app.route("/upload", methods=["POST"])
+    async def upload(req, resp):
+        return b"ok"
+
+    @app.route("/fail")
+    async def fail(req, resp):
+        await resp.abort(status=503)
+
+    client = TestClient(app)
+    for id in range(3):
+        assert (await client.get(f"/users/{id}")).status == 200
+    await client.post("/upload", body=b"x" * 100)
+    await client.get("/fail")
+    await client.get("/missing")
+    await client.get("/users/x")
+
+    series = metrics.series("/users/{id:int}")
+    assert (series.count, series.statuses, series.in_flight) == (3, [0, 3, 0, 0, 0], 0)
+    assert sum(series.latency) == 3 and series.latency_sum > 0
+    assert series.response_bytes == len(b'{"id":0}') * 3
+    assert metrics.series("/upload").request_bytes == 100
+    assert metrics.series("/fail").statuses[4] == 1
+    assert metrics.unmatched.statuses[3] == 2
+
+    response = await client.get("/metrics")
+    assert (
+        response.headers["content-type"] == "text/plain; version=0.0.4; charset=utf-8"
+    )
+    text = response.text
+    assert 'yasgi_requests_total{route="/users/{id:int}",status="2xx"} 3' in text
+    assert 'yasgi_requests_total{route="<unmatched>",status="4xx"} 2' in text
+    assert 'yasgi_request_duration_seconds_bucket{route="/upload",le="0.5"} 1' in text
+    assert 'yasgi_request_duration_seconds_count{route="/fail"} 1' in text
+    assert 'yasgi_request_bytes_total{route="/upload"} 100' in text
+    # the metrics request itself is in flight while rendering
+    assert 'yasgi_requests_in_flight{route="/metrics"} 1' in text
+    bounds = [
+        line for line in text.splitlines() if "_bucket" in line and "/upload" in line
+    ]
+    assert [line.split("le=")[1].split("}")[0] for line in bounds] == [
+        '"0.001"',
+        '"0.5"',
+        '"+Inf"',
+    ]
+
+
+async def test_metrics_off():
+    app = YASGI(content_type="application/json", metrics=Metrics(path=None))
+
+    @app.route("/")
+    async def index(req, resp):
+        return {}
+
+    client = TestClient(app)
+    assert (await client.get("/metrics")).status == 404
+    assert (await client.get("/")).status == 200
+    text = app.metrics.render()
+    assert 'yasgi_requests_total{route="/",status="2xx"} 1' in text
+    assert 'yasgi_requests_total{route="<unmatched>",status="4xx"} 1' in text
@@ -0,0 +1,178 @@
+import pytest
+
+from yasgi import YASGI
+from yasgi.cache import ResponseCache
+from yasgi.testclient import TestClient
+
+
+class Tag:
+    """ASGI middleware adding a header to every HTTP response."""
+
+    def __init__(self, app, name: bytes = b"x-tag"):
+        self.app = app
+        self.name = name
+
+    async def __call__(self, scope, receive, send):
+        async def tagged(event):
+            if event["type"] == "http.response.start":
+                event["headers"] = list(event["headers"]) + [(self.name, b"1")]
+            await send(event)
+
+        await self.app(scope, receive, tagged)
+
+
+class Forbidden(Exception):
+    pass
+
+
+async def test_middleware():
+    calls = []
+
+    async def trace(request, response, call_next):
+        calls.append("trace")
+        body = await call_next()
+        response.add_header("X-Trace", request.path)
+        return body
+
+    async def auth(request, response, call_next):
+        calls.append("auth")
+        if request.headers.get("authorization") != "secret":
+            await response.abort(status=401, data={"error": "unauthorized"})
+        return await call_next()
+
+    async def errors(request, response, call_next):
+        try:
+            return await call_next()
+        except Forbidden:
+            await response.abort(status=403, data={"error": "forbidden"})
+
+    app = YASGI(content_type="application/json", middleware=[Tag, trace])
+    app.add_middleware(errors)
+
+    @app.route("/public")
+    async def public(req, resp):
+        calls.append("public")
+        return {"public": True}
+
+    @app.route("/private", middleware=[auth])
+    async def private(req, resp):
+        calls.append("private")
+        return {"private": True}
+
+    @app.route("/forbidden")
+    async def forbidden(req, resp):
+        raise Forbidden()
+
+    client = TestClient(app)
+
+    response = await client.get("/public")
+    assert (response.status, response.json()) == (200, {"public": True})
+    assert response.headers["x-trace"] == "/public"
+    assert response.headers["x-tag"] == "1"
+    assert calls == ["trace", "public"]
+
+    calls.clear()
+    response = await client.get("/private")
+    assert (response.status, response.json()) == (401, {"error": "unauthorized"})
+    assert "x-trace" not in response.headers
+    assert calls == ["trace", "auth"]
+
+    calls.clear()
+    response = await client.get("/private", headers={"authorization": "secret"})
+    assert (response.status, response.json()) == (200, {"private": True})
+    assert calls == ["trace", "auth", "private"]
+
+    response = await client.get("/forbidden")
+    assert (response.status, response.json()) == (403, {"error": "forbidden"})
+
+    # ASGI middleware see unrouted requests too, request/response ones only routed
+    response = await client.get("/missing")
+    assert response.status == 404
+    assert response.headers["x-tag"] == "1"
+    assert "x-trace" not in response.headers
+
+
+async def test_route_asgi_middleware():
+    app = YASGI(content_type="application/json")
+    app.add_middleware(Tag)
+
+    @app.route("/items/{id:int}", middleware=[lambda app: Tag(app, b"x-route")])
+    async def item(req, resp, id):
+        return {"id": id}
+
+    async with TestClient(app) as client:
+        response = await client.get("/items/7")
+        assert response.json() == {"id": 7}
+        assert (response.headers["x-tag"], response.headers["x-route"]) == ("1", "1")
+
+        response = await client.get("/items/x")
+        assert response.status == 404
+        assert "x-route" not in response.headers
+
+
+async def test_middleware_compile():
+    async def first(request, response, call_next):
+        return [1] + await call_next()
+
+    async def second(request, response, call_next):
+        return [2] + await call_next()
+
+    app = YASGI(content_type="application/json")
+
+    @app.route("/")
+    async def index(req, resp):
+        return [0]
+
+    client = TestClient(app)
+    assert (await client.get("/")).json() == [0]
+    route = app.router.http("/", "GET")[0]
+    compiled = route.call
+
+    app.add_middleware(first)
+    app.add_middleware(second)
+    assert route.call is None
+    assert (await client.get("/")).json() == [1, 2, 0]
+    assert route.call is not compiled
+
+    with pytest.raises(RuntimeError):
+        app.add_middleware(lambda a, b: None)
+    assert app.middleware == [first, second]
+
+
+async def test_middleware_cached_route():
+    calls = []
+
+    async def auth(request, response, call_next):
+        if request.headers.get("authorization") != "secret":
+            await response.abort(status=401)
+        return await call_next()
+
+    async def timing(request, response, call_next):
+        response.add_header("X-Time", "1")
+        return await call_next()
+
+    app = YASGI(content_type="application/json", middleware=[timing])
+
+    @app.route("/cached", cache=ResponseCache(), middleware=[auth])
+    async def cached(req, resp):
+        calls.append(1)
+        resp.add_header("X-Handler", "1")
+        return {"secret": 1}
+
+    @app.route("/health", static=True)
+    async def health(req, resp):
+        return {"ok": True}
+
+    client = TestClient(app)
+    authorized = {"authorization": "secret"}
+    for _ in range(2):
+        response = await client.get("/cached", headers=authorized)
+        assert response.json() == {"secret": 1}
+        names = [name.lower() for name, _ in response.raw_headers]
+        assert (names.count(b"x-time"), names.count(b"x-handler")) == (1, 1)
+    assert len(calls) == 1
+
+    response = await client.get("/cached")
+    assert response.status == 401
+    assert b"secret" not in response.body
+    assert (await client.get("/health")).headers["x-time"] == "1"
@@ -0,0 +1,58 @@
+from json import loads
+
+from requests import get
+
+from tests.conftest import Server
+from yasgi import YASGI, Routing
+
+
+def test_mount():
+    def app_wrapper():
+        api = YASGI(content_type="application/json")
+
+        @api.route("/items/{id:int}")
+        async def item(req, resp, id):
+            return {"id": id, "path": req.path, "root": req.scope["root_path"]}
+
+        @api.on_startup
+        def api_startup():
+            api.state.ready = True
+
+        admin = YASGI(content_type="text/plain")
+
+        @Routing("/")
+        async def index(req, resp):
+            return "admin"
+
+        app = YASGI(content_type="application/json")
+        app.mount("/api/v1", api)
+        app.mount("/admin", admin)
+
+        @app.route("/health")
+        async def health(req, resp):
+            return {"ready": api.state.ready}
+
+        return app
+
+    server = Server(app_wrapper)
+    response = get("http://localhost:3000/api/v1/items/7")
+    assert loads(response.text) == {"id": 7, "path": "/items/7", "root": "/api/v1"}
+    assert get("http://localhost:3000/admin").text == "admin"
+    assert get("http://localhost:3000/admin/").text == "admin"
+    assert loads(get("http://localhost:3000/health").text) == {"ready": True}
+    assert get("http://localhost:3000/items/7").status_code == 404
+    assert get("http://localhost:3000/api/items/7").status_code == 404
+    server.stop()
+
+
+async def test_mount_raw_asgi():
+    seen = []
+
+    async def raw(scope, receive, send):
+        seen.append((scope["path"], scope["root_path"]))
+
+    app = YASGI()
+    app.mount("/raw/", raw)
+    await app({"type": "http", "path": "/raw/a/b", "root_path": ""}, None, None)
+    await app({"type": "http", "path": "/raw", "root_path": "/x"}, None, None)
+    assert seen == [("/a/b", "/raw"), ("/", "/x/raw")]
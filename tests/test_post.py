@@ -33,3 +33,83 @@ def test_post():
     assert loads(response.text) == {"input": "test-put"}
 
     server.stop()
+
+
+def test_post_stream():
+    def app_wrapper():
+        app = YASGI(content_type="application/json")
+
+        @Routing("/upload", methods=["POST"], stream=True)
+        async def upload(req, resp):
+            size = chunks = 0
+            async for chunk in req.stream():
+                size += len(chunk)
+                chunks += 1
+            return {"size": size, "streamed": chunks > 0}
+
+        @Routing("/upload-body", methods=["POST"], stream=True)
+        async def upload_body(req, resp):
+            await req.body()
+            return req.data
+
+        return app
+
+    server = Server(app_wrapper)
+
+    response = post(
+        "http://localhost:3000/upload", data=(b"x" * 65536 for _ in range(16))
+    )
+    assert response.status_code == 200
+    assert loads(response.text) == {"size": 16 * 65536, "streamed": True}
+
+    response = post("http://localhost:3000/upload-body", json={"input": "stream"})
+    assert response.status_code == 200
+    assert loads(response.text) == {"input": "stream"}
+
+    server.stop()
+
+
+def test_post_multipart():
+    def app_wrapper():
+        app = YASGI(content_type="application/json", spool_max_size=1024)
+
+        @Routing("/multipart", methods=["POST"])
+        async def multipart(req, resp):
+            upload = req.data["file"]
+            return {
+                "field": req.data["field"].decode(),
+                "filename": upload.filename,
+                "content_type": upload.content_type,
+                "size": upload.size,
+                "content": upload.read().decode(),
+            }
+
+        @Routing("/multipart-stream", methods=["POST"], stream=True)
+        async def multipart_stream(req, resp):
+            data = await req.form()
+            return {"field": data["field"].decode(), "size": data["file"].size}
+
+        return app
+
+    server = Server(app_wrapper)
+
+    files = {"file": ("test.txt", "jezevec" * 1000, "text/plain")}
+    response = post(
+        "http://localhost:3000/multipart", data={"field": "pes"}, files=files
+    )
+    assert response.status_code == 200
+    assert loads(response.text) == {
+        "field": "pes",
+        "filename": "test.txt",
+        "content_type": "text/plain",
+        "size": 7000,
+        "content": "jezevec" * 1000,
+    }
+
+    response = post(
+        "http://localhost:3000/multipart-stream", data={"field": "pes"}, files=files
+    )
+    assert response.status_code == 200
+    assert loads(response.text) == {"field": "pes", "size": 7000}
+
+    server.stop()
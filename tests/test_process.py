@@ -0,0 +1,139 @@
+import os
+import pickle
+import time
+from copy import deepcopy
+
+import pytest
+
+from yasgi import YASGI, ProcessPool
+from yasgi.datastructures import QueryParams
+from yasgi.testclient import TestClient
+
+
+def render(request, size: int):
+    return {
+        "pid": os.getpid(),
+        "sum": sum(i * i for i in range(size)),
+        "method": request.method,
+        "path": request.path,
+        "format": request.query_params.get("format"),
+        "token": request.headers.get("x-token"),
+        "data": request.data,
+    }
+
+
+def thumbnail(request):
+    return request.data[::-1]
+
+
+def slow(request):
+    time.sleep(1)
+
+
+async def test_process_routes():
+    pool = ProcessPool(max_workers=2, timeout=0.3)
+    app = YASGI(content_type="application/json", process_pool=pool)
+    app.route("/render/{size}", methods=["POST"], executor="process", validate=True)(
+        render
+    )
+    app.route(
+        "/thumbnail",
+        methods=["POST"],
+        content_type="application/octet-stream",
+        executor="process",
+    )(thumbnail)
+    app.route("/slow", executor="process")(slow)
+
+    async with TestClient(app) as client:
+        # workers are started with the application
+        assert len(pool._executor._processes) == 2
+
+        response = await client.post(
+            "/render/1000",
+            query={"format": "pdf"},
+            headers={"x-token": "pes"},
+            json={"title": "report"},
+        )
+        data = response.json()
+        assert data["pid"] != os.getpid()
+        assert data == dict(
+            data,
+            sum=sum(i * i for i in range(1000)),
+            method="POST",
+            path="/render/1000",
+            format="pdf",
+            token="pes",
+            data={"title": "report"},
+        )
+        assert (await client.post("/render/x")).status == 422
+
+        response = await client.post("/render/10", form={"tag": ["a", "b c"]})
+        assert response.status == 200
+        assert response.json()["data"] == {"tag": "a"}
+
+        response = await client.post("/thumbnail", body=b"image")
+        assert response.body == b"egami"
+
+        assert (await client.get("/slow")).status == 504
+    assert pool._executor is None
+
+
+def test_process_registration():
+    app = YASGI()
+
+    def local(request):
+        return None
+
+    async def coroutine(request, response):
+        return None
+
+    with pytest.raises(RuntimeError):
+        app.route("/local", executor="process")(local)
+    with pytest.raises(RuntimeError):
+        app.route("/async", executor="process")(coroutine)
+    with pytest.raises(RuntimeError):
+        app.route("/gpu", executor="gpu")(render)
+
+
+async def test_detach():
+    client = TestClient(YASGI())
+    app_requests = []
+
+    async def capture(req, resp):
+        app_requests.append(req)
+        await req.body()
+        return {}
+
+    client.app.route("/", methods=["POST"])(capture)
+    await client.post("/", json={"a": 1}, headers={"cookie": "a=b"})
+    request = app_requests[0]
+    with pytest.raises(TypeError):
+        pickle.dumps(request)
+
+    detached = pickle.loads(pickle.dumps(request.detach()))
+    assert (detached.method, detached.path, detached.data) == ("POST", "/", {"a": 1})
+    assert detached.cookies == {"a": "b"}
+    assert detached.app is None
+
+    query = QueryParams("tag=a&tag=b+c&x=%26")
+    for copy in (pickle.loads(pickle.dumps(query)), deepcopy(query)):
+        assert copy.multi_items() == [("tag", "a"), ("tag", "b c"), ("x", "&")]
+
+
+async def test_process_timeout_recycle():
+    pool = ProcessPool(max_workers=1, timeout=0.2)
+    app = YASGI(content_type="application/json", process_pool=pool)
+    app.route("/slow", executor="process")(slow)
+    app.route("/thumbnail", methods=["POST"], executor="process")(thumbnail)
+
+    client = TestClient(app)
+    assert (await client.get("/slow")).status == 504
+    # the only worker was taken by the timed out call, so it was replaced
+    assert pool._executor is None
+    started = time.monotonic()
+    response = await client.post("/thumbnail", body=b"abc")
+    assert response.body == b"cba"
+    assert time.monotonic() - started < 0.8
+    started = time.monotonic()
+    pool.shutdown()
+    assert time.monotonic() - started < 0.1
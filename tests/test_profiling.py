@@ -0,0 +1,74 @@
+from marshal import loads
+from os import path
+from pstats import Stats
+
+import pytest
+
+from yasgi import YASGI, Profiler
+from yasgi.testclient import TestClient
+
+
+def work(size):
+    return sum(i * i for i in range(size))
+
+
+def make_app(profiler):
+    app = YASGI(content_type="application/json", profiler=profiler)
+
+    @app.route("/work/{size:int}")
+    async def handler(req, resp, size):
+        return {"result": work(size), "data": [0] * size}
+
+    return app
+
+
+async def test_profiling_rate(tmp_path):
+    profiler = Profiler(rate=1.0, memory=True, directory=str(tmp_path), ring_size=2)
+    client = TestClient(make_app(profiler))
+
+    for _ in range(3):
+        assert (await client.get("/work/1000")).status == 200
+
+    report = profiler.report()
+    assert report["routes"]["/work/{size:int}"]["samples"] == 3
+    assert "work" in report["routes"]["/work/{size:int}"]["profile"]
+    assert len(report["recent"]) == 2
+    sample = report["recent"][-1]
+    assert sample["route"] == "/work/{size:int}" and sample["duration"] > 0
+    assert sample["memory"]["peak"] > 0 and sample["memory"]["top"]
+    assert path.isfile(profiler.file("/work/{size:int}"))
+    assert Stats(profiler.file("/work/{size:int}")).total_calls > 0
+    assert profiler.file("/work/{size:int}").endswith("work_size_int.prof")
+
+
+async def test_profiling_trigger():
+    profiler = Profiler(token="secret", path="/admin/profiles")
+    client = TestClient(make_app(profiler))
+
+    await client.get("/work/10")
+    await client.get("/work/10", headers={"x-profile": "wrong"})
+    assert (await client.get("/work/10", headers={"x-profile": "sécret"})).status == 200
+    assert profiler.report()["routes"] == {}
+    await client.get("/work/10", headers={"x-profile": "secret"})
+    assert profiler.report()["routes"]["/work/{size:int}"]["samples"] == 1
+
+    assert (await client.get("/admin/profiles")).status == 403
+    response = await client.get("/admin/profiles", headers={"x-profile": "sécret"})
+    assert response.status == 403
+    admin = {"x-profile": "secret"}
+    response = await client.get("/admin/profiles", headers=admin)
+    assert list(response.json()["routes"]) == ["/work/{size:int}"]
+    assert response.json()["recent"][0]["memory"] is None
+
+    response = await client.get(
+        "/admin/profiles", query={"route": "/work/{size:int}"}, headers=admin
+    )
+    assert response.headers["content-type"] == "application/octet-stream"
+    assert any(key[2] == "work" for key in loads(response.body))
+    response = await client.get(
+        "/admin/profiles", query={"route": "/missing"}, headers=admin
+    )
+    assert response.status == 404
+
+    with pytest.raises(RuntimeError):
+        Profiler(path="/admin/profiles")
@@ -0,0 +1,66 @@
+import pytest
+
+from yasgi import YASGI, QueryParams
+from yasgi.exceptions import InputParseError
+from yasgi.testclient import TestClient
+
+
+def test_query_params():
+    query = QueryParams(
+        b"q=a%26b%3Dc&name=jezevec+pes&tag=x,y&tag=z&page=2&flag&on=yes"
+    )
+    assert query["q"] == "a&b=c"
+    assert query["name"] == "jezevec pes"
+    assert query["tag"] == "x,y"
+    assert query.getlist("tag") == ["x,y", "z"]
+    assert query.getlist("missing") == []
+    assert query.get_list("tag") == ["x", "y", "z"]
+    assert query.get_int("page") == 2
+    assert query.get_int("page") is query.get_int("page")
+    assert query.get_int("missing", 1) == 1
+    assert query.get_bool("flag") is False
+    assert query.get_bool("on") is True
+    assert query.get_float("page") == 2.0
+    assert dict(query) == {
+        "q": "a&b=c",
+        "name": "jezevec pes",
+        "tag": "x,y",
+        "page": "2",
+        "flag": "",
+        "on": "yes",
+    }
+    with pytest.raises(InputParseError, match="Query parameter name is not int!"):
+        query.get_int("name")
+    with pytest.raises(InputParseError):
+        query.get_bool("page")
+    with pytest.raises(TypeError):
+        query["page"] = "3"
+    with pytest.raises(TypeError):
+        query.update(page="3")
+    assert QueryParams(b"") == {}
+
+
+async def test_request_query_params():
+    app = YASGI(content_type="application/json")
+
+    @app.route("/search", methods=["GET", "POST"])
+    async def search(req, resp):
+        assert req.query_params is req.query_params
+        return {
+            "page": req.query_params.get_int("page", 1),
+            "tags": req.query_params.get_list("tags", []),
+            "data": req.data,
+        }
+
+    client = TestClient(app)
+    response = await client.get("/search", query={"page": "3", "tags": "a,b"})
+    assert response.json() == {"page": 3, "tags": ["a", "b"], "data": {}}
+    response = await client.post("/search", form={"name": "a&b", "tag": ["1", "2"]})
+    assert response.json() == {
+        "page": 1,
+        "tags": [],
+        "data": {"name": "a&b", "tag": "1"},
+    }
+    response = await client.get("/search?page=x")
+    assert response.status == 400
+    assert response.json() == {"detail": "Query parameter page is not int!"}
@@ -0,0 +1,84 @@
+import pytest
+
+from yasgi import YASGI, Metrics, RateLimit
+from yasgi.testclient import TestClient
+
+
+def test_gcra():
+    limit = RateLimit(2, per=1.0)
+    assert [limit.hit("a", 0.0) for _ in range(2)] == [0, 0]
+    assert limit.hit("a", 0.0) == pytest.approx(0.5)
+    assert limit.hit("a", 0.25) == pytest.approx(0.25)
+    assert limit.hit("a", 0.5) == 0
+    assert limit.hit("b", 0.5) == 0
+
+    limit = RateLimit(10, per=60, burst=1)
+    assert limit.hit("a", 0.0) == 0
+    assert limit.hit("a", 1.0) == pytest.approx(5.0)
+    assert limit.hit("a", 6.0) == 0
+
+    with pytest.raises(RuntimeError):
+        RateLimit(0)
+
+
+def test_expiry():
+    limit = RateLimit(1, per=1.0)
+    for i in range(100):
+        limit.hit(str(i), 0.0)
+    assert len(limit) == 100
+    # idle keys (full buckets) are dropped while other keys are counted
+    for i in range(60):
+        limit.hit("active", 10.0 + i)
+    assert len(limit) == 1
+
+    limit = RateLimit(1, per=1.0, maxsize=10)
+    for i in range(100):
+        limit.hit(str(i), 0.0)
+    assert len(limit) == 10
+    assert list(limit._keys)[0] == "90"
+
+
+async def test_rate_limit():
+    calls = []
+    app = YASGI(
+        content_type="application/json",
+        allow="*",
+        rate_limit=RateLimit(2, per=60, forwarded=True),
+        metrics=Metrics(),
+    )
+
+    @app.route("/", methods=["GET", "POST"])
+    async def index(req, resp):
+        calls.append(await req.body())
+        return {}
+
+    @app.route("/health", rate_limit=False)
+    async def health(req, resp):
+        return {}
+
+    @app.route("/search", rate_limit=RateLimit(1, per=60, header="x-api-key"))
+    async def search(req, resp):
+        return {}
+
+    client = TestClient(app)
+    for _ in range(2):
+        assert (await client.post("/", body=b"data")).status == 200
+    response = await client.post("/", body=b"data")
+    assert (response.status, response.headers["retry-after"]) == (429, "30")
+    assert response.headers["access-control-allow-origin"] == "*"
+    assert response.headers["content-type"].startswith("application/json")
+    assert calls == [b"data", b"data"]
+
+    forwarded = {"x-forwarded-for": "10.0.0.1, 10.0.0.2"}
+    assert (await client.get("/", headers=forwarded)).status == 200
+
+    for _ in range(5):
+        assert (await client.get("/health")).status == 200
+        assert (await client.get("/metrics")).status == 200
+    assert (await client.get("/missing")).status == 404
+
+    key = {"x-api-key": "a"}
+    assert (await client.get("/search", headers=key)).status == 200
+    assert (await client.get("/search", headers=key)).status == 429
+    assert (await client.get("/search", headers={"x-api-key": "b"})).status == 200
+    assert (await client.get("/search")).status == 200
@@ -0,0 +1,99 @@
+from json import loads
+from re import compile
+from uuid import UUID
+
+import pytest
+from requests import get, post
+
+from tests.conftest import Server
+from yasgi import YASGI, Routing
+from yasgi.routing import RouteTree
+
+
+def test_typed_params():
+    def app_wrapper():
+        app = YASGI(content_type="application/json")
+
+        @Routing("/users/{id:int}/orders/{oid}")
+        async def order(req, resp, id, oid):
+            return {"id": id, "oid": oid}
+
+        @Routing("/users/me/orders/{oid}")
+        async def my_order(req, resp, oid):
+            return {"me": oid}
+
+        @Routing("/users/{name}", methods=["POST"])
+        async def user(req, resp, name):
+            return {"name": name}
+
+        @Routing("/files/{path:path}", content_type="text/plain")
+        async def files(req, resp, path):
+            return path
+
+        @Routing(compile("/legacy-(.*)"))
+        async def legacy(req, resp, param):
+            return {"param": param}
+
+        return app
+
+    server = Server(app_wrapper)
+    response = get("http://localhost:3000/users/42/orders/abc")
+    assert response.status_code == 200
+    assert loads(response.text) == {"id": 42, "oid": "abc"}
+    response = get("http://localhost:3000/users/me/orders/abc/")
+    assert loads(response.text) == {"me": "abc"}
+    response = post("http://localhost:3000/users/jezevec")
+    assert loads(response.text) == {"name": "jezevec"}
+    response = get("http://localhost:3000/users/jezevec")
+    assert response.status_code == 405
+    response = get("http://localhost:3000/users/jezevec/orders/abc")
+    assert response.status_code == 404
+    response = get("http://localhost:3000/files/a/b/c.txt")
+    assert response.text == "a/b/c.txt"
+    response = get("http://localhost:3000/legacy-pes")
+    assert loads(response.text) == {"param": "pes"}
+    server.stop()
+
+
+def test_route_tree():
+    tree = RouteTree()
+    tree.insert("/items/{id:int}/", "GET", "int")
+    tree.insert("/items/{id:uuid}/", "GET", "uuid")
+    tree.insert("/items/{slug}/", "GET", "str")
+    tree.insert("/items/new/", "POST", "static")
+
+    assert tree.find("/items/7", "GET") == ("int", (7,))
+    uid = "a8098c1a-f86e-11da-bd1a-00112444be1e"
+    assert tree.find(f"/items/{uid}", "GET") == ("uuid", (UUID(uid),))
+    assert tree.find("/items/new", "GET") == ("str", ("new",))
+    assert tree.find("/items/new", "POST") == ("static", ())
+    assert tree.find("/items/7", "DELETE") is False
+    assert tree.find("/items/7/x", "GET") is None
+    assert tree.methods("/items/new") == ["POST", "GET"]
+
+    with pytest.raises(RuntimeError):
+        tree.insert("/items/{other:int}", "GET", "conflict")
+    with pytest.raises(RuntimeError):
+        tree.insert("/items/{id:bool}", "GET", "unknown")
+    with pytest.raises(RuntimeError):
+        tree.insert("/items/{rest:path}/tail", "GET", "path")
+    with pytest.raises(RuntimeError):
+        tree.insert("/items/id-{id}", "GET", "partial")
+
+
+def test_routing_conflict():
+    app = YASGI()
+
+    @Routing("/conflict/{id:int}")
+    async def first(req, resp, id):
+        return None
+
+    with pytest.raises(RuntimeError):
+
+        @Routing("/conflict/{pk:int}")
+        async def second(req, resp, pk):
+            return None
+
+    route, url_args, _ = app.router.http("/conflict/1", "GET")
+    assert (route.handler, url_args) == (first, (1,))
+    assert app.router.http("/conflict/1", "PUT")[2] is True
@@ -0,0 +1,57 @@
+from gzip import decompress
+from json import loads
+
+import pytest
+
+from yasgi import YASGI, Codecs, Compressor, JSONCodec, ResponseCache
+from yasgi.testclient import TestClient
+
+
+async def test_static_route():
+    app = YASGI(
+        content_type="application/json",
+        allow="*",
+        compression=Compressor(minimum_size=0),
+        codecs=Codecs(JSONCodec(), JSONCodec("application/vnd.api+json")),
+    )
+    calls = {"config": 0}
+
+    @app.route("/config", static=True)
+    async def config(req, resp):
+        calls["config"] += 1
+        return {"calls": calls["config"], "query": req.query_params}
+
+    @app.route("/plain", content_type="text/plain")
+    async def plain(req, resp):
+        if req.query_params.get("latin"):
+            resp.charset = "latin-1"
+        return "jezevec"
+
+    client = TestClient(app)
+    for query in ("", "?page=2", "?page=3"):
+        response = await client.get(f"/config{query}")
+        assert response.json() == {"calls": 1, "query": {}}
+        assert response.headers["access-control-allow-origin"] == "*"
+    response = await client.get("/config", headers={"accept-encoding": "gzip"})
+    assert loads(decompress(response.body))["calls"] == 1
+    assert "Accept-Encoding" in response.headers["vary"]
+    response = await client.get(
+        "/config", headers={"accept": "application/vnd.api+json"}
+    )
+    assert response.headers["content-type"].startswith("application/vnd.api+json")
+    assert response.json()["calls"] == 1
+    assert (await client.head("/config")).headers["content-length"] == "22"
+    assert calls["config"] == 1
+
+    response = await client.get("/plain")
+    assert response.headers["content-type"] == "text/plain;charset=UTF-8"
+    response = await client.get("/plain?latin=1")
+    assert response.headers["content-type"] == "text/plain;charset=latin-1"
+    response = await client.get("/missing")
+    assert response.headers["content-type"] == "application/json;charset=UTF-8"
+
+    with pytest.raises(RuntimeError):
+
+        @app.route("/both", static=True, cache=ResponseCache())
+        async def both(req, resp):
+            return None
@@ -0,0 +1,70 @@
+import asyncio
+
+from requests import get
+
+from tests.conftest import Server
+from yasgi import YASGI, HTTPRequest, HTTPResponse, Routing
+
+
+def test_stream():
+    def app_wrapper():
+        app = YASGI(content_type="text/plain", buffer_size=16)
+
+        @Routing("/async-gen")
+        async def async_gen(req, resp):
+            async def rows():
+                for i in range(100):
+                    yield f"{i},"
+
+            return rows()
+
+        @Routing("/sync-gen", content_type="application/json")
+        async def sync_gen(req, resp):
+            return ({"row": i} for i in range(3))
+
+        @Routing("/send")
+        async def send(req, resp):
+            for i in range(10):
+                await resp.send(str(i))
+
+        return app
+
+    server = Server(app_wrapper)
+    response = get("http://localhost:3000/async-gen")
+    assert response.status_code == 200
+    assert response.headers["Transfer-Encoding"] == "chunked"
+    assert response.text == "".join(f"{i}," for i in range(100))
+    response = get("http://localhost:3000/sync-gen")
+    assert response.text == '{"row":0}{"row":1}{"row":2}'
+    response = get("http://localhost:3000/send")
+    assert response.text == "0123456789"
+    server.stop()
+
+
+async def test_stream_disconnect():
+    disconnect = asyncio.Event()
+    events = []
+
+    async def receive():
+        await disconnect.wait()
+        return {"type": "http.disconnect"}
+
+    async def send(event):
+        events.append(event)
+        if len(events) == 3:
+            disconnect.set()
+        await asyncio.sleep(0)
+
+    async def endless():
+        while True:
+            yield b"x"
+
+    scope = {"type": "http", "path": "/", "headers": []}
+    request = HTTPRequest(scope, {"body": b"", "more_body": False}, receive)
+    response = HTTPResponse(send, "text/plain", "UTF-8", "", request, buffer_size=0)
+    await asyncio.wait_for(response.stream(endless()), 1)
+
+    assert events[0]["type"] == "http.response.start"
+    assert all(event["more_body"] for event in events[1:])
+    assert response.disconnected
+    assert response.processed
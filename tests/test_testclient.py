@@ -0,0 +1,77 @@
+from contextlib import asynccontextmanager
+
+import pytest
+
+from yasgi import YASGI
+from yasgi.testclient import TestClient
+
+
+async def test_client_http():
+    app = YASGI(content_type="application/json")
+
+    @app.route("/items/{id:int}", methods=["GET", "POST"])
+    async def item(req, resp, id):
+        if req.method == "POST":
+            return {"id": id, "data": req.data}
+        return {"id": id, "query": req.query_params, "agent": req.headers["x-agent"]}
+
+    @app.route("/upload", methods=["POST"], stream=True)
+    async def upload(req, resp):
+        return {"chunks": [len(chunk) async for chunk in req.stream()]}
+
+    client = TestClient(app, headers={"X-Agent": "test"})
+    response = await client.get("/items/7?page=2")
+    assert response.status == 200
+    assert response.headers["content-type"] == "application/json;charset=UTF-8"
+    assert response.json() == {"id": 7, "query": {"page": "2"}, "agent": "test"}
+
+    response = await client.post("/items/7", json={"name": "jezevec"})
+    assert response.json() == {"id": 7, "data": {"name": "jezevec"}}
+    response = await client.post("/items/7", form={"name": "pes"})
+    assert response.json() == {"id": 7, "data": {"name": "pes"}}
+
+    response = await client.post("/upload", body=b"x" * 10, chunk_size=4)
+    assert response.json() == {"chunks": [4, 4, 2]}
+
+    assert (await client.head("/items/7")).body == b""
+    assert (await client.delete("/items/7")).status == 405
+    assert (await client.get("/missing")).status == 404
+
+
+async def test_client_websocket():
+    app = YASGI(content_type="application/json")
+
+    @app.websocket("/echo")
+    async def echo(req, resp, args):
+        if req.event["type"] == "websocket.receive":
+            await resp.send({"echo": req.data})
+
+    client = TestClient(app)
+    async with client.websocket("/echo") as websocket:
+        for i in range(3):
+            await websocket.send_json({"i": i})
+            assert await websocket.receive_json() == {"echo": {"i": i}}
+
+    with pytest.raises(RuntimeError):
+        async with client.websocket("/missing"):
+            pass
+
+
+async def test_client_lifespan():
+    calls = []
+
+    @asynccontextmanager
+    async def lifespan(app):
+        calls.append("startup")
+        yield
+        calls.append("shutdown")
+
+    app = YASGI(lifespan=lifespan)
+
+    @app.route("/")
+    async def index(req, resp):
+        return calls
+
+    async with TestClient(app) as client:
+        assert (await client.get("/")).json() == ["startup"]
+    assert calls == ["startup", "shutdown"]
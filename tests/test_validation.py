@@ -0,0 +1,122 @@
+from dataclasses import dataclass, field
+from typing import List, Optional, TypedDict
+
+import pytest
+
+from yasgi import YASGI
+from yasgi.testclient import TestClient
+
+
+@dataclass
+class Address:
+    city: str
+    zip: Optional[str] = None
+
+
+@dataclass
+class Order:
+    item: str
+    quantity: int
+    price: float
+    address: Address
+    tags: List[str] = field(default_factory=list)
+
+
+class Filter(TypedDict, total=False):
+    name: str
+    active: bool
+
+
+async def test_validation():
+    app = YASGI(content_type="application/json")
+
+    @app.route("/users/{id}/orders", methods=["POST"], validate=True)
+    async def create(req, resp, id: int, order: Order, dry_run: bool = False):
+        return {
+            "id": id,
+            "item": order.item,
+            "total": order.quantity * order.price,
+            "city": order.address.city,
+            "tags": order.tags,
+            "dry_run": dry_run,
+        }
+
+    @app.route("/search", methods=["POST"], validate=True)
+    async def search(
+        req,
+        resp,
+        q: str,
+        page: int = 1,
+        ids: List[int] = None,
+        filter: Optional[Filter] = None,
+    ):
+        return {"q": q, "page": page, "ids": ids, "filter": filter}
+
+    client = TestClient(app)
+    order = {
+        "item": "pes",
+        "quantity": 2,
+        "price": 1,
+        "address": {"city": "Praha"},
+    }
+    response = await client.post("/users/7/orders?dry_run=yes", json=order)
+    assert response.json() == {
+        "id": 7,
+        "item": "pes",
+        "total": 2.0,
+        "city": "Praha",
+        "tags": [],
+        "dry_run": True,
+    }
+
+    response = await client.post(
+        "/users/x/orders?dry_run=maybe",
+        json={"item": 1, "quantity": True, "price": 1.5, "address": {}, "tags": [1]},
+    )
+    assert response.status == 422
+    assert response.json()["detail"] == [
+        {
+            "loc": ["path", "id"],
+            "msg": "Input should be a valid integer",
+            "type": "int_parsing",
+        },
+        {"loc": ["body", "item"], "msg": "Input should be str", "type": "str_type"},
+        {"loc": ["body", "quantity"], "msg": "Input should be int", "type": "int_type"},
+        {
+            "loc": ["body", "address", "city"],
+            "msg": "Field required",
+            "type": "missing",
+        },
+        {"loc": ["body", "tags", 0], "msg": "Input should be str", "type": "str_type"},
+        {
+            "loc": ["query", "dry_run"],
+            "msg": "Input should be a valid boolean",
+            "type": "bool_parsing",
+        },
+    ]
+
+    response = await client.post("/search?q=jezevec&ids=1&ids=2")
+    assert response.json() == {"q": "jezevec", "page": 1, "ids": [1, 2], "filter": None}
+    response = await client.post("/search?q=a", json={"active": True})
+    assert response.json()["filter"] == {"active": True}
+    response = await client.post("/search?page=x")
+    assert [error["loc"] for error in response.json()["detail"]] == [
+        ["query", "q"],
+        ["query", "page"],
+    ]
+
+
+def test_validation_registration():
+    app = YASGI()
+
+    with pytest.raises(RuntimeError):
+
+        @app.route("/unsupported", validate=True)
+        async def unsupported(req, resp, when: complex):
+            return None
+
+    with pytest.raises(RuntimeError):
+
+        @app.route("/two-bodies", methods=["POST"], validate=True)
+        async def two_bodies(req, resp, first: Order, second: Order):
+            return None
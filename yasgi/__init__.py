@@ -4,16 +4,44 @@
 """
 
 from yasgi.asgi import YASGI
+from yasgi.cache import ResponseCache
+from yasgi.codecs import Codec, Codecs, JSONCodec, MsgPackCodec, RawCodec
+from yasgi.compression import Compressor
+from yasgi.concurrency import ProcessPool, ThreadPool, offload
+from yasgi.cookies import CookieSessions
+from yasgi.datastructures import Headers, QueryParams
+from yasgi.hub import Hub
+from yasgi.metrics import Metrics
+from yasgi.profiling import Profiler
+from yasgi.ratelimit import RateLimit
 from yasgi.requests import HTTPRequest, Request
-from yasgi.responses import HTTPResponse, Response
+from yasgi.responses import FileResponse, HTTPResponse, Response
 from yasgi.routing import HTTPRouting, Routing, WebsocketsRouting
 
 __version__ = "0.1.0"
 
 __all__ = [
     "YASGI",
+    "Codec",
+    "Codecs",
+    "JSONCodec",
+    "MsgPackCodec",
+    "RawCodec",
+    "Compressor",
+    "ProcessPool",
+    "ThreadPool",
+    "offload",
+    "CookieSessions",
+    "Headers",
+    "Hub",
+    "Metrics",
+    "Profiler",
+    "RateLimit",
+    "QueryParams",
+    "ResponseCache",
     "HTTPRequest",
     "Request",
+    "FileResponse",
     "HTTPResponse",
     "Response",
     "HTTPRouting",
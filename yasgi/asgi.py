@@ -1,9 +1,43 @@
 import contextlib
+from asyncio import Semaphore
+from inspect import isasyncgen, isawaitable, isgenerator
+from traceback import format_exc
 
-from yasgi.exceptions import InputParseError
+from yasgi.codecs import Codecs
+from yasgi.compression import Compressor
+from yasgi.concurrency import PROCESS, THREADS, ProcessPool, ThreadPool, _pool
+from yasgi.cookies import CookieSessions
+from yasgi.datastructures import State
+from yasgi.exceptions import (
+    ClientDisconnect,
+    HandlerTimeout,
+    InputParseError,
+    RequestTooLarge,
+    SessionTooLarge,
+    ValidationError,
+)
+from yasgi.hub import Hub
+from yasgi.metrics import CONTENT_TYPE, Metrics, Recorder
+from yasgi.middleware import (
+    build_asgi,
+    build_http,
+    endpoint,
+    kind,
+    split,
+)
+from yasgi.multipart import SPOOL_MAX_SIZE
+from yasgi.profiling import Profiler
+from yasgi.ratelimit import RateLimit
 from yasgi.requests import HTTPRequest, Request
-from yasgi.responses import HTTPAbort, HTTPResponse, Response
-from yasgi.routing import HTTPRouting, WebsocketsRouting
+from yasgi.responses import (
+    BUFFER_SIZE,
+    FileResponse,
+    HeaderTemplate,
+    HTTPAbort,
+    HTTPResponse,
+    Response,
+)
+from yasgi.routing import HTTPRouting, Router, WebsocketsRouting, _split
 
 
 class YASGI:
@@ -13,77 +47,390 @@ class YASGI:
     ASGI is asynchronous callable, that is it accepts scope which contains information about incoming request,
     send, an awaitable that lets you send events to the client, and receive, an awaitable which lets you receive events from the client.
 
+    Every application owns its routes and settings, so several applications can live in one process
+    and be mounted under a path prefix of another one.
+
     :param content_type: The content_type of the application.
     :param charset: The charset of the application.
     :param allow: The allowed methods of the application.
+    :param spool_max_size: The size in bytes of an uploaded file kept in memory before it is spooled to disk.
+    :param buffer_size: The size in bytes streamed response chunks are combined up to before they are sent.
+    :param compression: The `Compressor` used for responses of every route.
+    :param etag: Generate an `ETag` from the body of every route and answer matching conditional requests with 304.
+    :param lifespan: Callable taking the application and returning an async context manager entered on startup and exited on shutdown.
+    :param sessions: The `CookieSessions` behind `request.session`.
+    :param max_body_size: The maximum request body size in bytes, larger requests get 413 before or while the body is read.
+    :param codecs: The `Codecs` encoding responses and decoding request bodies by media type.
+    :param hub: The websocket publish/subscribe `Hub`, also setting the outbound queue size and slow consumer policy.
+    :param metrics: The `Metrics` recording requests of every route, exposed on its path.
+    :param rate_limit: The `RateLimit` of every route, limited requests get 429 before the body is read.
+    :param thread_pool: The `ThreadPool` running sync handlers and `offload` calls, shut down with the application.
+    :param process_pool: The `ProcessPool` of process routes, started and shut down with the application.
+    :param profiler: The `Profiler` sampling requests with cProfile and tracemalloc.
+    :param middleware: The application middleware, ASGI factories wrapping every HTTP and websocket request
+        and `(request, response, call_next)` functions wrapping every route.
     """
 
-    __slots__ = ()
-    _content_type = ""
-    _charset = ""
-    _allow = None
+    __slots__ = (
+        "content_type",
+        "charset",
+        "allow",
+        "spool_max_size",
+        "buffer_size",
+        "compression",
+        "etag",
+        "sessions",
+        "max_body_size",
+        "hub",
+        "codecs",
+        "metrics",
+        "rate_limit",
+        "thread_pool",
+        "process_pool",
+        "profiler",
+        "middleware",
+        "router",
+        "state",
+        "_lifespan",
+        "_context",
+        "_on_startup",
+        "_on_shutdown",
+        "_mounts",
+        "_template",
+        "_app",
+        "_http_middleware",
+    )
     triggers: dict = {}
 
     def __init__(
-        self, content_type: str = "application/json", charset: str = "UTF-8", allow=""
+        self,
+        content_type: str = "application/json",
+        charset: str = "UTF-8",
+        allow="",
+        spool_max_size: int = SPOOL_MAX_SIZE,
+        buffer_size: int = BUFFER_SIZE,
+        compression: Compressor = None,
+        etag: bool = False,
+        lifespan=None,
+        sessions: CookieSessions = None,
+        max_body_size: int = None,
+        hub: Hub = None,
+        codecs: Codecs = None,
+        metrics: Metrics = None,
+        rate_limit: RateLimit = None,
+        thread_pool: ThreadPool = None,
+        process_pool: ProcessPool = None,
+        profiler: Profiler = None,
+        middleware: list = None,
     ):
-        YASGI._content_type = content_type
-        YASGI._charset = charset
-        YASGI._allow = allow
+        self.content_type = content_type
+        self.charset = charset
+        self.allow = allow
+        self.spool_max_size = spool_max_size
+        self.buffer_size = buffer_size
+        self.compression = compression
+        self.etag = etag
+        self.sessions = sessions
+        self.max_body_size = max_body_size
+        self.hub = Hub() if hub is None else hub
+        self.codecs = Codecs() if codecs is None else codecs
+        if self.hub.codec is None:
+            self.hub.codec = self.codecs.get(self.content_type)
+        self.metrics = metrics
+        self.rate_limit = rate_limit
+        self.thread_pool = THREADS if thread_pool is None else thread_pool
+        self.process_pool = process_pool
+        self.profiler = profiler
+        self.middleware = list(middleware or ())
+        self.router = Router.bind(self)
+        if metrics is not None and metrics.path is not None:
+            self.route(metrics.path, content_type=CONTENT_TYPE, rate_limit=False)(
+                metrics.endpoint
+            )
+        if profiler is not None and profiler.path is not None:
+            self.route(
+                profiler.path, content_type="application/json", rate_limit=False
+            )(profiler.endpoint)
+        self.state = State()
+        self._lifespan = lifespan
+        self._context = None
+        self._on_startup: list = []
+        self._on_shutdown: list = []
+        self._mounts = _Mount()
+        self._template = None
+        self._build()
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "lifespan":
+            return await self._lifespan_events(receive, send)
+        await self._app(scope, receive, send)
 
-    @staticmethod
-    async def __call__(scope, receive, send):
-        event = await receive()
+    async def _dispatch(self, scope, receive, send):
+        if self.thread_pool is not THREADS:
+            _pool.set(self.thread_pool)
+        if self._mounts.children:
+            mount = self._mounts.find(scope["path"])
+            if mount is not None:
+                prefix, app = mount
+                scope = dict(
+                    scope,
+                    path=scope["path"][len(prefix) :] or "/",
+                    root_path=scope.get("root_path", "") + prefix,
+                )
+                return await app(scope, receive, send)
+        scope["app"] = self
         if scope["type"] == "http":
-            while event["more_body"]:
-                more = await receive()
-                event["body"] += more["body"]
-                event["more_body"] = more["more_body"]
-            await YASGI._http(scope, event, send)
-        elif event["type"] == "websocket.connect":
-            await YASGI._websockets(scope, send, receive)
-
-    @staticmethod
-    async def _http(scope, event, send):
-        method, url_args, not_allowed, ct = HTTPRouting.get(
-            scope["path"], scope["method"]
+            await self._http(scope, receive, send)
+        elif (await receive())["type"] == "websocket.connect":
+            await self._websockets(scope, send, receive)
+
+    def route(self, route, methods: list = None, **kwargs):
+        """Decorator registering an HTTP route to this application, takes the `HTTPRouting` parameters."""
+        return HTTPRouting(route, methods, app=self, **kwargs)
+
+    def websocket(self, route, **kwargs):
+        """Decorator registering a websocket route to this application."""
+        return WebsocketsRouting(route, app=self, **kwargs)
+
+    def add_middleware(self, middleware):
+        """
+        Adds an application middleware inside the already added ones, an ASGI factory `Middleware(app)`
+        or an `async (request, response, call_next)` function. Can be used as a decorator.
+        """
+        kind(middleware)
+        self.middleware.append(middleware)
+        self._build()
+        return middleware
+
+    def _build(self) -> None:
+        asgi, self._http_middleware = split(self.middleware)
+        self._app = build_asgi(asgi, self._dispatch)
+        for route in self.router.routes():
+            route.asgi = route.call = None
+
+    def _compile(self, route) -> None:
+        """Compiles the middleware of a route and the application into single nested callables."""
+        if route.concurrency and route.semaphore is None:
+            route.semaphore = Semaphore(route.concurrency)
+        if route.executor == PROCESS and self.process_pool is None:
+            self.process_pool = ProcessPool()
+        route.call = build_http(
+            self._http_middleware + route.http_middleware,
+            endpoint(route, self.thread_pool, self.process_pool),
+        )
+        if route.asgi_middleware:
+            route.asgi = build_asgi(route.asgi_middleware, self._routed)
+        if self.metrics is not None:
+            route.series = self.metrics.series(route.path)
+
+    def mount(self, prefix: str, app) -> None:
+        """
+        Mounts an ASGI application (or another `YASGI`) under a path prefix, requests under it are passed to the
+        application with the prefix moved from `path` to `root_path`. Mounted `YASGI` applications follow the lifespan of this one.
+        """
+        if prefix[:1] != "/" or prefix == "/":
+            raise RuntimeError(f"Mount prefix must start with '/'! ({prefix})")
+        self._mounts.insert(prefix.rstrip("/"), app)
+
+    def on_startup(self, fce):
+        """Registers a sync or async function called on the application startup."""
+        self._on_startup.append(fce)
+        return fce
+
+    def on_shutdown(self, fce):
+        """Registers a sync or async function called on the application shutdown."""
+        self._on_shutdown.append(fce)
+        return fce
+
+    async def startup(self) -> None:
+        for route in self.router.routes():
+            if route.call is None:
+                self._compile(route)
+        if self.process_pool is not None:
+            await self.process_pool.start()
+        for fce in self._on_startup:
+            if isawaitable(result := fce()):
+                await result
+        if self._lifespan is not None:
+            self._context = self._lifespan(self)
+            await self._context.__aenter__()
+        for app in self._mounts.apps():
+            if isinstance(app, YASGI):
+                await app.startup()
+
+    async def shutdown(self) -> None:
+        for app in self._mounts.apps():
+            if isinstance(app, YASGI):
+                await app.shutdown()
+        if self._context is not None:
+            context, self._context = self._context, None
+            await context.__aexit__(None, None, None)
+        for fce in self._on_shutdown:
+            if isawaitable(result := fce()):
+                await result
+        if self.thread_pool is not THREADS:
+            self.thread_pool.shutdown()
+        if self.process_pool is not None:
+            self.process_pool.shutdown()
+
+    async def _lifespan_events(self, receive, send):
+        while True:
+            event = await receive()
+            kind = event["type"][9:]
+            try:
+                await (self.startup() if kind == "startup" else self.shutdown())
+            except BaseException:
+                await send({"type": f"lifespan.{kind}.failed", "message": format_exc()})
+                raise
+            await send({"type": f"lifespan.{kind}.complete"})
+            if kind == "shutdown":
+                return
+
+    async def _http(self, scope, receive, send):
+        route, url_args, not_allowed = self.router.http(scope["path"], scope["method"])
+        if route is not None and route.call is None:
+            self._compile(route)
+        if self.metrics is None:
+            return await self._route(scope, receive, send, route, url_args, not_allowed)
+        series = self.metrics.unmatched if route is None else route.series
+        recorder = Recorder(receive, send)
+        started = series.start()
+        try:
+            await self._route(
+                scope, recorder.receive, recorder.send, route, url_args, not_allowed
+            )
+        finally:
+            series.finish(started, recorder)
+
+    async def _route(self, scope, receive, send, route, url_args, not_allowed):
+        if route is not None and route.asgi is not None:
+            scope["route"], scope["url_args"] = route, url_args
+            return await route.asgi(scope, receive, send)
+        await self._handle(scope, receive, send, route, url_args, not_allowed)
+
+    async def _routed(self, scope, receive, send):
+        await self._handle(
+            scope, receive, send, scope["route"], scope["url_args"], None
         )
 
-        request = HTTPRequest(scope, event)
+    async def _handle(self, scope, receive, send, route, url_args, not_allowed):
+        compression = self.compression
+        if route is not None and route.compression is not None:
+            compression = route.compression or None
+
+        limit = self.max_body_size
+        if route is not None and route.max_body_size is not None:
+            limit = route.max_body_size
+        request = HTTPRequest(scope, None, receive, self.spool_max_size, limit)
+        if route is not None:
+            rate_limit = self.rate_limit
+            if route.rate_limit is not None:
+                rate_limit = None if route.rate_limit is False else route.rate_limit
+            if rate_limit is not None and (retry := rate_limit.check(request)):
+                return await _too_many_requests(
+                    send, retry, self._route_template(route)
+                )
+        content_type = route and route.content_type or self.content_type
+        if len(self.codecs) > 1:
+            codec = self.codecs.negotiate(request.headers.get("accept"), content_type)
+        else:
+            codec = self.codecs.get(content_type)
+        await self._respond(
+            request, route, url_args, not_allowed, compression, codec, send
+        )
+
+    async def _respond(
+        self, request, route, url_args, not_allowed, compression, codec, send
+    ):
+        content_type = route and route.content_type or self.content_type
         response = HTTPResponse(
             send,
-            content_type=ct or YASGI._content_type,
-            charset=YASGI._charset,
-            allow=YASGI._allow,
+            content_type=content_type if codec is None else codec.media_type,
+            charset=self.charset,
+            allow=self.allow,
+            request=request,
+            buffer_size=self.buffer_size,
+            compressor=compression,
+            etag=self.etag if route is None or route.etag is None else route.etag,
+            template=self._route_template(route),
+            codec=codec,
         )
+        if len(self.codecs) > 1 and content_type in self.codecs:
+            response.add_header("Vary", "Accept")
 
-        with contextlib.suppress(HTTPAbort):
-            if not_allowed:
-                await response.abort(status=405)
-            elif not method:
-                await response.abort(status=404)
+        with contextlib.suppress(HTTPAbort, ClientDisconnect):
             try:
-                body = await method(request, response, *url_args)
-            except InputParseError:
-                await response.abort(status=400)
-            if not response.processed:
-                await response.process(body)
-
-    @staticmethod
-    async def _websockets(scope, send, receive):
-        trigger, url_args, ct = WebsocketsRouting.get(scope["path"])
-        if trigger:
-            await send({"type": "websocket.accept"})
+                if not_allowed:
+                    await response.abort(status=405)
+                elif not route:
+                    await response.abort(status=404)
+                elif request.too_large:
+                    await response.abort(status=413)
+                try:
+                    profiler = self.profiler
+                    if profiler is not None and profiler.sample(request):
+                        body = await profiler.run(route, request, response, url_args)
+                    else:
+                        body = await route.call(request, response, url_args)
+                except InputParseError as e:
+                    await response.abort(status=400, data={"detail": str(e)})
+                except ValidationError as e:
+                    await response.abort(status=422, data={"detail": e.errors})
+                except HandlerTimeout:
+                    await response.abort(status=504)
+                except RequestTooLarge:
+                    if not response.started:
+                        await response.abort(status=413)
+                    return
+                if type(body) == FileResponse:
+                    await body(request, response)
+                elif isasyncgen(body) or isgenerator(body):
+                    await response.stream(body)
+                elif response.started and not response.processed:
+                    await response.finish()
+                elif not response.processed:
+                    await response.process(body)
+            except SessionTooLarge:
+                # the response is not started, it is sent without the session cookie
+                request.session.modified = False
+                await response.abort(status=500)
+
+    def _route_template(self, route) -> HeaderTemplate:
+        if route is None:
+            if self._template is None:
+                self._template = HeaderTemplate(
+                    self.content_type, self.charset, self.allow
+                )
+            return self._template
+        if route.template is None:
+            route.template = HeaderTemplate(
+                route.content_type or self.content_type, self.charset, self.allow
+            )
+        return route.template
+
+    async def _websockets(self, scope, send, receive):
+        route, url_args = self.router.websocket(scope["path"])
+        if not route:
+            await send({"type": "websocket.close"})
+            return
+        await send({"type": "websocket.accept"})
+        connection = self.hub.connection(send)
+        request = Request(scope, None, content_type=self.content_type)
+        response = Response(
+            connection.send,
+            content_type=route.content_type or self.content_type,
+            charset=self.charset,
+            connection=connection,
+            codec=self.codecs.get(route.content_type or self.content_type),
+        )
+        try:
             while True:
                 event = await receive()
-                request = Request(scope, event, content_type=YASGI._content_type)
-                response = Response(
-                    send, content_type=ct or YASGI._content_type, charset=YASGI._charset
-                )
+                request._next(event)
                 try:
-                    await trigger(request, response, url_args)
+                    await route.handler(request, response, url_args)
                 except InputParseError:
-                    response.send(
+                    await response.send(
                         {
                             "status": False,
                             "error": "P001",
@@ -92,5 +439,54 @@ class YASGI:
                     )
                 if event["type"] == "websocket.disconnect":
                     break
-        else:
-            await send({"type": "websocket.close"})
+        finally:
+            self.hub.discard(connection)
+            await connection.close()
+
+
+async def _too_many_requests(send, retry: int, template: HeaderTemplate) -> None:
+    headers = template.headers + [
+        template.content_header,
+        (b"Retry-After", str(retry).encode()),
+        (b"Content-Length", b"0"),
+    ]
+    await send({"type": "http.response.start", "status": 429, "headers": headers})
+    await send({"type": "http.response.body", "body": b""})
+
+
+class _Mount:
+    """Prefix trie of mounted applications keyed by path segments."""
+
+    __slots__ = ("children", "app", "prefix")
+
+    def __init__(self):
+        self.children: dict = {}
+        self.app = None
+        self.prefix = ""
+
+    def insert(self, prefix: str, app) -> None:
+        node = self
+        for part in _split(prefix):
+            node = node.children.setdefault(part, _Mount())
+        if node.app is not None:
+            raise RuntimeError(f"Mount alreay set! ({prefix})")
+        node.app, node.prefix = app, prefix
+
+    def find(self, path: str):
+        node, found = self, None
+        for part in _split(path):
+            node = node.children.get(part)
+            if node is None:
+                break
+            if node.app is not None:
+                found = node
+        return None if found is None else (found.prefix, found.app)
+
+    def apps(self) -> list:
+        apps, nodes = [], [self]
+        while nodes:
+            node = nodes.pop()
+            if node.app is not None:
+                apps.append(node.app)
+            nodes.extend(node.children.values())
+        return apps
@@ -0,0 +1,186 @@
+from asyncio import get_running_loop, shield
+from collections import OrderedDict
+from email.utils import parsedate_to_datetime
+from functools import partial
+from inspect import isasyncgen, isgenerator
+from time import monotonic
+
+from yasgi.responses import FileResponse
+
+_CACHED = ("GET", "HEAD")
+
+
+class ResponseCache:
+    """
+    ResponseCache keeps what the handler of a route returned for GET/HEAD requests with the headers it set.
+
+    It is the innermost call of the route, so the request/response middleware run for hits as well, and they get
+    the encoded body. The encoded (and compressed) body is kept for every negotiated media type and content-coding,
+    HEAD requests share the entries of GET ones.
+
+    The key is built from the path, query string and the `vary` request headers, entries expire after `ttl`
+    seconds and the least recently used one is evicted over `maxsize`. Concurrent misses of the same key wait for
+    a single handler call instead of running the handler each. Only plain bodies of responses without cookies
+    or session changes are stored.
+
+    :param ttl: The time in seconds an entry is served.
+    :param maxsize: The maximum number of entries.
+    :param vary: The names of request headers the response depends on.
+    """
+
+    __slots__ = (
+        "ttl",
+        "maxsize",
+        "vary",
+        "hits",
+        "misses",
+        "evictions",
+        "_entries",
+        "_inflight",
+    )
+
+    def __init__(self, ttl: float = 60, maxsize: int = 1024, vary=()):
+        self.ttl = ttl
+        self.maxsize = maxsize
+        self.vary = tuple(name.lower() for name in vary)
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries: OrderedDict = OrderedDict()
+        self._inflight: dict = {}
+
+    def __len__(self):
+        return len(self._entries)
+
+    @property
+    def stats(self) -> dict:
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "size": len(self._entries),
+        }
+
+    def key(self, request) -> tuple:
+        scope = request.scope
+        key = (scope["path"], scope["query_string"])
+        if self.vary:
+            headers = request.headers
+            key += tuple(headers.get(name) for name in self.vary)
+        return key
+
+    def get(self, key):
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        if entry[0] < monotonic():
+            del self._entries[key]
+            self.evictions += 1
+            return None
+        self._entries.move_to_end(key)
+        return entry
+
+    def set(self, key, value, headers: list) -> tuple:
+        entry = self._entries[key] = (monotonic() + self.ttl, value, headers, {})
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+        return entry
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+    def wrap(self, call, static: bool = False):
+        """
+        Returns the route `call(request, response, url_args)` answering GET/HEAD requests from the cache,
+        a `static` route has a single entry for all requests.
+        """
+
+        async def cached(request, response, url_args):
+            if request.scope["method"] not in _CACHED:
+                return await call(request, response, url_args)
+            key = () if static else self.key(request)
+            return await self.respond(
+                key, request, response, partial(call, request, response, url_args)
+            )
+
+        return cached
+
+    async def respond(self, key, request, response, call):
+        """
+        Returns the encoded body of the entry of `key` and sets its headers on the response,
+        or awaits `call()` once for all concurrent requests and stores what it returned.
+        """
+        entry = self.get(key)
+        if entry is None and key in self._inflight:
+            entry = await shield(self._inflight[key])
+            if entry is None:
+                return await call()
+        if entry is not None:
+            self.hits += 1
+            response._headers.extend(entry[2])
+            _validate(response, entry[2])
+            return self._body(entry, request, response)
+
+        self.misses += 1
+        future = self._inflight[key] = get_running_loop().create_future()
+        start, entry = len(response._headers), None
+        try:
+            value = await call()
+            entry = self._store(
+                key, request, response, value, response._headers[start:]
+            )
+        finally:
+            del self._inflight[key]
+            future.set_result(entry)
+        return value if entry is None else self._body(entry, request, response)
+
+    def _store(self, key, request, response, value, headers: list):
+        if response.started or response._redirect or response._not_modified:
+            return None
+        if type(value) == FileResponse or isasyncgen(value) or isgenerator(value):
+            return None
+        if request.session_modified or any(
+            name.lower() == b"set-cookie" for name, _ in headers
+        ):
+            return None
+        return self.set(key, value, list(headers))
+
+    @staticmethod
+    def _body(entry, request, response) -> bytes:
+        """Returns the body of the entry encoded for the response, compressed when its coding was negotiated."""
+        compressor = response._compressor
+        coding = None
+        if compressor is not None and not any(
+            name.lower() == b"content-encoding" for name, _ in entry[2]
+        ):
+            coding = compressor.negotiate(request.headers.get("accept-encoding", ""))
+        variant = (response._type, response.charset, coding)
+        encoded = entry[3].get(variant)
+        if encoded is None:
+            body = response._encode(entry[1])
+            if coding is not None and len(body) >= compressor.minimum_size:
+                body = compressor.compress(body, coding)
+            else:
+                coding = None
+            encoded = entry[3][variant] = (body, coding)
+        body, coding = encoded
+        if coding is not None:
+            response.add_header("Content-Encoding", coding)
+        return body
+
+
+def _validate(response, headers: list) -> None:
+    etag = modified = None
+    for name, value in headers:
+        name = name.lower()
+        if name == b"etag":
+            etag = value.decode()
+        elif name == b"last-modified":
+            try:
+                modified = parsedate_to_datetime(value.decode()).timestamp()
+            except (TypeError, ValueError):
+                pass
+    if etag is not None or modified is not None:
+        response._not_modified = response._fresh(etag, modified)
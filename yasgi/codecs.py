@@ -0,0 +1,162 @@
+from orjson import dumps, loads
+
+try:
+    import msgpack
+except ImportError:  # pragma: no cover
+    msgpack = None
+
+NEGOTIATION_CACHE_SIZE = 256
+
+
+class Codec:
+    """
+    Codec encodes response data and decodes request bodies of one media type.
+
+    :param media_type: The media type the codec is registered for.
+    """
+
+    __slots__ = ("media_type",)
+    text = False
+
+    def __init__(self, media_type: str):
+        self.media_type = media_type
+
+    def encode(self, data) -> bytes:
+        raise NotImplementedError
+
+    def decode(self, body: bytes):
+        raise NotImplementedError
+
+
+class JSONCodec(Codec):
+    """
+    JSONCodec serializes with orjson, `option` takes the `orjson.OPT_*` flags such as
+    `OPT_SERIALIZE_NUMPY` or `OPT_NON_STR_KEYS` and `default` the fallback for other types.
+    """
+
+    __slots__ = ("option", "default")
+    text = True
+
+    def __init__(
+        self, media_type: str = "application/json", option: int = 0, default=None
+    ):
+        super().__init__(media_type)
+        self.option = option
+        self.default = default
+
+    def encode(self, data) -> bytes:
+        return dumps(data, default=self.default, option=self.option)
+
+    def decode(self, body: bytes):
+        return loads(body)
+
+
+class MsgPackCodec(Codec):
+    """MsgPackCodec serializes with the optional `msgpack` package."""
+
+    __slots__ = ("default",)
+
+    def __init__(self, media_type: str = "application/msgpack", default=None):
+        if msgpack is None:
+            raise RuntimeError("MsgPackCodec requires the `msgpack` package!")
+        super().__init__(media_type)
+        self.default = default
+
+    def encode(self, data) -> bytes:
+        return msgpack.packb(data, default=self.default)
+
+    def decode(self, body: bytes):
+        return msgpack.unpackb(body)
+
+
+class RawCodec(Codec):
+    """RawCodec passes bytes-like data through and returns request bodies as `bytes`."""
+
+    __slots__ = ()
+
+    def __init__(self, media_type: str = "application/octet-stream"):
+        super().__init__(media_type)
+
+    def encode(self, data) -> bytes:
+        if type(data) != bytes:
+            data = bytes(memoryview(data))
+        return data
+
+    def decode(self, body: bytes):
+        return body
+
+
+class Codecs:
+    """
+    Codecs is the registry of codecs by media type.
+
+    A route answers with the codec of its content type, unless the request `Accept` header prefers
+    another registered media type. Negotiation results are cached per `Accept` value.
+
+    :param codecs: The codecs, a `JSONCodec` when none are given.
+    """
+
+    __slots__ = ("_codecs", "_negotiated")
+
+    def __init__(self, *codecs: Codec):
+        self._codecs: dict = {}
+        self._negotiated: dict = {}
+        for codec in codecs or (JSONCodec(),):
+            self.register(codec)
+
+    def __len__(self):
+        return len(self._codecs)
+
+    def __contains__(self, media_type: str) -> bool:
+        return media_type in self._codecs
+
+    def register(self, codec: Codec) -> None:
+        self._codecs[codec.media_type] = codec
+        self._negotiated.clear()
+
+    def get(self, media_type: str):
+        return self._codecs.get(media_type)
+
+    def negotiate(self, accept: str, default: str):
+        """Returns the codec of the media type the `Accept` header prefers, the `default` one on ties or no match."""
+        codec = self._codecs.get(default)
+        if codec is None or len(self._codecs) == 1 or not accept:
+            return codec
+        key = (accept, default)
+        negotiated = self._negotiated.get(key)
+        if negotiated is None:
+            if len(self._negotiated) >= NEGOTIATION_CACHE_SIZE:
+                self._negotiated.clear()
+            negotiated = self._negotiated[key] = self._negotiate(accept, codec)
+        return negotiated
+
+    def _negotiate(self, accept: str, default: Codec) -> Codec:
+        best, quality = default, -1.0
+        for item in accept.split(","):
+            media_type, _, params = item.partition(";")
+            media_type = media_type.strip().lower()
+            q = 1.0
+            for param in params.split(";"):
+                name, _, value = param.partition("=")
+                if name.strip() == "q":
+                    try:
+                        q = float(value)
+                    except ValueError:
+                        q = 0.0
+            if (
+                media_type == "*/*"
+                or media_type == default.media_type
+                or media_type[-2:] == "/*"
+                and default.media_type.startswith(media_type[:-1])
+            ):
+                codec = default
+            else:
+                codec = self._codecs.get(media_type)
+                if codec is None:
+                    continue
+            if q > quality or (q == quality and codec is default):
+                best, quality = codec, q
+        return best
+
+
+CODECS = Codecs()
@@ -0,0 +1,77 @@
+from collections import OrderedDict
+from zlib import DEFLATED, MAX_WBITS, compressobj
+
+# content-coding: zlib window bits, in order of preference
+ENCODINGS = {"gzip": 16 + MAX_WBITS, "deflate": MAX_WBITS}
+MINIMUM_SIZE = 500
+_NEGOTIATED_SIZE = 64
+
+
+class Compressor:
+    """
+    Compressor compresses response bodies with gzip or deflate, negotiated on the `Accept-Encoding` header.
+
+    It can be set for the whole application (`YASGI(compression=Compressor())`) or for a route
+    (`Routing(..., compression=Compressor())`, `compression=False` disables it). Streamed responses are compressed chunk by chunk.
+
+    :param minimum_size: Bodies smaller than this size in bytes are sent uncompressed.
+    :param level: The zlib compression level.
+    :param cache_size: The number of compressed bodies kept, for responses which never change a hot body is compressed only once.
+    """
+
+    __slots__ = ("minimum_size", "level", "cache_size", "_cache", "_negotiated")
+
+    def __init__(
+        self, minimum_size: int = MINIMUM_SIZE, level: int = 6, cache_size: int = 0
+    ):
+        self.minimum_size = minimum_size
+        self.level = level
+        self.cache_size = cache_size
+        self._cache: OrderedDict = OrderedDict()
+        self._negotiated: dict = {}
+
+    def negotiate(self, accept_encoding: str):
+        """Returns the preferred supported content-coding of an `Accept-Encoding` header or `None`."""
+        if not accept_encoding:
+            return None
+        if accept_encoding in self._negotiated:
+            return self._negotiated[accept_encoding]
+        best, quality = None, 0.0
+        for item in accept_encoding.split(","):
+            name, _, params = item.partition(";")
+            name = name.strip().lower()
+            q = 1.0
+            for param in params.split(";"):
+                key, _, value = param.partition("=")
+                if key.strip().lower() == "q":
+                    try:
+                        q = float(value)
+                    except ValueError:
+                        q = 0.0
+            if name == "*":
+                name = next((n for n in ENCODINGS if n not in accept_encoding), None)
+            if name in ENCODINGS and q > quality:
+                best, quality = name, q
+        if len(self._negotiated) < _NEGOTIATED_SIZE:
+            self._negotiated[accept_encoding] = best
+        return best
+
+    def compress(self, body: bytes, coding: str) -> bytes:
+        if not self.cache_size:
+            return self._compress(body, coding)
+        key = (coding, body)
+        cached = self._cache.get(key)
+        if cached is not None:
+            self._cache.move_to_end(key)
+            return cached
+        cached = self._cache[key] = self._compress(body, coding)
+        if len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
+        return cached
+
+    def _compress(self, body: bytes, coding: str) -> bytes:
+        compressor = self.stream(coding)
+        return compressor.compress(body) + compressor.flush()
+
+    def stream(self, coding: str):
+        return compressobj(self.level, DEFLATED, ENCODINGS[coding])
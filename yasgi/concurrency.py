@@ -0,0 +1,168 @@
+from asyncio import TimeoutError, gather, get_running_loop, shield, wait_for
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from contextvars import ContextVar, copy_context
+from functools import partial
+from inspect import iscoroutinefunction
+from multiprocessing import get_context
+from os import cpu_count, getpid
+
+from yasgi.exceptions import HandlerTimeout
+
+MAX_THREADS = 40
+THREAD = "thread"
+PROCESS = "process"
+
+
+class ThreadPool:
+    """
+    ThreadPool runs blocking functions in threads, with the contextvars of the caller.
+    The threads are started on the first call and stopped by `shutdown`, a later call starts them again.
+
+    :param max_threads: The maximum number of threads.
+    """
+
+    __slots__ = ("max_threads", "_executor")
+
+    def __init__(self, max_threads: int = MAX_THREADS):
+        self.max_threads = max_threads
+        self._executor = None
+
+    async def run(self, fce, *args, **kwargs):
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(
+                self.max_threads, thread_name_prefix="yasgi"
+            )
+        context = copy_context()
+        return await get_running_loop().run_in_executor(
+            self._executor, partial(context.run, fce, *args, **kwargs)
+        )
+
+    def shutdown(self) -> None:
+        executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=True)
+
+
+class ProcessPool:
+    """
+    ProcessPool runs CPU bound handlers of process routes in worker processes, so they do not hold the GIL
+    of the event loop. The workers are started (warmed up) on the application startup or the first call.
+
+    Calls over `timeout` are answered with 504, the worker still runs them and is not free meanwhile.
+    When every worker is busy with timed out calls, the workers are terminated and the next call starts
+    new ones. A crashed worker breaks the pool, the failing calls raise and the next call starts new workers.
+
+    :param max_workers: The number of worker processes, the number of CPUs when not set.
+    :param timeout: The seconds a call may take, `None` for no limit.
+    :param initializer: Function called in every worker when it starts, e.g. to import heavy modules.
+    :param context: The multiprocessing start method (`fork`, `spawn`, `forkserver`), the platform default when not set.
+    """
+
+    __slots__ = (
+        "max_workers",
+        "timeout",
+        "initializer",
+        "context",
+        "_executor",
+        "_expired",
+    )
+
+    def __init__(
+        self,
+        max_workers: int = None,
+        timeout: float = None,
+        initializer=None,
+        context: str = None,
+    ):
+        self.max_workers = max_workers or cpu_count() or 1
+        self.timeout = timeout
+        self.initializer = initializer
+        self.context = context
+        self._executor = None
+        self._expired: set = set()
+
+    def _start(self) -> ProcessPoolExecutor:
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(
+                self.max_workers,
+                mp_context=get_context(self.context),
+                initializer=self.initializer,
+            )
+        return self._executor
+
+    async def start(self) -> list:
+        """Starts all workers, returns their pids."""
+        executor = self._start()
+        loop = get_running_loop()
+        pids = await gather(
+            *(loop.run_in_executor(executor, getpid) for _ in range(self.max_workers))
+        )
+        return sorted(set(pids))
+
+    async def run(self, fce, *args, **kwargs):
+        executor = self._start()
+        future = get_running_loop().run_in_executor(
+            executor, partial(fce, *args, **kwargs)
+        )
+        try:
+            return await wait_for(shield(future), self.timeout)
+        except TimeoutError:
+            self._expire(executor, future)
+            raise HandlerTimeout() from None
+        except BrokenProcessPool:
+            if self._executor is executor:
+                self._executor = None
+                executor.shutdown(wait=False)
+            raise
+
+    def _expire(self, executor: ProcessPoolExecutor, future) -> None:
+        """Keeps a timed out call until its worker finishes it, terminates the workers when all are taken."""
+        if future.done() or self._executor is not executor:
+            return
+        expired = self._expired
+        expired.add(future)
+
+        def finished(future):
+            expired.discard(future)
+            if not future.cancelled():
+                future.exception()
+
+        future.add_done_callback(finished)
+        if len(self._expired) >= self.max_workers:
+            self._executor = None
+            self._expired = set()
+            _terminate(executor)
+
+    def shutdown(self) -> None:
+        """Stops the workers without waiting for running calls, so it does not block the event loop."""
+        executor, self._executor = self._executor, None
+        self._expired = set()
+        if executor is not None:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+
+def _terminate(executor: ProcessPoolExecutor) -> None:
+    # the executor has no API to stop a busy worker
+    for process in list((executor._processes or {}).values()):
+        process.terminate()
+    executor.shutdown(wait=False, cancel_futures=True)
+
+
+# pool of applications without their own one
+THREADS = ThreadPool()
+_pool: ContextVar = ContextVar("yasgi_pool", default=THREADS)
+
+
+async def offload(fce, *args, **kwargs):
+    """
+    Runs a blocking function in the thread pool of the application handling the request
+    and returns its result, so the event loop keeps serving other requests meanwhile.
+    """
+    return await _pool.get().run(fce, *args, **kwargs)
+
+
+def is_async(fce) -> bool:
+    return iscoroutinefunction(fce) or iscoroutinefunction(
+        getattr(fce, "__call__", None)
+    )
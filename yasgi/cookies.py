@@ -0,0 +1,168 @@
+from base64 import urlsafe_b64decode, urlsafe_b64encode
+from hashlib import sha256
+from hmac import compare_digest
+from hmac import new as hmac_new
+from time import time
+
+from orjson import dumps, loads
+
+from yasgi.exceptions import SessionTooLarge
+
+
+def parse_cookies(value: str) -> dict:
+    """
+    Parses a `Cookie` header into a dict of plain str values (RFC 6265 section 5.4).
+
+    Pairs without `=` are skipped, surrounding double quotes are removed and the first
+    of repeated names wins, as browsers send the most specific cookie first.
+    """
+    cookies: dict = {}
+    for pair in value.split(";"):
+        name, eq, val = pair.partition("=")
+        if not eq:
+            continue
+        name = name.strip()
+        if not name or name in cookies:
+            continue
+        val = val.strip()
+        if len(val) > 1 and val[0] == '"' and val[-1] == '"':
+            val = val[1:-1]
+        cookies[name] = val
+    return cookies
+
+
+class Session(dict):
+    """Session is the dict of a cookie session, it remembers whether it was changed."""
+
+    __slots__ = ("modified", "new")
+
+    def __init__(self, data=None, new: bool = True):
+        super().__init__(data or {})
+        self.modified = False
+        self.new = new
+
+    def __setitem__(self, key, value):
+        self.modified = True
+        super().__setitem__(key, value)
+
+    def __delitem__(self, key):
+        self.modified = True
+        super().__delitem__(key)
+
+    def clear(self):
+        self.modified = True
+        super().clear()
+
+    def pop(self, *args):
+        self.modified = True
+        return super().pop(*args)
+
+    def popitem(self):
+        self.modified = True
+        return super().popitem()
+
+    def setdefault(self, key, default=None):
+        if key not in self:
+            self.modified = True
+        return super().setdefault(key, default)
+
+    def update(self, *args, **kwargs):
+        self.modified = True
+        super().update(*args, **kwargs)
+
+
+class CookieSessions:
+    """
+    CookieSessions keeps the session data in an HMAC-SHA256 signed cookie, so any worker holding
+    the secret reads it without a server side store. The data is readable by the client, only its integrity is protected.
+
+    The cookie is `<base64 json>.<issued at>.<signature>`, it is rejected when the signature does not match
+    or it is older than `max_age`. Only changed sessions are sent back, an emptied session deletes the cookie.
+
+    :param secret: The signing key.
+    :param cookie_name: The name of the cookie.
+    :param max_age: The lifetime in seconds, `None` for a browser session cookie.
+    :param max_size: The maximum size in bytes of the `name=value` pair, a changed session over it raises `SessionTooLarge`, answered with 500 without the cookie.
+    :param path: The `Path` of the cookie.
+    :param domain: The `Domain` of the cookie.
+    :param secure: Send the cookie over HTTPS only.
+    :param same_site: The `SameSite` of the cookie.
+    """
+
+    __slots__ = (
+        "cookie_name",
+        "max_age",
+        "max_size",
+        "path",
+        "domain",
+        "secure",
+        "same_site",
+        "_key",
+    )
+
+    def __init__(
+        self,
+        secret,
+        cookie_name: str = "session",
+        max_age: int = 14 * 24 * 3600,
+        max_size: int = 4096,
+        path: str = "/",
+        domain: str = None,
+        secure: bool = False,
+        same_site: str = "Lax",
+    ):
+        self._key = secret.encode() if type(secret) == str else secret
+        self.cookie_name = cookie_name
+        self.max_age = max_age
+        self.max_size = max_size
+        self.path = path
+        self.domain = domain
+        self.secure = secure
+        self.same_site = same_site
+
+    def _signature(self, message: bytes) -> bytes:
+        digest = hmac_new(self._key, message, sha256).digest()
+        return urlsafe_b64encode(digest).rstrip(b"=")
+
+    def sign(self, data: dict, issued: int = None) -> str:
+        payload = urlsafe_b64encode(dumps(data)).rstrip(b"=")
+        message = b"%s.%x" % (payload, int(time() if issued is None else issued))
+        return (message + b"." + self._signature(message)).decode()
+
+    def unsign(self, value: str):
+        """Returns the data of a signed value, `None` when it is invalid or expired."""
+        message, _, signature = value.encode().rpartition(b".")
+        if not message or not compare_digest(self._signature(message), signature):
+            return None
+        payload, _, issued = message.rpartition(b".")
+        try:
+            if self.max_age is not None and time() - int(issued, 16) > self.max_age:
+                return None
+            return loads(urlsafe_b64decode(payload + b"=" * (-len(payload) % 4)))
+        except ValueError:
+            return None
+
+    def load(self, cookies: dict) -> Session:
+        value = cookies.get(self.cookie_name)
+        data = value and self.unsign(value)
+        if type(data) != dict:
+            return Session(new=True)
+        return Session(data, new=False)
+
+    def save(self, response, session: Session) -> None:
+        """Sets the cookie of a changed session on the response."""
+        if not session.modified:
+            return
+        options = {"Path": self.path, "HttpOnly": True, "SameSite": self.same_site}
+        if self.domain:
+            options["Domain"] = self.domain
+        if self.secure:
+            options["Secure"] = True
+        if not session:
+            if not session.new:
+                response.set_cookie(self.cookie_name, "", maxAge="0", **options)
+            return
+        value = self.sign(session)
+        if len(self.cookie_name) + len(value) + 1 > self.max_size:
+            raise SessionTooLarge(f"Session cookie is over {self.max_size} bytes!")
+        response.set_cookie(self.cookie_name, value, maxAge=self.max_age, **options)
@@ -0,0 +1,217 @@
+from collections.abc import Mapping
+from urllib.parse import unquote_plus, urlencode
+
+from yasgi.exceptions import InputParseError
+
+_MISSING = object()
+
+
+class State:
+    """
+    State is a namespace for objects shared by the whole application, such as connection pools or caches.
+
+    It is set up in the lifespan hooks and reached from routes with `request.state`.
+    """
+
+    def __init__(self, **kwargs):
+        self.__dict__.update(kwargs)
+
+    def __repr__(self):
+        return f"State({self.__dict__!r})"
+
+
+class Headers(Mapping):
+    """
+    Headers is a read-only, case-insensitive mapping over the raw ASGI `(name, value)` header pairs.
+
+    The pairs are indexed by their lower case bytes name on the first lookup and values are decoded
+    only when read. Item access returns the first value of a repeated header, `getlist` all of them.
+
+    :param raw: The list of `(name, value)` bytes pairs of the scope.
+    :param exclude: The lower case bytes name of a header left out, e.g. `b"cookie"`.
+    """
+
+    __slots__ = ("_raw", "_exclude", "_index", "_content_length", "_content_type")
+
+    def __init__(self, raw: list, exclude: bytes = None):
+        self._raw = raw
+        self._exclude = exclude
+        self._index = None
+        self._content_length = _MISSING
+        self._content_type = None
+
+    def _values(self, name) -> list:
+        index = self._index
+        if index is None:
+            index = self._index = {}
+            for key, value in self._raw:
+                key = key.lower()
+                if key == self._exclude:
+                    continue
+                if key in index:
+                    index[key].append(value)
+                else:
+                    index[key] = [value]
+        return index.get(
+            name.lower().encode("latin-1") if type(name) == str else name.lower(), ()
+        )
+
+    def __getitem__(self, name) -> str:
+        values = self._values(name)
+        if not values:
+            raise KeyError(name)
+        return values[0].decode()
+
+    def get(self, name, default=None):
+        values = self._values(name)
+        return values[0].decode() if values else default
+
+    def getlist(self, name) -> list:
+        """Returns all values of a repeated header in the received order."""
+        return [value.decode() for value in self._values(name)]
+
+    def __contains__(self, name) -> bool:
+        return bool(self._values(name))
+
+    def __iter__(self):
+        self._values(b"")
+        return (name.decode() for name in self._index)
+
+    def __len__(self) -> int:
+        self._values(b"")
+        return len(self._index)
+
+    def __repr__(self):
+        return f"Headers({list(self.items())!r})"
+
+    @property
+    def raw(self) -> list:
+        return self._raw
+
+    @property
+    def content_length(self):
+        """The `content-length` as int, `None` when missing or invalid."""
+        if self._content_length is _MISSING:
+            values = self._values(b"content-length")
+            try:
+                self._content_length = int(values[0]) if values else None
+            except ValueError:
+                self._content_length = None
+        return self._content_length
+
+    @property
+    def content_type(self) -> str:
+        """The lower case media type of `content-type` without its parameters, `""` when missing."""
+        if self._content_type is None:
+            values = self._values(b"content-type")
+            self._content_type = (
+                values[0].partition(b";")[0].strip().lower().decode() if values else ""
+            )
+        return self._content_type
+
+
+class QueryParams(dict):
+    """
+    QueryParams is an immutable multi-dict of an `application/x-www-form-urlencoded` query string or body.
+
+    Keys and values are split on `&` and `=` first and percent-decoded one by one afterwards, `+` is decoded
+    as a space. Item access returns the first value of a repeated parameter, `getlist` all of them.
+    The typed accessors are cached per parameter and raise `InputParseError` (400) on invalid values.
+
+    :param query: The raw query string.
+    """
+
+    __slots__ = ("_lists", "_typed")
+
+    def __init__(self, query=b""):
+        super().__init__()
+        self._lists: dict = {}
+        self._typed: dict = {}
+        if type(query) == bytes:
+            query = query.decode("utf-8", "replace")
+        for item in query.split("&") if query else ():
+            if not item:
+                continue
+            key, _, value = item.partition("=")
+            if "%" in item or "+" in item:
+                key, value = unquote_plus(key), unquote_plus(value)
+            if key in self._lists:
+                self._lists[key].append(value)
+            else:
+                self._lists[key] = [value]
+                dict.__setitem__(self, key, value)
+
+    def _immutable(self, *args, **kwargs):
+        raise TypeError("QueryParams is immutable!")
+
+    __setitem__ = __delitem__ = _immutable
+    clear = pop = popitem = setdefault = update = __ior__ = _immutable
+
+    def __repr__(self):
+        return f"QueryParams({self.multi_items()!r})"
+
+    def __reduce__(self):
+        return QueryParams, (urlencode(self.multi_items()),)
+
+    def getlist(self, name: str) -> list:
+        """Returns all values of a repeated parameter in the received order."""
+        return list(self._lists.get(name, ()))
+
+    def multi_items(self) -> list:
+        return [(key, value) for key, values in self._lists.items() for value in values]
+
+    def get_int(self, name: str, default=None):
+        return self._typed_value(name, "int", _int, default)
+
+    def get_float(self, name: str, default=None):
+        return self._typed_value(name, "float", float, default)
+
+    def get_bool(self, name: str, default=None):
+        """`1`, `true`, `yes`, `on` are `True`, `0`, `false`, `no`, `off` and an empty value `False`."""
+        return self._typed_value(name, "bool", _bool, default)
+
+    def get_list(self, name: str, default=None) -> list:
+        """Returns the comma separated items of all values of the parameter, `?tag=a,b&tag=c` as `["a", "b", "c"]`."""
+        if name not in self._lists:
+            return default
+        key = (name, "list")
+        if key not in self._typed:
+            self._typed[key] = tuple(
+                item.strip()
+                for value in self._lists[name]
+                for item in value.split(",")
+                if item.strip()
+            )
+        return list(self._typed[key])
+
+    def _typed_value(self, name: str, kind: str, convert, default):
+        key = (name, kind)
+        if key in self._typed:
+            return self._typed[key]
+        value = dict.get(self, name)
+        if value is None:
+            return default
+        try:
+            result = self._typed[key] = convert(value)
+        except ValueError as e:
+            raise InputParseError(
+                e, message=f"Query parameter {name} is not {kind}!"
+            ) from e
+        return result
+
+
+_TRUE = frozenset(("1", "true", "yes", "on"))
+_FALSE = frozenset(("0", "false", "no", "off", ""))
+
+
+def _int(value: str) -> int:
+    return int(value.strip())
+
+
+def _bool(value: str) -> bool:
+    value = value.strip().lower()
+    if value in _TRUE:
+        return True
+    if value in _FALSE:
+        return False
+    raise ValueError(value)
@@ -16,3 +16,39 @@ class HTTPAbort(Exception):
     def __init__(self, message: str = "HTTP abort", status: int = 500):
         super().__init__(message)
         self.status = status
+
+
+class ClientDisconnect(Exception):
+    """Exception raised when the client disconnects while the body is read."""
+
+    def __init__(self, message: str = "Client disconnected"):
+        super().__init__(message)
+
+
+class RequestTooLarge(Exception):
+    """Exception raised when the request body is over the allowed size."""
+
+    def __init__(self, message: str = "Request body too large"):
+        super().__init__(message)
+
+
+class HandlerTimeout(Exception):
+    """Exception raised when a process route call is over the pool timeout, answered with 504."""
+
+    def __init__(self, message: str = "Handler timeout"):
+        super().__init__(message)
+
+
+class SessionTooLarge(Exception):
+    """Exception raised when a changed session cookie is over `max_size`, answered with 500 without the cookie."""
+
+    def __init__(self, message: str = "Session cookie too large"):
+        super().__init__(message)
+
+
+class ValidationError(Exception):
+    """Exception raised when the request does not match the route annotations, answered with 422."""
+
+    def __init__(self, errors: list, message: str = "Validation error"):
+        super().__init__(message)
+        self.errors = errors
@@ -0,0 +1,153 @@
+from asyncio import CancelledError, Queue, QueueFull, create_task
+
+from yasgi.codecs import CODECS
+
+DROP = "drop"
+DISCONNECT = "disconnect"
+
+
+class Connection:
+    """
+    Connection is the outbound side of a websocket, events are queued and sent by a writer task
+    so a slow client never blocks the sender.
+
+    Events of the route itself wait for room in the queue, broadcasts are offered without waiting
+    and a full queue applies the `policy`: `drop` the broadcast or `disconnect` the client (close code 1013).
+
+    :param send: The ASGI send callable.
+    :param queue_size: The maximum number of queued events.
+    :param policy: The slow consumer policy, `drop` or `disconnect`.
+    """
+
+    __slots__ = ("_send", "_queue", "_writer", "policy", "topics", "dropped", "closed")
+
+    def __init__(self, send, queue_size: int = 64, policy: str = DROP):
+        if policy not in (DROP, DISCONNECT):
+            raise RuntimeError(f"Unknown slow consumer policy! ({policy})")
+        self._send = send
+        self._queue: Queue = Queue(queue_size)
+        self._writer = create_task(self._write())
+        self.policy = policy
+        self.topics: set = set()
+        self.dropped = 0
+        self.closed = False
+
+    async def _write(self) -> None:
+        queue, send = self._queue, self._send
+        try:
+            while True:
+                await send(await queue.get())
+        except CancelledError:
+            pass
+        except Exception:
+            self.closed = True
+
+    async def send(self, event: dict) -> None:
+        if not self.closed:
+            await self._queue.put(event)
+
+    def offer(self, event: dict) -> bool:
+        """Queues a broadcast event without waiting, returns `False` when it was not queued."""
+        if self.closed:
+            return False
+        try:
+            self._queue.put_nowait(event)
+            return True
+        except QueueFull:
+            self.dropped += 1
+            if self.policy == DISCONNECT:
+                self.closed = True
+                self._writer.cancel()
+                # the close frame is sent by the task replacing the writer, so close() awaits it
+                self._writer = create_task(self._close_frame(1013))
+            return False
+
+    async def _close_frame(self, code: int) -> None:
+        try:
+            await self._send({"type": "websocket.close", "code": code})
+        except Exception:
+            pass
+
+    async def close(self) -> None:
+        """Stops the writer, queued events are discarded."""
+        self.closed = True
+        self._writer.cancel()
+        try:
+            await self._writer
+        except CancelledError:
+            pass
+
+
+class Hub:
+    """
+    Hub is a publish/subscribe registry of websocket connections by topic.
+
+    `publish` encodes the message once and queues the same event to every subscriber.
+
+    :param queue_size: The outbound queue size of every connection.
+    :param policy: The slow consumer policy of every connection, `drop` or `disconnect`.
+    :param codec: The `Codec` of published data, the one of the application content type when not set.
+    """
+
+    __slots__ = ("queue_size", "policy", "codec", "_topics")
+
+    def __init__(self, queue_size: int = 64, policy: str = DROP, codec=None):
+        if policy not in (DROP, DISCONNECT):
+            raise RuntimeError(f"Unknown slow consumer policy! ({policy})")
+        self.queue_size = queue_size
+        self.policy = policy
+        self.codec = codec
+        self._topics: dict = {}
+
+    def connection(self, send) -> Connection:
+        return Connection(send, self.queue_size, self.policy)
+
+    def subscribe(self, topic: str, connection: Connection) -> None:
+        self._topics.setdefault(topic, set()).add(connection)
+        connection.topics.add(topic)
+
+    def unsubscribe(self, topic: str, connection: Connection) -> None:
+        subscribers = self._topics.get(topic)
+        if subscribers is not None:
+            subscribers.discard(connection)
+            if not subscribers:
+                del self._topics[topic]
+        connection.topics.discard(topic)
+
+    def discard(self, connection: Connection) -> None:
+        """Unsubscribes a connection from all its topics."""
+        for topic in tuple(connection.topics):
+            self.unsubscribe(topic, connection)
+
+    def subscribers(self, topic: str) -> int:
+        return len(self._topics.get(topic, ()))
+
+    @property
+    def topics(self) -> list:
+        return list(self._topics)
+
+    def publish(self, topic: str, data) -> int:
+        """
+        Queues `data` to every subscriber of `topic` and returns the number of connections it was queued to.
+        `str` is sent as text, `bytes` as a binary message and other data is encoded by the `codec`
+        (JSON when not set) like `response.send` does.
+        """
+        subscribers = self._topics.get(topic)
+        if not subscribers:
+            return 0
+        if type(data) not in (str, bytes):
+            codec = self.codec or CODECS.get("application/json")
+            data = codec.encode(data)
+            if codec.text:
+                data = data.decode()
+        if type(data) == bytes:
+            event = {"type": "websocket.send", "bytes": data}
+        else:
+            event = {"type": "websocket.send", "text": data}
+        delivered = 0
+        for connection in tuple(subscribers):
+            if connection.offer(event):
+                delivered += 1
+            elif connection.closed:
+                self.discard(connection)
+        return delivered
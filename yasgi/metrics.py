@@ -0,0 +1,180 @@
+from bisect import bisect_left
+from time import perf_counter
+
+BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+UNMATCHED = "<unmatched>"
+_STATUSES = ("1xx", "2xx", "3xx", "4xx", "5xx")
+
+
+class Series:
+    """
+    Series holds the preallocated counters of one route template, recording a request
+    only increments them, no objects are created.
+
+    :param route: The route template label.
+    :param buckets: The upper bounds of the latency histogram in seconds.
+    """
+
+    __slots__ = (
+        "route",
+        "buckets",
+        "statuses",
+        "latency",
+        "latency_sum",
+        "request_bytes",
+        "response_bytes",
+        "in_flight",
+    )
+
+    def __init__(self, route: str, buckets: tuple = BUCKETS):
+        self.route = route
+        self.buckets = buckets
+        self.statuses = [0] * len(_STATUSES)
+        # the last one counts requests over the highest bound
+        self.latency = [0] * (len(buckets) + 1)
+        self.latency_sum = 0.0
+        self.request_bytes = 0
+        self.response_bytes = 0
+        self.in_flight = 0
+
+    @property
+    def count(self) -> int:
+        return sum(self.statuses)
+
+    def start(self) -> float:
+        self.in_flight += 1
+        return perf_counter()
+
+    def finish(self, started: float, recorder: "Recorder") -> None:
+        elapsed = perf_counter() - started
+        self.in_flight -= 1
+        status = recorder.status // 100 - 1
+        # requests failing before the response started count as 5xx
+        self.statuses[status if 0 <= status < 5 else 4] += 1
+        self.latency[bisect_left(self.buckets, elapsed)] += 1
+        self.latency_sum += elapsed
+        self.request_bytes += recorder.received
+        self.response_bytes += recorder.sent
+
+
+class Recorder:
+    """Recorder wraps the ASGI `receive` and `send` of a request counting the body bytes and keeping the status."""
+
+    __slots__ = ("_receive", "_send", "status", "received", "sent")
+
+    def __init__(self, receive, send):
+        self._receive = receive
+        self._send = send
+        self.status = 0
+        self.received = 0
+        self.sent = 0
+
+    async def receive(self) -> dict:
+        event = await self._receive()
+        if event["type"] == "http.request":
+            self.received += len(event.get("body", b""))
+        return event
+
+    async def send(self, event: dict) -> None:
+        if event["type"] == "http.response.body":
+            self.sent += len(event.get("body", b""))
+        elif event["type"] == "http.response.start":
+            self.status = event["status"]
+        await self._send(event)
+
+
+class Metrics:
+    """
+    Metrics records requests of every route by its template (not the raw path), unmatched requests share one series.
+    The series are exposed in the Prometheus text format on `path`.
+
+    :param path: The path of the metrics route, `None` to only call `render` yourself.
+    :param buckets: The upper bounds of the latency histogram in seconds.
+    :param prefix: The prefix of the metric names.
+    """
+
+    __slots__ = ("path", "buckets", "prefix", "unmatched", "_series")
+
+    def __init__(
+        self, path: str = "/metrics", buckets: tuple = BUCKETS, prefix: str = "yasgi"
+    ):
+        self.path = path
+        self.buckets = tuple(sorted(buckets))
+        self.prefix = prefix
+        self._series: dict = {}
+        self.unmatched = self.series(UNMATCHED)
+
+    def series(self, route: str) -> Series:
+        """Returns the series of a route template, created on the first call."""
+        series = self._series.get(route)
+        if series is None:
+            series = self._series[route] = Series(route, self.buckets)
+        return series
+
+    async def endpoint(self, request, response):
+        # the charset is part of CONTENT_TYPE
+        response.charset = None
+        return self.render().encode()
+
+    def render(self) -> str:
+        name = self.prefix
+        series = [
+            item for item in self._series.values() if item.count or item.in_flight
+        ]
+        lines = [
+            f"# HELP {name}_requests_total Requests by route template and status class.",
+            f"# TYPE {name}_requests_total counter",
+        ]
+        for item in series:
+            route = _escape(item.route)
+            for status, count in zip(_STATUSES, item.statuses):
+                if count:
+                    lines.append(
+                        f'{name}_requests_total{{route="{route}",status="{status}"}} {count}'
+                    )
+
+        lines.append(
+            f"# HELP {name}_request_duration_seconds Request latency by route template."
+        )
+        lines.append(f"# TYPE {name}_request_duration_seconds histogram")
+        for item in series:
+            route = _escape(item.route)
+            cumulative = 0
+            for bound, count in zip(self.buckets, item.latency):
+                cumulative += count
+                lines.append(
+                    f'{name}_request_duration_seconds_bucket{{route="{route}",le="{float(bound)}"}} {cumulative}'
+                )
+            count = item.count
+            lines.append(
+                f'{name}_request_duration_seconds_bucket{{route="{route}",le="+Inf"}} {count}'
+            )
+            lines.append(
+                f'{name}_request_duration_seconds_sum{{route="{route}"}} {item.latency_sum}'
+            )
+            lines.append(
+                f'{name}_request_duration_seconds_count{{route="{route}"}} {count}'
+            )
+
+        for metric, kind, help, attribute in (
+            ("request_bytes_total", "counter", "Request body bytes", "request_bytes"),
+            (
+                "response_bytes_total",
+                "counter",
+                "Response body bytes",
+                "response_bytes",
+            ),
+            ("requests_in_flight", "gauge", "Requests in progress", "in_flight"),
+        ):
+            lines.append(f"# HELP {name}_{metric} {help} by route template.")
+            lines.append(f"# TYPE {name}_{metric} {kind}")
+            for item in series:
+                lines.append(
+                    f'{name}_{metric}{{route="{_escape(item.route)}"}} {getattr(item, attribute)}'
+                )
+        return "\n".join(lines) + "\n"
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
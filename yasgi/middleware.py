@@ -0,0 +1,115 @@
+from functools import partial
+from inspect import Parameter, signature
+
+from yasgi.concurrency import PROCESS, THREAD
+
+ASGI = "asgi"
+HTTP = "http"
+
+_POSITIONAL = (Parameter.POSITIONAL_ONLY, Parameter.POSITIONAL_OR_KEYWORD)
+
+
+def kind(middleware) -> str:
+    """
+    Returns the style of a middleware from its required positional parameters:
+    `asgi` for factories taking the next ASGI application (`Middleware(app)`) and
+    `http` for `async (request, response, call_next)` functions.
+    """
+    try:
+        parameters = signature(middleware).parameters.values()
+    except (TypeError, ValueError):
+        parameters = ()
+    required = [
+        p for p in parameters if p.kind in _POSITIONAL and p.default is Parameter.empty
+    ]
+    if len(required) == 1:
+        return ASGI
+    if len(required) == 3:
+        return HTTP
+    raise RuntimeError(
+        f"Middleware must take `(app)` or `(request, response, call_next)`! ({middleware})"
+    )
+
+
+def split(middleware) -> tuple:
+    """Splits middleware into the `(asgi, http)` tuples, keeping their order."""
+    asgi, http = [], []
+    for item in middleware or ():
+        (asgi if kind(item) == ASGI else http).append(item)
+    return tuple(asgi), tuple(http)
+
+
+def build_asgi(middleware: tuple, app):
+    """Wraps an ASGI application, the first middleware is the outermost one."""
+    for factory in reversed(middleware):
+        app = factory(app)
+    return app
+
+
+def build_http(middleware: tuple, call):
+    """
+    Nests request/response middleware around the route `call(request, response, url_args)`,
+    the first middleware is the outermost one. Every middleware gets `call_next`, an awaitable
+    returning what the inner middleware or the route returned.
+    """
+    for item in reversed(middleware):
+        call = _link(item, call)
+    return call
+
+
+def _link(middleware, call):
+    async def link(request, response, url_args):
+        return await middleware(
+            request, response, partial(call, request, response, url_args)
+        )
+
+    return link
+
+
+def endpoint(route, threads, processes=None):
+    """
+    Returns the innermost call of a route, reading the body and running the validator and handler,
+    plain function handlers in the `threads` or `processes` pool and under the route `semaphore` when it has one.
+    A route with a `cache` answers GET/HEAD requests from it.
+    """
+    handler, validator, stream = route.handler, route.validator, route.stream
+    if route.executor == THREAD:
+        handler = partial(threads.run, handler)
+    elif route.executor == PROCESS:
+        handler = _detached(processes, handler)
+    if route.semaphore is not None:
+        handler = _bounded(route.semaphore, handler)
+
+    if validator is None:
+
+        async def call(request, response, url_args):
+            if not stream:
+                await request.body()
+            return await handler(request, response, *url_args)
+
+    else:
+
+        async def call(request, response, url_args):
+            if not stream:
+                await request.body()
+            args, kwargs = validator(request, url_args)
+            return await handler(request, response, *args, **kwargs)
+
+    if route.cache is not None:
+        return route.cache.wrap(call, route.static)
+    return call
+
+
+def _detached(pool, handler):
+    async def detached(request, response, *args, **kwargs):
+        return await pool.run(handler, request.detach(), *args, **kwargs)
+
+    return detached
+
+
+def _bounded(semaphore, handler):
+    async def bounded(*args, **kwargs):
+        async with semaphore:
+            return await handler(*args, **kwargs)
+
+    return bounded
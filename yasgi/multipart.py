@@ -0,0 +1,190 @@
+from re import compile
+from tempfile import SpooledTemporaryFile
+
+SPOOL_MAX_SIZE = 1024 * 1024
+MAX_HEADER_SIZE = 16 * 1024
+
+_OPTION = compile(r';\s*([\w\-*]+)\s*=\s*(?:"((?:[^"\\]|\\.)*)"|([^;]*))')
+_PREAMBLE, _HEADERS, _BODY, _END = range(4)
+
+
+def parse_options(value: str) -> tuple:
+    """Splits a header value such as `form-data; name="file"` into `("form-data", {"name": "file"})`."""
+    main, _, rest = value.partition(";")
+    options = {}
+    for match in _OPTION.finditer(f";{rest}"):
+        quoted, plain = match.group(2), match.group(3)
+        options[match.group(1).lower()] = (
+            quoted.replace('\\"', '"') if quoted is not None else plain.strip()
+        )
+    return main.strip().lower(), options
+
+
+class UploadFile:
+    """
+    UploadFile is a file part of a multipart/form-data body.
+
+    The content is kept in memory until it grows over `spool_max_size`, then it is spooled to a temporary file.
+
+    :param filename: The filename sent by the client.
+    :param content_type: The content type of the part.
+    :param headers: The part headers.
+    :param spool_max_size: The size in bytes kept in memory.
+    """
+
+    __slots__ = ("filename", "content_type", "headers", "size", "file")
+
+    def __init__(
+        self, filename, content_type, headers=None, spool_max_size=SPOOL_MAX_SIZE
+    ):
+        self.filename = filename
+        self.content_type = content_type
+        self.headers = headers or {}
+        self.size = 0
+        self.file = SpooledTemporaryFile(max_size=spool_max_size)
+
+    def write(self, data: bytes) -> None:
+        self.size += len(data)
+        self.file.write(data)
+
+    def read(self, size: int = -1) -> bytes:
+        return self.file.read(size)
+
+    def seek(self, offset: int) -> None:
+        self.file.seek(offset)
+
+    def close(self) -> None:
+        self.file.close()
+
+    def __repr__(self):
+        return f"UploadFile(filename={self.filename!r}, content_type={self.content_type!r}, size={self.size})"
+
+
+class MultipartParser:
+    """
+    MultipartParser is an incremental multipart/form-data parser.
+
+    Chunks are passed to `feed` as they arrive, so the body never has to be held in memory at once.
+    Fields are collected as bytes, parts with a filename become `UploadFile` objects.
+
+    :param boundary: The boundary from the content type.
+    :param spool_max_size: The size in bytes of a file part kept in memory.
+    """
+
+    __slots__ = (
+        "_boundary",
+        "_delimiter",
+        "_buffer",
+        "_state",
+        "_part",
+        "_name",
+        "_spool_max_size",
+        "data",
+    )
+
+    def __init__(self, boundary: bytes, spool_max_size: int = SPOOL_MAX_SIZE):
+        self._boundary = b"--" + boundary
+        self._delimiter = b"\r\n--" + boundary
+        self._buffer = bytearray()
+        self._state = _PREAMBLE
+        self._part = None
+        self._name = None
+        self._spool_max_size = spool_max_size
+        self.data: dict = {}
+
+    @classmethod
+    def from_content_type(cls, content_type: str, spool_max_size=SPOOL_MAX_SIZE):
+        kind, options = parse_options(content_type)
+        if kind != "multipart/form-data" or not options.get("boundary"):
+            raise ValueError(f"Invalid multipart content type! ({content_type})")
+        return cls(options["boundary"].encode("latin-1"), spool_max_size)
+
+    def feed(self, data: bytes) -> None:
+        buffer = self._buffer
+        buffer += data
+        while True:
+            if self._state == _BODY:
+                delimiter = self._delimiter
+                index = buffer.find(delimiter)
+                if index < 0:
+                    # the tail may hold the beginning of the delimiter
+                    safe = len(buffer) - len(delimiter) + 1
+                    if safe > 0:
+                        self._write(buffer[:safe])
+                        del buffer[:safe]
+                    return
+                end = index + len(delimiter)
+                if len(buffer) < end + 2:
+                    if index:
+                        self._write(buffer[:index])
+                        del buffer[:index]
+                    return
+                self._write(buffer[:index])
+                self._finish()
+                if buffer[end : end + 2] == b"--":
+                    self._state = _END
+                else:
+                    self._state = _HEADERS
+                del buffer[: end + 2]
+            elif self._state == _HEADERS:
+                if buffer[:2] == b"\r\n":
+                    self._start(b"")
+                    del buffer[:2]
+                    continue
+                index = buffer.find(b"\r\n\r\n")
+                if index < 0:
+                    if len(buffer) > MAX_HEADER_SIZE:
+                        raise ValueError("Multipart part headers are too large!")
+                    return
+                self._start(bytes(buffer[:index]))
+                del buffer[: index + 4]
+            elif self._state == _PREAMBLE:
+                index = buffer.find(self._boundary)
+                if index < 0:
+                    del buffer[: max(0, len(buffer) - len(self._boundary))]
+                    return
+                end = index + len(self._boundary)
+                if len(buffer) < end + 2:
+                    return
+                self._state = _END if buffer[end : end + 2] == b"--" else _HEADERS
+                del buffer[: end + 2]
+            else:
+                buffer.clear()
+                return
+
+    def close(self) -> dict:
+        if self._state != _END:
+            raise ValueError("Multipart body is incomplete!")
+        for value in self.data.values():
+            if type(value) == UploadFile:
+                value.seek(0)
+        return self.data
+
+    def _start(self, raw: bytes) -> None:
+        headers = {}
+        for line in raw.decode("latin-1").split("\r\n"):
+            name, _, value = line.partition(":")
+            headers[name.strip().lower()] = value.strip()
+        _, options = parse_options(headers.get("content-disposition", ""))
+        self._name = options.get("name", "")
+        if "filename" in options:
+            self._part = UploadFile(
+                options["filename"],
+                headers.get("content-type", "application/octet-stream"),
+                headers,
+                self._spool_max_size,
+            )
+        else:
+            self._part = bytearray()
+        self._state = _BODY
+
+    def _write(self, data) -> None:
+        if type(self._part) == bytearray:
+            self._part += data
+        else:
+            self._part.write(data)
+
+    def _finish(self) -> None:
+        part = self._part
+        self.data[self._name] = bytes(part) if type(part) == bytearray else part
+        self._part = None
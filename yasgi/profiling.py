@@ -0,0 +1,186 @@
+import tracemalloc
+from collections import deque
+from cProfile import Profile
+from hmac import compare_digest
+from io import StringIO
+from marshal import dumps as marshal_dumps
+from os import makedirs, path
+from pstats import Stats
+from random import random
+from re import sub
+from time import perf_counter, time
+
+from yasgi.concurrency import offload
+
+
+class Profiler:
+    """
+    Profiler runs the route call of sampled requests under cProfile (and optionally tracemalloc)
+    and aggregates the profiles by route template. Requests are sampled with the probability `rate`
+    or when they carry `header` with the `token` value. One request is profiled at a time,
+    requests arriving meanwhile are not sampled.
+
+    cProfile follows the thread, so calls of other requests running while a sampled one awaits
+    are included in its profile.
+
+    :param rate: The probability a request is profiled, `0` for trigger header only.
+    :param header: The name of the trigger header.
+    :param token: The value of the trigger header, also required by the admin route. `None` disables the trigger.
+    :param memory: Trace allocations of sampled requests with tracemalloc.
+    :param directory: The directory aggregated profiles are written to, `<route>.prof` files readable by `pstats`.
+    :param ring_size: The number of recent samples kept in memory.
+    :param path: The path of the admin route returning the profiles, `None` to not register it.
+    :param limit: The number of functions and allocation lines in the reports.
+    """
+
+    __slots__ = (
+        "rate",
+        "header",
+        "token",
+        "memory",
+        "directory",
+        "path",
+        "limit",
+        "ring",
+        "_routes",
+        "_active",
+    )
+
+    def __init__(
+        self,
+        rate: float = 0.0,
+        header: str = "x-profile",
+        token: str = None,
+        memory: bool = False,
+        directory: str = None,
+        ring_size: int = 32,
+        path: str = None,
+        limit: int = 30,
+    ):
+        if path is not None and token is None:
+            raise RuntimeError("Profiler admin route requires a token!")
+        if directory is not None:
+            makedirs(directory, exist_ok=True)
+        self.rate = rate
+        self.header = header.lower()
+        self.token = token
+        self.memory = memory
+        self.directory = directory
+        self.path = path
+        self.limit = limit
+        self.ring: deque = deque(maxlen=ring_size)
+        self._routes: dict = {}
+        self._active = False
+
+    def sample(self, request) -> bool:
+        if self._active:
+            return False
+        if self.rate and random() < self.rate:
+            return True
+        return self.token is not None and self._trusted(request)
+
+    def _trusted(self, request) -> bool:
+        value = request.headers.get(self.header)
+        return value is not None and compare_digest(value.encode(), self.token.encode())
+
+    async def run(self, route, request, response, url_args):
+        """Runs the route call of a request under the profiler, returning what the route returned."""
+        profile = Profile()
+        tracing = self.memory and not tracemalloc.is_tracing()
+        if tracing:
+            tracemalloc.start()
+        elif self.memory:
+            tracemalloc.reset_peak()
+        self._active = True
+        started = perf_counter()
+        profile.enable()
+        try:
+            return await route.call(request, response, url_args)
+        finally:
+            profile.disable()
+            duration = perf_counter() - started
+            memory = self._memory(tracing) if self.memory else None
+            try:
+                data = self._record(route.path, profile, duration, memory)
+                if data is not None:
+                    await offload(_write, self.file(route.path), data)
+            finally:
+                self._active = False
+
+    def _memory(self, tracing: bool) -> dict:
+        peak = tracemalloc.get_traced_memory()[1]
+        snapshot = tracemalloc.take_snapshot()
+        if tracing:
+            tracemalloc.stop()
+        lines = snapshot.statistics("lineno")[: self.limit]
+        return {"peak": peak, "top": [str(line) for line in lines]}
+
+    def _record(self, route: str, profile: Profile, duration: float, memory):
+        """Aggregates a profile, returns the marshaled stats of the route when they are written to `directory`."""
+        stats = Stats(profile)
+        aggregated = self._routes.get(route)
+        if aggregated is None:
+            aggregated = self._routes[route] = [0, Stats(profile)]
+        else:
+            aggregated[1].add(stats)
+        aggregated[0] += 1
+        self.ring.append(
+            {
+                "route": route,
+                "time": time(),
+                "duration": duration,
+                "profile": self._text(stats),
+                "memory": memory,
+            }
+        )
+        if self.directory is not None:
+            return marshal_dumps(aggregated[1].stats)
+        return None
+
+    def _text(self, stats: Stats) -> str:
+        stream = StringIO()
+        stats.stream = stream
+        stats.sort_stats("cumulative").print_stats(self.limit)
+        return stream.getvalue()
+
+    def file(self, route: str) -> str:
+        """Returns the file the aggregated profile of a route is written to."""
+        name = sub(r"[^A-Za-z0-9]+", "_", route).strip("_") or "root"
+        return path.join(self.directory, f"{name}.prof")
+
+    def report(self, route: str = None):
+        """
+        Returns the aggregated profiles as text by route with the recent samples,
+        or the marshaled `pstats` data of one route (as written by `dump_stats`).
+        """
+        if route is not None:
+            aggregated = self._routes.get(route)
+            if aggregated is None:
+                return None
+            return marshal_dumps(aggregated[1].stats)
+        return {
+            "routes": {
+                route: {"samples": samples, "profile": self._text(stats)}
+                for route, (samples, stats) in self._routes.items()
+            },
+            "recent": list(self.ring),
+        }
+
+    async def endpoint(self, request, response):
+        if not self._trusted(request):
+            await response.abort(status=403)
+        route = request.query_params.get("route")
+        if route is None:
+            return self.report()
+        data = self.report(route)
+        if data is None:
+            await response.abort(status=404)
+        response._type = "application/octet-stream"
+        response.charset = None
+        return data
+
+
+def _write(file: str, data: bytes) -> None:
+    # the same format as `Stats.dump_stats`, written off the event loop
+    with open(file, "wb") as stream:
+        stream.write(data)
@@ -0,0 +1,96 @@
+from collections import OrderedDict
+from math import ceil
+from time import monotonic
+
+EXPIRE_STEPS = 2
+
+
+class RateLimit:
+    """
+    RateLimit allows `rate` requests per `per` seconds with bursts of `burst` requests for every key,
+    implemented as GCRA: a key only stores the time its bucket is empty again (theoretical arrival time),
+    so a check is O(1).
+
+    Keys are kept in the order of their last request, every check drops up to two idle keys
+    (full buckets) from the front, and the oldest ones over `maxsize`, so memory follows
+    the number of recently active clients.
+
+    :param rate: The number of requests per `per` seconds.
+    :param per: The period in seconds.
+    :param burst: The number of requests allowed at once, `rate` when not set.
+    :param header: The request header keying the limit, the client address when not set or missing.
+    :param forwarded: Key by the last address of `X-Forwarded-For`, set by a trusted proxy, instead of the client address.
+    :param maxsize: The maximum number of stored keys.
+    """
+
+    __slots__ = (
+        "rate",
+        "per",
+        "burst",
+        "header",
+        "forwarded",
+        "maxsize",
+        "_interval",
+        "_tolerance",
+        "_keys",
+    )
+
+    def __init__(
+        self,
+        rate: float,
+        per: float = 1.0,
+        burst: int = None,
+        header: str = None,
+        forwarded: bool = False,
+        maxsize: int = 1000000,
+    ):
+        if rate <= 0 or per <= 0:
+            raise RuntimeError("Rate limit must be positive!")
+        self.rate = rate
+        self.per = per
+        self.burst = max(int(burst or rate), 1)
+        self.header = header and header.lower()
+        self.forwarded = forwarded
+        self.maxsize = maxsize
+        self._interval = per / rate
+        self._tolerance = self._interval * (self.burst - 1)
+        self._keys: OrderedDict = OrderedDict()
+
+    def __len__(self):
+        return len(self._keys)
+
+    def key(self, request) -> str:
+        if self.header is not None:
+            value = request.headers.get(self.header)
+            if value is not None:
+                return value
+        if self.forwarded:
+            value = request.headers.get("x-forwarded-for")
+            if value:
+                return value.rpartition(",")[2].strip()
+        client = request.scope.get("client")
+        return client[0] if client else ""
+
+    def hit(self, key: str, now: float = None) -> float:
+        """Counts a request of `key`, returns `0` when it is allowed or the seconds until it would be."""
+        if now is None:
+            now = monotonic()
+        keys = self._keys
+        tat = keys.get(key)
+        if tat is None or tat < now:
+            tat = now
+        if tat - now > self._tolerance:
+            return tat - self._tolerance - now
+        keys[key] = tat + self._interval
+        keys.move_to_end(key)
+        for _ in range(EXPIRE_STEPS):
+            oldest = next(iter(keys))
+            if keys[oldest] > now and len(keys) <= self.maxsize:
+                break
+            del keys[oldest]
+        return 0
+
+    def check(self, request) -> int:
+        """Returns `0` when the request is allowed, the `Retry-After` seconds otherwise."""
+        wait = self.hit(self.key(request))
+        return ceil(wait) if wait else 0
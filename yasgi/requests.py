@@ -1,11 +1,22 @@
-from copy import copy
-from email.parser import BytesParser as BP
-from http.cookies import SimpleCookie
-from urllib.parse import unquote
+from yasgi.codecs import CODECS, Codecs
+from yasgi.cookies import Session, parse_cookies
+from yasgi.datastructures import Headers, QueryParams
+from yasgi.exceptions import ClientDisconnect, InputParseError, RequestTooLarge
+from yasgi.multipart import SPOOL_MAX_SIZE, MultipartParser
 
-from orjson import loads
-
-from yasgi.exceptions import InputParseError
+# scope keys kept by `HTTPRequest.detach`
+_DETACHED = (
+    "type",
+    "http_version",
+    "method",
+    "scheme",
+    "path",
+    "root_path",
+    "query_string",
+    "headers",
+    "client",
+    "server",
+)
 
 
 class Request:
@@ -34,21 +45,10 @@ class Request:
         self._headers = None
         self._data = None
 
-    @staticmethod
-    def _parse(data: bytes) -> dict:
-        if not data:
-            return {}
-        parsed: dict = {}
-        for item in unquote(data.decode()).split("&"):
-            pair = item.split("=") + [""]
-            if pair[0] in parsed:
-                if type(parsed[pair[0]]) == list:
-                    parsed[pair[0]].append(pair[1])
-                else:
-                    parsed[pair[0]] = [parsed[pair[0]], pair[1]]
-            else:
-                parsed[pair[0]] = pair[1]
-        return parsed
+    def _next(self, event) -> None:
+        """Reuses the request for the next websocket message."""
+        self._event = event
+        self._data = None
 
     @property
     def scope(self):
@@ -58,30 +58,42 @@ class Request:
     def event(self):
         return self._event
 
+    @property
+    def app(self):
+        return self._scope.get("app")
+
+    @property
+    def codecs(self) -> Codecs:
+        app = self._scope.get("app")
+        return CODECS if app is None else app.codecs
+
+    @property
+    def state(self):
+        return self._scope["app"].state
+
     @property
     def path(self):
         return self._scope["path"]
 
     @property
-    def query_params(self):
+    def query_params(self) -> QueryParams:
         if self._query_string is None:
-            self._query_string = self._parse(self._scope["query_string"])
-        return copy(self._query_string)
+            self._query_string = QueryParams(self._scope["query_string"])
+        return self._query_string
 
     @property
-    def headers(self):
+    def headers(self) -> Headers:
         if self._headers is None:
-            self._headers = {}
-            for header, value in self._scope["headers"]:
-                self._headers[header.decode()] = value.decode()
-        return copy(self._headers)
+            self._headers = Headers(self._scope["headers"])
+        return self._headers
 
     @property
     def data(self):
         if self._data is None:
-            if self._type[:16] == "application/json":
+            codec = self.codecs.get(self._type)
+            if codec is not None:
                 try:
-                    self._data = loads(
+                    self._data = codec.decode(
                         self._event.get("bytes") or self._event.get("text").encode()
                     )
 
@@ -109,63 +121,180 @@ class HTTPRequest(Request):
         "_version",
         "_method",
         "_cookies",
+        "_session",
+        "_receive",
+        "_consumed",
+        "_complete",
+        "_spool_max_size",
+        "_max_body_size",
     )
 
-    def __init__(self, scope, event):
+    def __init__(
+        self,
+        scope,
+        event,
+        receive=None,
+        spool_max_size=SPOOL_MAX_SIZE,
+        max_body_size: int = None,
+    ):
         super().__init__(scope, event, "")
         self._cookies = None
+        self._session = None
+        self._receive = receive
+        self._consumed = False
+        self._complete = event is not None
+        self._spool_max_size = spool_max_size
+        self._max_body_size = max_body_size
+
+    @property
+    def complete(self) -> bool:
+        return self._complete
+
+    @property
+    def max_body_size(self):
+        return self._max_body_size
+
+    @property
+    def too_large(self) -> bool:
+        """The `content-length` is over `max_body_size`, checked before the body is read."""
+        limit = self._max_body_size
+        return limit is not None and (self.headers.content_length or 0) > limit
+
+    async def stream(self):
+        """
+        Async iterator over the body chunks as they arrive from `receive`,
+        the body is not kept in memory so it can be consumed only once.
+        `RequestTooLarge` is raised as soon as more than `max_body_size` bytes were received.
+        """
+        if self._event is not None:
+            if self._event["body"]:
+                yield self._event["body"]
+            return
+        if self._consumed or self._receive is None:
+            raise RuntimeError("Request body was already consumed!")
+        self._consumed = True
+        limit, received = self._max_body_size, 0
+        while True:
+            event = await self._receive()
+            if event["type"] == "http.disconnect":
+                raise ClientDisconnect()
+            if event.get("body"):
+                received += len(event["body"])
+                if limit is not None and received > limit:
+                    raise RequestTooLarge()
+                yield event["body"]
+            if not event.get("more_body", False):
+                self._complete = True
+                break
+
+    async def wait_disconnect(self) -> None:
+        """Waits until the client disconnects, the body has to be received completely first."""
+        if not self._complete or self._receive is None:
+            raise RuntimeError("Request body was not received yet!")
+        while (await self._receive())["type"] != "http.disconnect":
+            pass
+
+    def detach(self) -> "HTTPRequest":
+        """
+        Returns a picklable copy of a read request for process routes, holding the method, path, query, headers and body.
+        It has no application, so its `data` is decoded by the default codecs.
+        """
+        scope = {key: self._scope[key] for key in _DETACHED if key in self._scope}
+        return HTTPRequest(scope, self._event, spool_max_size=self._spool_max_size)
+
+    def __reduce__(self):
+        if self._receive is not None or "app" in self._scope:
+            raise TypeError("Only detached requests can be pickled!")
+        return HTTPRequest, (self._scope, self._event, None, self._spool_max_size)
+
+    async def body(self) -> bytes:
+        if self._event is None:
+            chunks = [chunk async for chunk in self.stream()]
+            self._event = {
+                "type": "http.request",
+                "body": chunks[0] if len(chunks) == 1 else b"".join(chunks),
+                "more_body": False,
+            }
+        return self._event["body"]
+
+    async def form(self):
+        """
+        Parses the body like `data`, multipart/form-data bodies are parsed chunk by chunk
+        while they are streamed, file parts over `spool_max_size` are spooled to disk.
+        """
+        if self._data is None and self._event is None:
+            if self.headers.content_type == "multipart/form-data":
+                try:
+                    parser = MultipartParser.from_content_type(
+                        self.headers["content-type"], self._spool_max_size
+                    )
+                    async for chunk in self.stream():
+                        parser.feed(chunk)
+                    self._data = parser.close()
+                except ValueError as e:
+                    raise InputParseError(e) from e
+            else:
+                await self.body()
+        return self.data
 
     @property
     def method(self):
         return self._scope["method"]
 
     @property
-    def cookies(self):
+    def cookies(self) -> dict:
         if self._cookies is None:
-            cookie: SimpleCookie = SimpleCookie()
-            for header, value in self._scope["headers"]:
-                if header.lower() == b"cookie":
-                    cookie.load(value.decode())
-            self._cookies = dict(cookie.items())
-        return copy(self._cookies)
+            values = [
+                value.decode()
+                for header, value in self._scope["headers"]
+                if header.lower() == b"cookie"
+            ]
+            self._cookies = parse_cookies("; ".join(values)) if values else {}
+        return self._cookies
+
+    @property
+    def session(self) -> Session:
+        """The session of the application `CookieSessions`, loaded from the request cookie on first access."""
+        if self._session is None:
+            sessions = self.app.sessions if self.app is not None else None
+            if sessions is None:
+                raise RuntimeError("Application has no `sessions` set!")
+            self._session = sessions.load(self.cookies)
+        return self._session
 
     @property
-    def headers(self):
+    def session_modified(self) -> bool:
+        return self._session is not None and self._session.modified
+
+    @property
+    def headers(self) -> Headers:
         if self._headers is None:
-            self._headers = {}
-            for header, value in self._scope["headers"]:
-                if header.lower() != b"cookie":
-                    self._headers[header.decode()] = value.decode()
-        return copy(self._headers)
+            self._headers = Headers(self._scope["headers"], exclude=b"cookie")
+        return self._headers
 
     @property
     def data(self):
         if self._data is None:
+            if self._event is None:
+                raise RuntimeError(
+                    "Request body is streamed, read it with `await request.body()` first!"
+                )
+            headers = self.headers
             try:
-                if not int(self.headers["content-length"]):
+                if not self._event["body"]:
                     self._data = {}
-                elif self._headers["content-type"][:16] == "application/json":
-                    self._data = loads(self._event["body"])
-                elif (
-                    self._headers["content-type"] == "application/x-www-form-urlencoded"
-                ):
-                    self._data = self._parse(self._event["body"])
-                elif self._headers["content-type"][:19] == "multipart/form-data":
-                    m = BP().parsebytes(
-                        (
-                            b"Content-Type: "
-                            + self._headers["content-type"].encode()
-                            + b"\n"
-                        )
-                        + self._event["body"]
+                elif headers.content_type in self.codecs:
+                    self._data = self.codecs.get(headers.content_type).decode(
+                        self._event["body"]
                     )
-
-                    self._data = {
-                        p.get_param(
-                            "name", header="content-disposition"
-                        ): p.get_payload(decode=True)
-                        for p in m.get_payload()
-                    }
+                elif headers.content_type == "application/x-www-form-urlencoded":
+                    self._data = QueryParams(self._event["body"])
+                elif headers.content_type == "multipart/form-data":
+                    parser = MultipartParser.from_content_type(
+                        headers["content-type"], self._spool_max_size
+                    )
+                    parser.feed(self._event["body"])
+                    self._data = parser.close()
 
                 else:
                     self._data = self._event["body"]
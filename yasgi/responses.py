@@ -1,8 +1,47 @@
+from asyncio import CancelledError, create_task
 from datetime import datetime
+from email.utils import formatdate, parsedate_to_datetime
+from hashlib import blake2b
+from inspect import isasyncgen
+from mimetypes import guess_type
+from mmap import ACCESS_READ, mmap
+from os import path as os_path
+from os import stat
+from secrets import token_hex
+from stat import S_ISREG
+from zlib import Z_FINISH, Z_SYNC_FLUSH
 
-from orjson import dumps
+from yasgi.codecs import CODECS
+from yasgi.exceptions import ClientDisconnect, HTTPAbort
 
-from yasgi.exceptions import HTTPAbort
+BUFFER_SIZE = 64 * 1024
+CHUNK_SIZE = 256 * 1024
+MAX_RANGES = 16
+
+
+class HeaderTemplate:
+    """
+    HeaderTemplate holds the encoded default headers of a content type, built once per route
+    and copied for every response instead of encoding them again.
+
+    :param content_type: The content type of the responses.
+    :param charset: The charset appended to text and application content types.
+    :param allow: The `Access-Control-Allow-Origin` value.
+    """
+
+    __slots__ = ("content_type", "charset", "headers", "content_header")
+
+    def __init__(self, content_type: str, charset: str, allow: str):
+        self.content_type = content_type
+        self.charset = charset
+        self.headers = [(b"Access-Control-Allow-Origin", allow.encode())]
+        self.content_header = _content_header(content_type, charset)
+
+
+def _content_header(content_type: str, charset: str) -> tuple:
+    if charset and (content_type[:4] == "text" or content_type[:11] == "application"):
+        content_type = f"{content_type};charset={charset}"
+    return (b"Content-Type", content_type.encode())
 
 
 class Response:
@@ -14,21 +53,32 @@ class Response:
     send, an awaitable that lets you send events to the client, and receive, an awaitable which lets you receive events from the client.
     """
 
-    __slots__ = ("_send", "_type", "_redirect", "charset")
+    __slots__ = ("_send", "_type", "_redirect", "_codec", "charset", "connection")
 
     def __init__(
-        self, send, content_type="application/json", charset="UTF-8", allow=None
+        self,
+        send,
+        content_type="application/json",
+        charset="UTF-8",
+        allow=None,
+        connection=None,
+        codec=None,
     ):
         self._redirect = False
         self._send = send
         self._type = content_type
+        self._codec = codec if codec is not None else CODECS.get(content_type)
         self.charset = charset
+        self.connection = connection
 
     async def send(self, data):
-        if self._type == "application/json" and type(data) in (list, dict):
-            data = dumps(data).decode()
+        codec = self._codec
+        if codec is not None and type(data) not in (str, bytes):
+            data = codec.encode(data)
+            if codec.text:
+                data = data.decode()
         if type(data) == bytes:
-            await self._send({"type": "websocket.send", "body": data})
+            await self._send({"type": "websocket.send", "bytes": data})
         else:
             await self._send({"type": "websocket.send", "text": data})
 
@@ -37,49 +87,269 @@ class Response:
         return self._type
 
 
+def etag_matches(if_none_match: str, etag: str) -> bool:
+    """Returns `True` when an `If-None-Match` header matches the `etag`, compared weakly."""
+    etag = etag[2:] if etag[:2] == "W/" else etag
+    return if_none_match.strip() == "*" or any(
+        (tag.strip()[2:] if tag.strip()[:2] == "W/" else tag.strip()) == etag
+        for tag in if_none_match.split(",")
+    )
+
+
 class HTTPResponse(Response):
     """
     HTTPResponse works on client server model. Usually the web browser is the client and the computer hosting the website is the server. Upon receiving a request from client the server generates a response and sends it back to the client in certain format.
+
+    Besides returning the whole body, a route can stream it, either by returning a sync/async generator
+    or by calling `send` for every chunk. Chunks are combined up to `buffer_size` bytes and sent with `more_body`,
+    the stream stops as soon as the client disconnects. With a `compressor` the body is compressed
+    when the client accepts it. With `etag` an `ETag` is generated from the encoded body and matching
+    conditional requests get a 304, HEAD requests are answered without the body.
+    A `template` of the route provides the encoded default headers, data other than str and bytes
+    is encoded by the `codec` of the content type.
     """
 
-    __slots__ = ["_processed", "_headers", "_allow"]
+    __slots__ = [
+        "_processed",
+        "_headers",
+        "_allow",
+        "_request",
+        "_started",
+        "_buffer",
+        "_buffered",
+        "_buffer_size",
+        "_watcher",
+        "_disconnected",
+        "_status",
+        "_compressor",
+        "_zlib",
+        "_head",
+        "_etag",
+        "_not_modified",
+        "_template",
+    ]
 
-    def __init__(self, send, content_type, charset, allow):
+    def __init__(
+        self,
+        send,
+        content_type,
+        charset,
+        allow,
+        request=None,
+        buffer_size: int = BUFFER_SIZE,
+        compressor=None,
+        etag: bool = False,
+        template: HeaderTemplate = None,
+        codec=None,
+    ):
+        if template is None:
+            template = HeaderTemplate(content_type, charset, allow)
         self._processed: bool = False
-        self._headers: list[tuple] = [(b"Access-Control-Allow-Origin", allow.encode())]
+        self._headers: list[tuple] = template.headers.copy()
+        self._template = template
         self._allow = allow
-        super().__init__(send, content_type, charset)
+        self._request = request
+        self._started = False
+        self._buffer: list = []
+        self._buffered = 0
+        self._buffer_size = buffer_size
+        self._watcher = None
+        self._disconnected = False
+        self._status = None
+        self._compressor = compressor
+        self._zlib = None
+        self._head = request is not None and request.scope.get("method") == "HEAD"
+        self._etag = etag
+        self._not_modified = False
+        super().__init__(send, content_type, charset, codec=codec)
+
+    def _encode(self, data) -> bytes:
+        if type(data) == bytes:
+            return data
+        elif type(data) == str:
+            return bytes(data, self.charset)
+        elif data is None:
+            return b""
+        elif self._codec is not None:
+            return self._codec.encode(data)
+        return bytes(str(data), self.charset)
 
     async def process(self, data, status=200):
         if self._redirect:
             return
-        await self.start(status)
-        if self._type == "application/json" and type(data) in (list, dict):
-            body = dumps(data)
-        elif type(data) == bytes:
-            body = data
-        elif type(data) == str:
-            body = bytes(data, self.charset)
+        if self._not_modified:
+            status, body = 304, b""
         else:
-            body = b"" if data is None else bytes(str(data), self.charset)
-        await self._send({"type": "http.response.body", "body": body})
+            body = self._encode(data)
+            if self._compressor is not None:
+                coding = self._coding()
+                if coding is not None and len(body) >= self._compressor.minimum_size:
+                    self.add_header("Content-Encoding", coding)
+                    body = self._compressor.compress(body, coding)
+            if self._etag and status == 200:
+                etag = f'"{blake2b(body, digest_size=12).hexdigest()}"'
+                self.add_header("ETag", etag)
+                if self._fresh(etag, None):
+                    status, body = 304, b""
+            if status >= 200 and status not in (204, 304):
+                self.add_header("Content-Length", str(len(body)))
+        await self.start(status)
+        await self._send(
+            {"type": "http.response.body", "body": b"" if self._head else body}
+        )
         self._processed = True
 
+    def conditional(self, etag=None, last_modified=None) -> bool:
+        """
+        Sets the `ETag`/`Last-Modified` validators of the response and returns `True` when the request
+        `If-None-Match`/`If-Modified-Since` headers match them. The response is then sent as 304 without a body,
+        so a route can check it before doing the expensive work.
+        """
+        modified = None
+        if etag is not None:
+            if etag[:1] != '"' and etag[:3] != 'W/"':
+                etag = f'"{etag}"'
+            self.add_header("ETag", etag)
+            self._etag = False
+        if last_modified is not None:
+            modified = (
+                last_modified.timestamp()
+                if isinstance(last_modified, datetime)
+                else float(last_modified)
+            )
+            self.add_header("Last-Modified", formatdate(modified, usegmt=True))
+        self._not_modified = self._fresh(etag, modified)
+        return self._not_modified
+
+    def _fresh(self, etag, modified) -> bool:
+        request = self._request
+        if request is None or request.scope.get("method") not in ("GET", "HEAD"):
+            return False
+        headers = request.headers
+        if_none_match = headers.get("if-none-match")
+        if if_none_match is not None:
+            return etag is not None and etag_matches(if_none_match, etag)
+        if_modified_since = headers.get("if-modified-since")
+        if if_modified_since is not None and modified is not None:
+            try:
+                since = parsedate_to_datetime(if_modified_since).timestamp()
+            except (TypeError, ValueError):
+                return False
+            return int(modified) <= since
+        return False
+
+    def _coding(self):
+        self.add_header("Vary", "Accept-Encoding")
+        if self._request is None or any(
+            name.lower() == b"content-encoding" for name, _ in self._headers
+        ):
+            return None
+        return self._compressor.negotiate(
+            self._request.headers.get("accept-encoding", "")
+        )
+
     async def abort(self, status=400, data=b""):
         await self.process(data, status=status)
         raise HTTPAbort()
 
     async def start(self, status=200):
-        if self._type[:4] == "text" or self._type[:11] == "application":
-            self.add_header("Content-Type", f"{self._type};charset={self.charset}")
+        if self._request is not None and self._request.session_modified:
+            self._request.app.sessions.save(self, self._request.session)
+        template = self._template
+        if self._type == template.content_type and self.charset == template.charset:
+            self._headers.append(template.content_header)
         else:
-            self.add_header("Content-Type", self._type)
+            self._headers.append(_content_header(self._type, self.charset))
         await self._send(
             {"type": "http.response.start", "status": status, "headers": self._headers}
         )
+        self._started = True
+        self._status = status
+
+    async def send(self, data):  # type: ignore
+        """Sends a chunk of a streamed body, the response is started on the first call."""
+        if self._disconnected:
+            raise ClientDisconnect()
+        if not self._started:
+            await self._start_stream(200)
+        if self._head:
+            return
+        chunk = self._encode(data)
+        if not chunk:
+            return
+        self._buffer.append(chunk)
+        self._buffered += len(chunk)
+        if self._buffered >= self._buffer_size:
+            await self._flush(True)
+
+    async def finish(self) -> None:
+        """Sends the buffered chunks and closes the streamed body."""
+        if self._watcher is not None:
+            self._watcher.cancel()
+            self._watcher = None
+        if not self._disconnected:
+            await self._flush(False)
+        self._processed = True
+
+    async def stream(self, iterable, status=200) -> None:
+        """Streams the chunks of a sync or async iterable, stops early when the client disconnects."""
+        await self._start_stream(status)
+        try:
+            if self._head:
+                pass
+            elif isasyncgen(iterable) or hasattr(iterable, "__aiter__"):
+                async for chunk in iterable:
+                    await self.send(chunk)
+            else:
+                for chunk in iterable:
+                    await self.send(chunk)
+        except ClientDisconnect:
+            pass
+        finally:
+            close = getattr(iterable, "aclose", None) or getattr(
+                iterable, "close", None
+            )
+            if close is not None:
+                result = close()
+                if isasyncgen(iterable):
+                    await result
+            await self.finish()
+
+    async def _start_stream(self, status: int) -> None:
+        if self._compressor is not None:
+            coding = self._coding()
+            if coding is not None:
+                self.add_header("Content-Encoding", coding)
+                self._zlib = self._compressor.stream(coding)
+        await self.start(status)
+        self._watch()
+
+    async def _flush(self, more_body: bool) -> None:
+        buffer = self._buffer
+        body = buffer[0] if len(buffer) == 1 else b"".join(buffer)
+        buffer.clear()
+        self._buffered = 0
+        if self._head:
+            body = b""
+        elif self._zlib is not None:
+            body = self._zlib.compress(body) + self._zlib.flush(
+                Z_SYNC_FLUSH if more_body else Z_FINISH
+            )
+        await self._send(
+            {"type": "http.response.body", "body": body, "more_body": more_body}
+        )
+
+    def _watch(self) -> None:
+        request = self._request
+        if self._watcher is None and request is not None and request.complete:
+            self._watcher = create_task(self._wait_disconnect(request))
 
-    async def send(self, data: bytes):  # type: ignore
-        await self._send({"type": "http.response.body", "body": data})
+    async def _wait_disconnect(self, request) -> None:
+        try:
+            await request.wait_disconnect()
+        except (CancelledError, RuntimeError):
+            return
+        self._disconnected = True
 
     async def redirect(self, location: str, status: int = 301) -> None:
         self._redirect = True
@@ -95,9 +365,11 @@ class HTTPResponse(Response):
         elif maxAge:
             cookie += f"; Max-Age={str(maxAge)}"
         for arg, value_ in kwargs.items():
+            if value_ is None or value_ is False:
+                continue
             cookie += (
                 f"; {arg[0].upper()}{arg[1:]}={value_}"
-                if kwargs[arg]
+                if value_ and value_ is not True
                 else f"; {arg[0].upper()}{arg[1:]}"
             )
 
@@ -110,6 +382,18 @@ class HTTPResponse(Response):
     def processed(self):
         return self._processed
 
+    @property
+    def started(self) -> bool:
+        return self._started
+
+    @property
+    def status(self):
+        return self._status
+
+    @property
+    def disconnected(self) -> bool:
+        return self._disconnected
+
     @property
     def headers(self) -> list:
         return self._headers
@@ -117,3 +401,177 @@ class HTTPResponse(Response):
     @property
     def content_type(self) -> str:
         return self._type
+
+
+def parse_range(value: str, size: int):
+    """
+    Parses a `Range` header into a list of inclusive `(start, end)` byte ranges of a `size` long file,
+    returns `None` when the header is invalid and should be ignored.
+    """
+    unit, _, spec = value.partition("=")
+    if unit.strip().lower() != "bytes" or not spec.strip():
+        return None
+    ranges = []
+    for item in spec.split(","):
+        first, sep, last = item.strip().partition("-")
+        first, last = first.strip(), last.strip()
+        if not sep or not (first or last):
+            return None
+        if (first and not first.isdigit()) or (last and not last.isdigit()):
+            return None
+        if not first:
+            if int(last) and size:
+                ranges.append((max(0, size - int(last)), size - 1))
+        elif last and int(last) < int(first):
+            return None
+        elif int(first) < size:
+            ranges.append((int(first), min(int(last), size - 1) if last else size - 1))
+    return ranges if len(ranges) <= MAX_RANGES else None
+
+
+class FileResponse:
+    """
+    FileResponse is returned by a route to send a file without reading it into memory.
+
+    It sends `Content-Length`, `Last-Modified` and `ETag` headers, answers matching `If-None-Match`/`If-Modified-Since`
+    requests with 304 and `Range`/`If-Range` requests with 206
+    (multipart/byteranges for several ranges) and reads the file in chunks from a memory map. When the server
+    lists the `http.response.pathsend` or `http.response.zerocopysend` extensions in the scope, the file is handed over to it.
+
+    :param path: The path of the file.
+    :param content_type: The content type, guessed from the file name when not set.
+    :param filename: Sends the file as an attachment with this name.
+    :param chunk_size: The size in bytes of a chunk read from the file.
+    """
+
+    __slots__ = ("path", "content_type", "filename", "chunk_size")
+
+    def __init__(self, path, content_type=None, filename=None, chunk_size=CHUNK_SIZE):
+        self.path = os_path.abspath(path)
+        self.content_type = (
+            content_type or guess_type(self.path)[0] or "application/octet-stream"
+        )
+        self.filename = filename
+        self.chunk_size = chunk_size
+
+    async def __call__(self, request, response) -> None:
+        try:
+            info = stat(self.path)
+        except OSError:
+            info = None
+        if info is None or not S_ISREG(info.st_mode):
+            await response.abort(status=404)
+        size = info.st_size
+        etag = f'"{info.st_mtime_ns:x}-{size:x}"'
+        last_modified = formatdate(info.st_mtime, usegmt=True)
+        response.add_header("Accept-Ranges", "bytes")
+        if self.filename:
+            response.add_header(
+                "Content-Disposition", f'attachment; filename="{self.filename}"'
+            )
+        response._type = self.content_type
+        if self.content_type[:5] != "text/":
+            # the bytes of the file are sent as they are, only text has a charset
+            response.charset = None
+        if response.conditional(etag, info.st_mtime):
+            return await response.process(None)
+
+        headers = request.headers
+        ranges = None
+        if "range" in headers and headers.get("if-range") in (
+            None,
+            etag,
+            last_modified,
+        ):
+            ranges = parse_range(headers["range"], size)
+            if ranges == []:
+                response.add_header("Content-Range", f"bytes */{size}")
+                await response.abort(status=416)
+
+        if not ranges:
+            response.add_header("Content-Length", str(size))
+            await response.start(200)
+            await self._send(request, response, [(0, size - 1)] if size else [])
+        elif len(ranges) == 1:
+            start, end = ranges[0]
+            response.add_header("Content-Range", f"bytes {start}-{end}/{size}")
+            response.add_header("Content-Length", str(end - start + 1))
+            await response.start(206)
+            await self._send(request, response, ranges)
+        else:
+            boundary = token_hex(16)
+            parts = [
+                (
+                    f"--{boundary}\r\nContent-Type: {self.content_type}\r\n"
+                    f"Content-Range: bytes {start}-{end}/{size}\r\n\r\n"
+                ).encode()
+                for start, end in ranges
+            ]
+            closing = f"--{boundary}--\r\n".encode()
+            length = len(closing) + sum(
+                len(part) + end - start + 3 for part, (start, end) in zip(parts, ranges)
+            )
+            response._type = f"multipart/byteranges; boundary={boundary}"
+            response.add_header("Content-Length", str(length))
+            await response.start(206)
+            await self._send(request, response, ranges, parts, closing)
+        response._processed = True
+
+    async def _send(self, request, response, ranges, parts=None, closing=b""):
+        send = response._send
+        extensions = request.scope.get("extensions") or {}
+        if request.method == "HEAD" or not ranges:
+            await send({"type": "http.response.body", "body": b""})
+        elif response.status == 200 and "http.response.pathsend" in extensions:
+            await send({"type": "http.response.pathsend", "path": self.path})
+        elif "http.response.zerocopysend" in extensions:
+            with open(self.path, "rb") as file:
+                for index, (start, end) in enumerate(ranges):
+                    if parts:
+                        await send(
+                            {
+                                "type": "http.response.body",
+                                "body": parts[index],
+                                "more_body": True,
+                            }
+                        )
+                    await send(
+                        {
+                            "type": "http.response.zerocopysend",
+                            "file": file,
+                            "offset": start,
+                            "count": end - start + 1,
+                            "more_body": bool(parts) or index < len(ranges) - 1,
+                        }
+                    )
+                    if parts:
+                        await send(
+                            {
+                                "type": "http.response.body",
+                                "body": b"\r\n",
+                                "more_body": True,
+                            }
+                        )
+                if parts:
+                    await send({"type": "http.response.body", "body": closing})
+        else:
+            response._watch()
+            with (
+                open(self.path, "rb") as file,
+                mmap(file.fileno(), 0, access=ACCESS_READ) as view,
+            ):
+                try:
+                    for index, (start, end) in enumerate(ranges):
+                        if parts:
+                            await response.send(parts[index])
+                        for offset in range(start, end + 1, self.chunk_size):
+                            await response.send(
+                                view[offset : min(offset + self.chunk_size, end + 1)]
+                            )
+                        if parts:
+                            await response.send(b"\r\n")
+                    if closing:
+                        await response.send(closing)
+                except ClientDisconnect:
+                    pass
+            await response.finish()
@@ -1,4 +1,463 @@
+from pickle import PicklingError, dumps
 from re import Pattern
+from re import compile as re_compile
+from uuid import UUID
+
+from yasgi.cache import ResponseCache
+from yasgi.concurrency import PROCESS, THREAD, is_async
+from yasgi.middleware import split
+from yasgi.validation import compile_validator
+
+_FLOAT = re_compile(r"\d+(\.\d+)?")
+
+
+def _int(value: str) -> int:
+    if not value.isascii() or not value.isdigit():
+        raise ValueError(value)
+    return int(value)
+
+
+def _float(value: str) -> float:
+    if not _FLOAT.fullmatch(value):
+        raise ValueError(value)
+    return float(value)
+
+
+def _str(value: str) -> str:
+    if not value:
+        raise ValueError(value)
+    return value
+
+
+# name: (converter, priority) - lower priority is tried first
+CONVERTERS = {
+    "int": (_int, 0),
+    "float": (_float, 1),
+    "uuid": (UUID, 2),
+    "str": (_str, 3),
+}
+
+
+def _split(path: str) -> list:
+    path = path.strip("/")
+    return path.split("/") if path else []
+
+
+def _label(route) -> str:
+    if type(route) == Pattern:
+        return route.pattern
+    return route.rstrip("/") or "/"
+
+
+class _Node:
+    __slots__ = ("static", "params", "rest", "routes")
+
+    def __init__(self):
+        self.static: dict = {}
+        self.params: list = []
+        self.rest = None
+        self.routes = None
+
+
+class RouteTree:
+    """
+    RouteTree is a segment based radix tree used to match routes with typed placeholders.
+
+    Templates are compiled once on registration, e.g. `/users/{id:int}/orders/{oid}`,
+    lookups then walk the tree segment by segment, so the cost depends on the path length
+    instead of the number of registered routes. Static segments win over placeholders,
+    typed placeholders (`int`, `float`, `uuid`) over `str` and `path` (rest of the path) is tried last.
+    """
+
+    __slots__ = ("_root", "_size")
+
+    def __init__(self):
+        self._root = _Node()
+        self._size = 0
+
+    def __len__(self):
+        return self._size
+
+    @staticmethod
+    def is_template(route: str) -> bool:
+        return "{" in route
+
+    def insert(self, template: str, method, value) -> None:
+        node = self._root
+        names = set()
+        parts = _split(template)
+        for index, part in enumerate(parts):
+            if part[:1] != "{":
+                if "{" in part or "}" in part:
+                    raise RuntimeError(
+                        f"Placeholder must be a whole path segment! ({template})"
+                    )
+                node = node.static.setdefault(part, _Node())
+                continue
+            if part[-1] != "}":
+                raise RuntimeError(
+                    f"Placeholder must be a whole path segment! ({template})"
+                )
+            name, _, kind = part[1:-1].partition(":")
+            kind = kind or "str"
+            if not name or name in names:
+                raise RuntimeError(f"Invalid placeholder name! ({template})")
+            names.add(name)
+            if kind == "path":
+                if index != len(parts) - 1:
+                    raise RuntimeError(
+                        f"Path placeholder must be the last segment! ({template})"
+                    )
+                node.rest = node.rest or _Node()
+                node = node.rest
+            elif kind in CONVERTERS:
+                node = self._param(node, kind)
+            else:
+                raise RuntimeError(f"Unknown placeholder type '{kind}'! ({template})")
+        if node.routes is None:
+            node.routes = {}
+        elif method in node.routes:
+            raise RuntimeError(f"Route conflict! ({template})")
+        node.routes[method] = value
+        self._size += 1
+
+    @staticmethod
+    def _param(node: _Node, kind: str) -> _Node:
+        convert, priority = CONVERTERS[kind]
+        for item in node.params:
+            if item[0] == kind:
+                return item[3]
+        child = _Node()
+        node.params.append((kind, convert, priority, child))
+        node.params.sort(key=lambda item: item[2])
+        return child
+
+    def find(self, path: str, method):
+        """
+        Returns `(value, args)` for the matched route, `False` when the path matched but
+        no route accepts the method and `None` when nothing matched at all.
+        """
+        return self._find(self._root, _split(path), 0, method, ())
+
+    def _find(self, node: _Node, parts: list, index: int, method, args: tuple):
+        if index == len(parts):
+            if node.routes is None:
+                return None
+            value = node.routes.get(method)
+            return (value, args) if value is not None else False
+        part = parts[index]
+        found = None
+        child = node.static.get(part)
+        if child is not None:
+            found = self._find(child, parts, index + 1, method, args)
+            if found:
+                return found
+        for _, convert, _, child in node.params:
+            try:
+                value = convert(part)
+            except ValueError:
+                continue
+            result = self._find(child, parts, index + 1, method, args + (value,))
+            if result:
+                return result
+            if result is False:
+                found = False
+        if node.rest is not None and node.rest.routes is not None:
+            value = node.rest.routes.get(method)
+            if value is not None:
+                return value, args + ("/".join(parts[index:]),)
+            found = False
+        return found
+
+    def values(self) -> list:
+        values, nodes = [], [self._root]
+        while nodes:
+            node = nodes.pop()
+            if node.routes:
+                values.extend(node.routes.values())
+            nodes.extend(node.static.values())
+            nodes.extend(item[3] for item in node.params)
+            if node.rest is not None:
+                nodes.append(node.rest)
+        return values
+
+    def methods(self, path: str) -> list:
+        methods: list = []
+        self._methods(self._root, _split(path), 0, methods)
+        return methods
+
+    def _methods(self, node: _Node, parts: list, index: int, methods: list) -> None:
+        if index == len(parts):
+            if node.routes:
+                methods.extend(m for m in node.routes if m not in methods)
+            return
+        part = parts[index]
+        if part in node.static:
+            self._methods(node.static[part], parts, index + 1, methods)
+        for _, convert, _, child in node.params:
+            try:
+                convert(part)
+            except ValueError:
+                continue
+            self._methods(child, parts, index + 1, methods)
+        if node.rest is not None and node.rest.routes:
+            methods.extend(m for m in node.rest.routes if m not in methods)
+
+
+class Route:
+    """
+    Route holds the handler of a registered route together with its options.
+
+    :param handler: The routed function.
+    :param content_type: The content type of the route.
+    :param stream: Handler reads the body itself with `request.stream()`.
+    :param compression: The route `Compressor`, `False` disables the application one.
+    :param cache: The `ResponseCache` of GET and HEAD responses.
+    :param etag: Generate an `ETag` from the body and answer matching requests with 304, `None` uses the application setting.
+    :param static: The response does not depend on the request, the handler is called once and its response replayed.
+    :param max_body_size: The maximum request body size in bytes, `None` uses the application setting.
+    :param validator: The compiled validator of the handler parameters.
+    :param middleware: The route middleware, ASGI factories and `(request, response, call_next)` functions.
+    :param path: The route template, the label of its metrics.
+    :param rate_limit: The route `RateLimit`, `False` disables the application one.
+    :param concurrency: The maximum number of concurrently running handler calls.
+    :param executor: Where a plain function handler runs, `thread` (default) or `process`.
+    """
+
+    __slots__ = (
+        "handler",
+        "content_type",
+        "stream",
+        "compression",
+        "cache",
+        "etag",
+        "static",
+        "max_body_size",
+        "validator",
+        "template",
+        "asgi_middleware",
+        "http_middleware",
+        "asgi",
+        "call",
+        "path",
+        "series",
+        "rate_limit",
+        "executor",
+        "concurrency",
+        "semaphore",
+    )
+
+    def __init__(
+        self,
+        handler,
+        content_type=None,
+        stream: bool = False,
+        compression=None,
+        cache=None,
+        etag=None,
+        static: bool = False,
+        max_body_size: int = None,
+        validator=None,
+        middleware=None,
+        path: str = None,
+        rate_limit=None,
+        concurrency: int = None,
+        executor: str = None,
+    ):
+        if static:
+            if cache is not None:
+                raise RuntimeError("Static route can not have a cache!")
+            cache = ResponseCache(ttl=float("inf"), maxsize=1)
+        self.handler = handler
+        self.content_type = content_type
+        self.stream = stream
+        self.compression = compression
+        self.cache = cache
+        self.etag = etag
+        self.static = static
+        self.max_body_size = max_body_size
+        self.validator = validator
+        self.template = None
+        self.asgi_middleware, self.http_middleware = split(middleware)
+        # compiled by the application on startup or the first request
+        self.asgi = None
+        self.call = None
+        self.path = path
+        self.series = None
+        self.rate_limit = rate_limit
+        self.executor = _executor(handler, executor, stream)
+        self.concurrency = concurrency
+        self.semaphore = None
+
+
+def _executor(handler, executor, stream):
+    if executor not in (None, THREAD, PROCESS):
+        raise RuntimeError(f"Unknown route executor! ({executor})")
+    if is_async(handler):
+        if executor is not None:
+            raise RuntimeError(f"Handler of {executor} route must be a plain function!")
+        return None
+    if stream:
+        raise RuntimeError("Streaming route handler must be async!")
+    if executor == PROCESS:
+        try:
+            dumps(handler)
+        except (PicklingError, AttributeError, TypeError):
+            raise RuntimeError(
+                f"Handler of process route must be a module level function! ({handler})"
+            ) from None
+    # plain functions run in the application thread pool by default
+    return executor or THREAD
+
+
+class Router:
+    """
+    Router holds the HTTP and websocket route tables of an application.
+
+    Every `YASGI` instance owns one, `Routing` decorators without an `app` register
+    to the router of the most recently created application. Static routes are looked up
+    in a dict, templates in a `RouteTree` and regex routes are scanned as a fallback.
+    """
+
+    __slots__ = (
+        "app",
+        "options",
+        "_http_routes",
+        "_http_tree",
+        "_http_regex",
+        "_ws_routes",
+        "_ws_tree",
+        "_ws_regex",
+    )
+    _current = None
+
+    def __init__(self, app=None):
+        self.app = app
+        self.options = Route(Router._options, "text/plain", path="*")
+        self._http_routes: dict = {}
+        self._http_tree = RouteTree()
+        self._http_regex: list = []
+        self._ws_routes: dict = {}
+        self._ws_tree = RouteTree()
+        self._ws_regex: list = []
+
+    @classmethod
+    def current(cls) -> "Router":
+        if cls._current is None:
+            cls._current = Router()
+        return cls._current
+
+    @classmethod
+    def bind(cls, app) -> "Router":
+        """Returns the router of a new application, routes registered before any application are adopted."""
+        router = cls._current
+        if router is None or router.app is not None:
+            router = Router()
+        router.app = app
+        cls._current = router
+        return router
+
+    def add_http(self, path, methods: list, route: "Route") -> None:
+        if type(path) == Pattern:
+            self._http_regex.append((path, route, methods))
+
+        elif RouteTree.is_template(path):
+            for method in methods:
+                self._http_tree.insert(path, method, route)
+
+        else:
+            for method in methods:
+                if path not in self._http_routes:
+                    self._http_routes[path] = {}
+                elif method in self._http_routes[path]:
+                    raise RuntimeError(f"Route alreay set! ({path})")
+
+                self._http_routes[path][method] = route
+
+    def add_websocket(self, path, route: "Route") -> None:
+        if type(path) == Pattern:
+            self._ws_regex.append((path, route))
+        elif RouteTree.is_template(path):
+            self._ws_tree.insert(path, None, route)
+        elif path in self._ws_routes:
+            raise RuntimeError(f"Route alreay set! ({path})")
+        else:
+            self._ws_routes[path] = route
+
+    def websocket(self, path: str) -> tuple:
+        route = self._ws_routes.get(path if path[-1] == "/" else f"{path}/")
+        if route:
+            return route, None
+        if self._ws_tree and (found := self._ws_tree.find(path, None)):
+            return found
+        for item in self._ws_regex:
+            if match := item[0].match(path):
+                return item[1], match.groups()
+        return None, None
+
+    def http(self, path: str, method: str) -> tuple:
+        if method == "OPTIONS":
+            return self.options, (), False
+        result = self._http(path, method)
+        if method == "HEAD" and result[0] is None:
+            head = self._http(path, "GET")
+            if head[0] is not None:
+                return head
+        return result
+
+    def _http(self, path: str, method: str) -> tuple:
+        route = self._http_routes.get(path if path[-1] == "/" else f"{path}/", {})
+        if result := route.get(method, False):
+            return result, (), None
+        if self._http_tree:
+            found = self._http_tree.find(path, method)
+            if found:
+                return found[0], found[1], None
+            if found is False:
+                route = True
+        for item in self._http_regex:
+            if match := item[0].match(path):
+                route = True
+                if method in item[2]:
+                    return item[1], match.groups(), None
+        if route and not result:
+            return None, (), True
+        return None, (), False
+
+    def routes(self) -> list:
+        """Returns every HTTP route, a route registered for more methods once."""
+        routes = [self.options]
+        for methods in self._http_routes.values():
+            routes.extend(methods.values())
+        routes.extend(self._http_tree.values())
+        routes.extend(item[1] for item in self._http_regex)
+        return list({id(route): route for route in routes}.values())
+
+    def methods(self, path: str) -> list:
+        methods = list(
+            self._http_routes.get(path if path[-1] == "/" else f"{path}/", {})
+        )
+        if not methods and self._http_tree:
+            methods = self._http_tree.methods(path)
+        if not methods:
+            for item in self._http_regex:
+                if item[0].match(path):
+                    methods = item[2]
+                    break
+        return methods
+
+    @staticmethod
+    async def _options(request, response):
+        methods = request.app.router.methods(request.path)
+        if not len(methods):
+            await response.abort(status=404)
+        response.headers.append((b"Access-Control-Allow-Headers", b"*"))
+        response.headers.append(
+            (b"Access-Control-Allow-Methods", ",".join(methods).encode())
+        )
+
+        response.headers.append((b"Vary", b"Access-Control-Request-Headers"))
+        return b""
 
 
 class Routing:
@@ -28,16 +487,16 @@ class WebsocketsRouting:
     """
     The WebSocket API is an advanced technology that makes it possible to open a two-way interactive communication session between the user's browser and a server. With this API, you can send messages to a server and receive event-driven responses without having to poll the server for a reply.
 
-    :param route: The route to the function.
+    :param route: The route to the function, may contain typed placeholders (`/chat/{room}`).
     :param content_type: The content type of the request.
+    :param app: The application the route is registered to, the most recently created one when not set.
     """
 
-    __slots__ = ("_route", "_content_type")
-    __routes: dict = {}
-    __regex_routes: list = []
+    __slots__ = ("_route", "_content_type", "_app")
 
-    def __init__(self, route, content_type=None):
+    def __init__(self, route, content_type=None, app=None):
         self._content_type = content_type
+        self._app = app
         if type(route) == str:
             if route[0] != "/":
                 raise RuntimeError("Router must start with '/'! (%s)" % route)
@@ -49,26 +508,15 @@ class WebsocketsRouting:
                 f"Router must be str or re.Pattern type! ({route}, {str(type(route))})"
             )
 
-    def __call__(self, fce, *args):
-        if type(self._route) == Pattern:
-            self.__regex_routes.append((self._route, fce, self._content_type))
-        elif self._route in self.__routes:
-            raise RuntimeError(f"Route alreay set! ({self._route})")
-        else:
-            self.__routes[self._route] = fce, self._content_type
-        return fce
+    @property
+    def _router(self) -> Router:
+        return Router.current() if self._app is None else self._app.router
 
-    @staticmethod
-    def get(path: str) -> tuple:
-        route = WebsocketsRouting.__routes.get(
-            path if path[-1] == "/" else f"{path}/", {}
+    def __call__(self, fce, *args):
+        self._router.add_websocket(
+            self._route, Route(fce, self._content_type, path=_label(self._route))
         )
-        if route:
-            return route[0], None, route[1]
-        for item in WebsocketsRouting.__regex_routes:
-            if match := item[0].match(path):
-                return item[1], match.groups(), item[2]
-        return None, None
+        return fce
 
 
 class HTTPRouting(WebsocketsRouting):
@@ -78,73 +526,97 @@ class HTTPRouting(WebsocketsRouting):
     Routing is asynchronous callable, that is it accepts scope which contains information about incoming request,
     send, an awaitable that lets you send events to the client, and receive, an awaitable which lets you receive events from the client.
 
-    :param route: The route to the function.
+    :param route: The route to the function, may contain typed placeholders (`/users/{id:int}`).
     :param methods: The methods of the request.
     :param content_type: The content type of the request.
+    :param stream: Do not buffer the request body, the handler reads it with `request.stream()`.
+    :param compression: The `Compressor` of the route, `False` disables the application one.
+    :param cache: The `ResponseCache` storing GET and HEAD responses of the route.
+    :param etag: Generate an `ETag` from the body and answer matching conditional requests with 304.
+    :param static: Call the handler once and replay its response to every later GET/HEAD request.
+    :param max_body_size: The maximum request body size in bytes, larger requests get 413.
+    :param validate: Validate and convert the handler parameters from their annotations, invalid requests get 422.
+    :param middleware: The route middleware, ASGI factories and `(request, response, call_next)` functions, run inside the application ones.
+    :param rate_limit: The `RateLimit` of the route, `False` disables the application one, limited requests get 429.
+    :param concurrency: The maximum number of concurrently running handler calls, other requests wait for a free slot.
+    :param executor: Where a plain function handler runs, `thread` (default) or `process`. Process handlers
+        get a detached request and no response, `handler(request, *args)`.
+    :param app: The application the route is registered to, the most recently created one when not set.
     """
 
-    __slots__ = ("_route", "__methods", "_content_type")
-    __routes: dict = {}
-    __regex_routes: list = []
+    __slots__ = (
+        "_route",
+        "__methods",
+        "_content_type",
+        "_stream",
+        "_compression",
+        "_cache",
+        "_etag",
+        "_static",
+        "_max_body_size",
+        "_validate",
+        "_middleware",
+        "_rate_limit",
+        "_concurrency",
+        "_executor",
+    )
 
-    def __init__(self, route, methods: list = None, content_type=None):
+    def __init__(
+        self,
+        route,
+        methods: list = None,
+        content_type=None,
+        stream: bool = False,
+        compression=None,
+        cache=None,
+        etag=None,
+        static: bool = False,
+        max_body_size: int = None,
+        validate: bool = False,
+        middleware: list = None,
+        rate_limit=None,
+        concurrency: int = None,
+        executor: str = None,
+        app=None,
+    ):
         if methods is None:
             methods = []
-        super().__init__(route, content_type)
+        super().__init__(route, content_type, app)
         self.__methods = methods or ["GET"]
+        self._stream = stream
+        self._compression = compression
+        self._cache = cache
+        self._etag = etag
+        self._static = static
+        self._max_body_size = max_body_size
+        self._validate = validate
+        self._middleware = middleware
+        self._rate_limit = rate_limit
+        self._concurrency = concurrency
+        self._executor = executor
 
     def __call__(self, fce, *args):
-        if type(self._route) == Pattern:
-            self.__regex_routes.append(
-                (self._route, fce, self.__methods, self._content_type)
-            )
-
-        else:
-            for method in self.__methods:
-                if self._route not in self.__routes:
-                    self.__routes[self._route] = {}
-                elif method in self.__routes[self._route]:
-                    raise RuntimeError(
-                        f"Route alreay set! ({self.__routes.get(method, self._route)})"
-                    )
-
-                self.__routes[self._route][method] = fce, self._content_type
-        return fce
-
-    @staticmethod
-    async def _options(request, response):
-        path = request.path
-        methods = HTTPRouting.__routes.get(
-            path if path[-1] == "/" else f"{path}/", {}
-        ).keys()
-
-        if not methods:
-            for item in HTTPRouting.__regex_routes:
-                if item[0].match(path):
-                    methods = item[2]
-                    break
-        if not len(methods):
-            response.abort(status=404)
-        response.headers.append((b"Access-Control-Allow-Headers", b"*"))
-        response.headers.append(
-            (b"Access-Control-Allow-Methods", ",".join(methods).encode())
+        route = Route(
+            fce,
+            self._content_type,
+            stream=self._stream,
+            compression=self._compression,
+            cache=self._cache,
+            etag=self._etag,
+            static=self._static,
+            max_body_size=self._max_body_size,
+            validator=(
+                compile_validator(
+                    fce, self._route, 1 if self._executor == PROCESS else 2
+                )
+                if self._validate
+                else None
+            ),
+            middleware=self._middleware,
+            path=_label(self._route),
+            rate_limit=self._rate_limit,
+            concurrency=self._concurrency,
+            executor=self._executor,
         )
-
-        response.headers.append((b"Vary", b"Access-Control-Request-Headers"))
-        return b""
-
-    @staticmethod
-    def get(path: str, method: str) -> tuple:
-        if method == "OPTIONS":
-            return HTTPRouting._options, (), False, "text/plain"
-        route = HTTPRouting.__routes.get(path if path[-1] == "/" else f"{path}/", {})
-        if result := route.get(method, False):
-            return result[0], (), None, result[1]
-        for item in HTTPRouting.__regex_routes:
-            if match := item[0].match(path):
-                route = True
-                if method in item[2]:
-                    return item[1], match.groups(), None, item[3]
-        if route and not result:
-            return None, (), True, None
-        return None, (), False, None
+        self._router.add_http(self._route, self.__methods, route)
+        return fce
@@ -0,0 +1,283 @@
+from asyncio import FIRST_COMPLETED, Event, Queue, create_task, wait
+from urllib.parse import urlencode
+
+from orjson import dumps, loads
+
+
+class TestResponse:
+    """
+    TestResponse holds the status, headers and body a `TestClient` request was answered with.
+
+    :param status: The status code.
+    :param raw_headers: The list of encoded `(name, value)` header pairs.
+    :param body: The joined body.
+    :param events: The ASGI events sent by the application.
+    """
+
+    __slots__ = ("status", "raw_headers", "body", "events", "_headers")
+    __test__ = False
+
+    def __init__(self, status: int, raw_headers: list, body: bytes, events: list):
+        self.status = status
+        self.raw_headers = raw_headers
+        self.body = body
+        self.events = events
+        self._headers = None
+
+    @property
+    def headers(self) -> dict:
+        """Decoded headers with lower case names, repeated headers are joined with `, `."""
+        if self._headers is None:
+            self._headers = {}
+            for name, value in self.raw_headers:
+                name, value = name.decode().lower(), value.decode()
+                if name in self._headers:
+                    self._headers[name] += f", {value}"
+                else:
+                    self._headers[name] = value
+        return self._headers
+
+    @property
+    def text(self) -> str:
+        return self.body.decode()
+
+    def json(self):
+        return loads(self.body)
+
+
+class WebSocketSession:
+    """
+    WebSocketSession is a websocket connection of a `TestClient`, used as an async context manager.
+
+    :param app: The ASGI application.
+    :param scope: The websocket scope.
+    """
+
+    __slots__ = ("_app", "_scope", "_inbound", "_outbound", "_task", "accepted")
+
+    def __init__(self, app, scope: dict):
+        self._app = app
+        self._scope = scope
+        self._inbound: Queue = Queue()
+        self._outbound: Queue = Queue()
+        self._task = None
+        self.accepted = False
+
+    async def __aenter__(self) -> "WebSocketSession":
+        self._task = create_task(
+            self._app(self._scope, self._inbound.get, self._outbound.put)
+        )
+        await self._inbound.put({"type": "websocket.connect"})
+        event = await self.receive()
+        if event["type"] != "websocket.accept":
+            await self._task
+            raise RuntimeError(f"Websocket was not accepted! ({event['type']})")
+        self.accepted = True
+        return self
+
+    async def __aexit__(self, *exc_info) -> None:
+        if not self._task.done():
+            await self._inbound.put({"type": "websocket.disconnect", "code": 1000})
+        await self._task
+
+    async def send(self, event: dict) -> None:
+        await self._inbound.put(event)
+
+    async def send_text(self, data: str) -> None:
+        await self.send({"type": "websocket.receive", "text": data})
+
+    async def send_bytes(self, data: bytes) -> None:
+        await self.send({"type": "websocket.receive", "bytes": data})
+
+    async def send_json(self, data) -> None:
+        await self.send_text(dumps(data).decode())
+
+    async def receive(self) -> dict:
+        """Waits for the next event sent by the application."""
+        get = create_task(self._outbound.get())
+        if self._task is not None and not self._task.done():
+            await _first(get, self._task)
+        if not get.done():
+            get.cancel()
+            if self._task.exception() is not None:
+                raise self._task.exception()
+            raise RuntimeError("Websocket application has finished!")
+        return get.result()
+
+    async def receive_text(self) -> str:
+        event = await self.receive()
+        return event.get("text") or event.get("bytes", event.get("body", b"")).decode()
+
+    async def receive_json(self):
+        return loads(await self.receive_text())
+
+
+class TestClient:
+    """
+    TestClient calls an ASGI application in the current event loop, with synthetic scopes and
+    receive/send callables instead of a server and a socket.
+
+    Used as an async context manager it runs the lifespan startup and shutdown of the application.
+
+    :param app: The ASGI application.
+    :param headers: The headers sent with every request.
+    :param root_path: The `root_path` of every scope.
+    """
+
+    __slots__ = ("app", "headers", "root_path", "_lifespan", "_lifespan_task")
+    __test__ = False
+
+    def __init__(self, app, headers: dict = None, root_path: str = ""):
+        self.app = app
+        self.headers = headers or {}
+        self.root_path = root_path
+        self._lifespan = None
+        self._lifespan_task = None
+
+    async def __aenter__(self) -> "TestClient":
+        self._lifespan = (Queue(), Queue())
+        self._lifespan_task = create_task(
+            self.app({"type": "lifespan"}, self._lifespan[0].get, self._lifespan[1].put)
+        )
+        await self._lifespan_event("startup")
+        return self
+
+    async def __aexit__(self, *exc_info) -> None:
+        await self._lifespan_event("shutdown")
+        await self._lifespan_task
+
+    async def _lifespan_event(self, kind: str) -> None:
+        await self._lifespan[0].put({"type": f"lifespan.{kind}"})
+        get = create_task(self._lifespan[1].get())
+        await _first(get, self._lifespan_task)
+        if not get.done():
+            get.cancel()
+            self._lifespan_task.result()
+            raise RuntimeError(f"Lifespan {kind} was not answered!")
+        event = get.result()
+        if event["type"] != f"lifespan.{kind}.complete":
+            raise RuntimeError(event.get("message") or event["type"])
+
+    def scope(self, kind: str, path: str, query=None, headers=None) -> dict:
+        """Builds the scope of a request, `query` can be a str, bytes or a dict/list of pairs."""
+        path, _, query_string = path.partition("?")
+        if query is not None:
+            query_string = (
+                query if type(query) in (str, bytes) else urlencode(query, doseq=True)
+            )
+        if type(query_string) == str:
+            query_string = query_string.encode()
+        raw_headers = [
+            (name.lower().encode(), str(value).encode())
+            for name, value in {**self.headers, **(headers or {})}.items()
+        ]
+        return {
+            "type": kind,
+            "asgi": {"version": "3.0"},
+            "http_version": "1.1",
+            "scheme": "http" if kind == "http" else "ws",
+            "path": path,
+            "raw_path": path.encode(),
+            "query_string": query_string,
+            "root_path": self.root_path,
+            "headers": raw_headers,
+            "client": ("127.0.0.1", 50000),
+            "server": ("testserver", 80),
+        }
+
+    async def request(
+        self,
+        method: str,
+        path: str,
+        query=None,
+        headers: dict = None,
+        body: bytes = b"",
+        json=None,
+        form: dict = None,
+        chunk_size: int = 0,
+    ) -> TestResponse:
+        """
+        Sends a request and collects the whole response. `json` and `form` set the body and its `content-type`,
+        with `chunk_size` the body is received in chunks of that size.
+        """
+        headers = dict(headers or {})
+        if json is not None:
+            body = dumps(json)
+            headers.setdefault("content-type", "application/json")
+        elif form is not None:
+            body = urlencode(form, doseq=True).encode()
+            headers.setdefault("content-type", "application/x-www-form-urlencoded")
+        elif type(body) == str:
+            body = body.encode()
+        if body or method in ("POST", "PUT", "PATCH"):
+            headers.setdefault("content-length", len(body))
+        scope = self.scope("http", path, query, headers)
+        scope["method"] = method.upper()
+
+        size = chunk_size or len(body) or 1
+        chunks = [body[i : i + size] for i in range(0, len(body), size)] or [b""]
+        sent = Event()
+        events: list = []
+
+        async def receive():
+            if chunks:
+                chunk = chunks.pop(0)
+                return {
+                    "type": "http.request",
+                    "body": chunk,
+                    "more_body": bool(chunks),
+                }
+            await sent.wait()
+            return {"type": "http.disconnect"}
+
+        async def send(event):
+            events.append(event)
+            if event["type"] == "http.response.body" and not event.get("more_body"):
+                sent.set()
+
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            sent.set()
+        return _response(events)
+
+    async def get(self, path: str, **kwargs) -> TestResponse:
+        return await self.request("GET", path, **kwargs)
+
+    async def head(self, path: str, **kwargs) -> TestResponse:
+        return await self.request("HEAD", path, **kwargs)
+
+    async def options(self, path: str, **kwargs) -> TestResponse:
+        return await self.request("OPTIONS", path, **kwargs)
+
+    async def post(self, path: str, **kwargs) -> TestResponse:
+        return await self.request("POST", path, **kwargs)
+
+    async def put(self, path: str, **kwargs) -> TestResponse:
+        return await self.request("PUT", path, **kwargs)
+
+    async def patch(self, path: str, **kwargs) -> TestResponse:
+        return await self.request("PATCH", path, **kwargs)
+
+    async def delete(self, path: str, **kwargs) -> TestResponse:
+        return await self.request("DELETE", path, **kwargs)
+
+    def websocket(
+        self, path: str, query=None, headers: dict = None
+    ) -> WebSocketSession:
+        """Returns a websocket session to be used with `async with`."""
+        return WebSocketSession(self.app, self.scope("websocket", path, query, headers))
+
+
+async def _first(*tasks) -> None:
+    await wait(tasks, return_when=FIRST_COMPLETED)
+
+
+def _response(events: list) -> TestResponse:
+    status, headers, body = None, [], []
+    for event in events:
+        if event["type"] == "http.response.start":
+            status, headers = event["status"], list(event.get("headers", []))
+        elif event["type"] == "http.response.body":
+            body.append(event.get("body", b""))
+    return TestResponse(status, headers, b"".join(body), events)
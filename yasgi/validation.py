@@ -0,0 +1,276 @@
+from dataclasses import MISSING, fields, is_dataclass
+from inspect import Parameter, signature
+from re import Pattern
+from typing import Any, Union, get_args, get_origin, get_type_hints
+from uuid import UUID
+
+try:
+    from types import UnionType
+except ImportError:  # pragma: no cover
+    UnionType = Union
+
+from yasgi.datastructures import _bool
+from yasgi.exceptions import ValidationError
+
+# converters of str inputs (path and query parameters), keyed by annotation
+_PARSERS = {
+    str: (str, "string_type", "Input should be a valid string"),
+    int: (int, "int_parsing", "Input should be a valid integer"),
+    float: (float, "float_parsing", "Input should be a valid number"),
+    bool: (_bool, "bool_parsing", "Input should be a valid boolean"),
+    UUID: (UUID, "uuid_parsing", "Input should be a valid UUID"),
+}
+
+
+def _optional(annotation):
+    """Returns `(inner, True)` for `Optional[inner]` annotations."""
+    if get_origin(annotation) in (Union, UnionType):
+        args = [arg for arg in get_args(annotation) if arg is not type(None)]
+        if len(args) == 1 and len(get_args(annotation)) == 2:
+            return args[0], True
+    return annotation, False
+
+
+def _is_typeddict(annotation) -> bool:
+    return (
+        isinstance(annotation, type)
+        and issubclass(annotation, dict)
+        and hasattr(annotation, "__required_keys__")
+    )
+
+
+def _is_body(annotation) -> bool:
+    annotation = _optional(annotation)[0]
+    return is_dataclass(annotation) or _is_typeddict(annotation)
+
+
+def _parser(name: str, annotation, where: str):
+    annotation = _optional(annotation)[0]
+    if annotation is Parameter.empty:
+        annotation = str
+    if annotation not in _PARSERS:
+        raise RuntimeError(
+            f"Unsupported annotation of {where} parameter '{name}'! ({annotation})"
+        )
+    return _PARSERS[annotation]
+
+
+def _path_names(path) -> list:
+    if type(path) == Pattern:
+        return [None] * path.groups
+    path = path.strip("/")
+    return [
+        part[1:-1].partition(":")[0]
+        for part in (path.split("/") if path else [])
+        if part[:1] == "{"
+    ]
+
+
+def _path_step(index: int, name: str, annotation):
+    if annotation is Parameter.empty:
+        return None
+    parse, kind, message = _parser(name, annotation, "path")
+
+    def step(request, args, kwargs, errors):
+        value = args[index]
+        if type(value) == str and parse is not str:
+            try:
+                args[index] = parse(value)
+            except ValueError:
+                errors.append(_error(("path", name), message, kind))
+
+    return step
+
+
+def _query_step(name: str, parameter: Parameter, annotation):
+    inner, optional = _optional(annotation)
+    many = get_origin(inner) is list
+    if many:
+        item = (get_args(inner) or (str,))[0]
+        parse, kind, message = _parser(name, item, "query")
+    else:
+        parse, kind, message = _parser(name, inner, "query")
+    required = parameter.default is Parameter.empty and not optional
+    default = None if parameter.default is Parameter.empty else parameter.default
+
+    def step(request, args, kwargs, errors):
+        query = request.query_params
+        if many:
+            values = query.getlist(name)
+            if not values:
+                if required:
+                    errors.append(_error(("query", name), "Field required", "missing"))
+                kwargs[name] = default
+                return
+            try:
+                kwargs[name] = [parse(value) for value in values]
+            except ValueError:
+                errors.append(_error(("query", name), message, kind))
+            return
+        value = query.get(name)
+        if value is None:
+            if required:
+                errors.append(_error(("query", name), "Field required", "missing"))
+            kwargs[name] = default
+            return
+        try:
+            kwargs[name] = parse(value)
+        except ValueError:
+            errors.append(_error(("query", name), message, kind))
+
+    return step
+
+
+def _body_step(name: str, parameter: Parameter, annotation):
+    inner, optional = _optional(annotation)
+    check = _model(inner)
+    required = parameter.default is Parameter.empty and not optional
+    default = None if parameter.default is Parameter.empty else parameter.default
+
+    def step(request, args, kwargs, errors):
+        data = request.data
+        if data == {} and not required:
+            kwargs[name] = default
+            return
+        kwargs[name] = check(data, ("body",), errors)
+
+    return step
+
+
+def _model(annotation):
+    """Compiles a checker of decoded JSON data for a dataclass, TypedDict or plain type annotation."""
+    annotation, optional = _optional(annotation)
+    if is_dataclass(annotation) or _is_typeddict(annotation):
+        hints = get_type_hints(annotation)
+        if is_dataclass(annotation):
+            specs = [
+                (
+                    field.name,
+                    _model(hints[field.name]),
+                    field.default is MISSING and field.default_factory is MISSING,
+                )
+                for field in fields(annotation)
+                if field.init
+            ]
+        else:
+            required = annotation.__required_keys__
+            specs = [
+                (key, _model(hint), key in required) for key, hint in hints.items()
+            ]
+        build = annotation
+
+        def check_model(value, loc, errors):
+            if value is None and optional:
+                return None
+            if type(value) != dict:
+                errors.append(_error(loc, "Input should be an object", "dict_type"))
+                return None
+            values = {}
+            count = len(errors)
+            for key, check, required in specs:
+                if key in value:
+                    values[key] = check(value[key], loc + (key,), errors)
+                elif required:
+                    errors.append(_error(loc + (key,), "Field required", "missing"))
+            return build(**values) if len(errors) == count else None
+
+        return check_model
+
+    origin = get_origin(annotation)
+    if origin in (list, dict):
+        args = get_args(annotation)
+        item = _model(args[-1]) if args else None
+
+        def check_container(value, loc, errors):
+            if value is None and optional:
+                return None
+            if type(value) != origin:
+                errors.append(
+                    _error(
+                        loc,
+                        f"Input should be a {origin.__name__}",
+                        f"{origin.__name__}_type",
+                    )
+                )
+                return None
+            if item is None:
+                return value
+            if origin is list:
+                return [
+                    item(entry, loc + (i,), errors) for i, entry in enumerate(value)
+                ]
+            return {
+                key: item(entry, loc + (key,), errors) for key, entry in value.items()
+            }
+
+        return check_container
+
+    if annotation in (Parameter.empty, object, Any):
+        return lambda value, loc, errors: value
+
+    if annotation not in (str, int, float, bool, UUID, list, dict):
+        raise RuntimeError(f"Unsupported body annotation! ({annotation})")
+    accepted = (int, float) if annotation is float else (annotation,)
+    kind = f"{getattr(annotation, '__name__', 'value')}_type"
+
+    def check_value(value, loc, errors):
+        if value is None and optional:
+            return None
+        if type(value) not in accepted or (
+            annotation is not bool and type(value) == bool
+        ):
+            if annotation is UUID and type(value) == str:
+                try:
+                    return UUID(value)
+                except ValueError:
+                    pass
+            errors.append(_error(loc, f"Input should be {annotation.__name__}", kind))
+            return None
+        return float(value) if annotation is float else value
+
+    return check_value
+
+
+def _error(loc: tuple, message: str, kind: str) -> dict:
+    return {"loc": list(loc), "msg": message, "type": kind}
+
+
+def compile_validator(handler, path, skip: int = 2):
+    """
+    Builds the validator of a route from the signature of its handler, parameters after the first `skip`
+    ones (request and response) are the path parameters of `path` (in order), a dataclass or TypedDict annotated body and query parameters.
+    All introspection runs here, the returned `validate(request, url_args)` only runs the compiled steps
+    and returns the handler `(args, kwargs)` or raises `ValidationError` with all errors.
+    """
+    parameters = list(signature(handler).parameters.values())[skip:]
+    hints = get_type_hints(handler)
+    names = _path_names(path)
+    if len(parameters) < len(names):
+        raise RuntimeError(f"Handler does not take all path parameters! ({path})")
+
+    steps, body = [], None
+    for index, parameter in enumerate(parameters):
+        annotation = hints.get(parameter.name, parameter.annotation)
+        if index < len(names):
+            step = _path_step(index, parameter.name, annotation)
+        elif parameter.kind in (Parameter.VAR_POSITIONAL, Parameter.VAR_KEYWORD):
+            continue
+        elif _is_body(annotation):
+            if body is not None:
+                raise RuntimeError(f"Handler takes more body parameters! ({path})")
+            step = body = _body_step(parameter.name, parameter, annotation)
+        else:
+            step = _query_step(parameter.name, parameter, annotation)
+        if step is not None:
+            steps.append(step)
+    steps = tuple(steps)
+
+    def validate(request, url_args):
+        args, kwargs, errors = list(url_args), {}, []
+        for step in steps:
+            step(request, args, kwargs, errors)
+        if errors:
+            raise ValidationError(errors)
+        return args, kwargs
+
+    return validate